@@ -0,0 +1,72 @@
+"""
+Broadcast fan-out throughput: the previous publish loop, which awaited
+queue.put per subscriber and each handler inline, vs the single-pass
+put_nowait fan-out with handlers dispatched in the background.
+
+One handler is registered for the broadcast topic; it sleeps --handler-ms.
+
+Usage:
+    python benchmarks/bench_broadcast_fanout.py --subscribers 100 1000 10000 --deliveries 1000000 --handler-ms 1
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from messaging import Message, MessageBroker
+
+class LegacyBroker(MessageBroker):
+    """The previous subscribe and publish paths: unbounded asyncio.Queues, awaited one by one."""
+    async def subscribe(self, node_id, topics=None, capacity=None, policy=None):
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(node_id, set()).add(queue)
+        self.all_topics.add(queue)
+        return queue
+
+    async def publish(self, message):
+        for queue in self.all_topics:
+            await queue.put(message)
+        for handler in self.message_handlers.get(message.message_type, ()):
+            await handler(message)
+
+async def run(broker, subscribers, broadcasts, handler_delay):
+    for node_id in range(subscribers):
+        await broker.subscribe(node_id, capacity=broadcasts)
+
+    async def handler(message):
+        await asyncio.sleep(handler_delay)
+
+    broker.register_handler('consensus', handler)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(broadcasts):
+        sent = time.perf_counter()
+        await broker.publish(Message.create(-1, -1, 'consensus', {'round': i}))
+        latencies.append(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - start
+    await broker.drain_handlers()
+    latencies.sort()
+    return broadcasts / elapsed, latencies[len(latencies) // 2], latencies[(len(latencies) - 1) * 99 // 100]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--deliveries', type=int, default=1000000,
+                        help="subscribers x broadcasts per run")
+    parser.add_argument('--handler-ms', type=float, default=1.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'subscribers':>11s} {'publish':>8s} {'broadcasts/s':>13s} {'p50':>10s} {'p99':>10s}")
+    for subscribers in args.subscribers:
+        broadcasts = max(10, args.deliveries // subscribers)
+        for label, broker_cls in (('legacy', LegacyBroker), ('fan-out', MessageBroker)):
+            rate, p50, p99 = asyncio.run(run(broker_cls(), subscribers, broadcasts, args.handler_ms / 1e3))
+            print(f"{subscribers:11d} {label:>8s} {rate:13.0f} {p50 * 1e3:7.3f} ms {p99 * 1e3:7.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Checkpoint write and restore time for a large network.
+
+Builds a network, writes a full checkpoint, advances a few nodes and writes an
+incremental one, then restores the network from disk.
+
+Usage:
+    python benchmarks/bench_checkpoint.py --nodes 100000 --insights 8
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from checkpoint import NetworkCheckpointer, restore_network
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"{label:24s} {time.perf_counter() - start:8.3f} s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=100000)
+    parser.add_argument('--insights', type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    population = NodePopulation(capacity=args.nodes)
+    nodes = [OuroborosNode(i, 'virtue', population) for i in range(args.nodes)]
+    for node in nodes:
+        for _ in range(args.insights):
+            node.generate_insight()
+
+    directory = tempfile.mkdtemp()
+    try:
+        checkpointer = NetworkCheckpointer(directory)
+        sections = timed("capture", checkpointer.capture, nodes)
+        timed("full write", checkpointer.write, sections)
+        nodes[0].apply_observer_influence({'virtue': 0.1})
+        timed("incremental write", checkpointer.write, checkpointer.capture(nodes))
+        restored = timed("restore", restore_network, directory)
+        assert restored[-1].state_digest() == nodes[-1].state_digest()
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-round consensus cost: flat all-to-all aggregation vs committee-based
+hierarchical consensus.
+
+Flat: one node aggregates every other node's state (each of the N nodes does
+this every round). Hierarchical: every committee aggregates its members and
+seals a proved digest, and the levels above verify and combine the digests.
+"per committee" is the mean cost of one committee's local round, which is
+what each participant pays; "total" simulates every committee in sequence.
+
+Usage:
+    python benchmarks/bench_committee.py --nodes 1000 10000 100000 --committee-size 32 64 256
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from committee import HierarchicalConsensus, assign_committees
+from consensus_kernel import weighted_mean
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--committee-size', type=int, nargs='+', default=[32, 64, 256])
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    # Warm up the kernel so the first timing is not skewed
+    weighted_mean(np.ones((2, 4)), np.ones(2))
+
+    print(f"{'nodes':>7s} {'mode':>10s} {'levels':>6s} {'messages':>15s} {'per node/committee':>19s} {'total':>10s}")
+    for count in args.nodes:
+        values = np.column_stack([rng.dirichlet(np.ones(3), count), rng.integers(0, 100, count)])
+        trust = rng.uniform(0.1, 1.0, count)
+
+        start = time.perf_counter()
+        weighted_mean(values[1:], trust[1:])
+        per_node = time.perf_counter() - start
+        print(f"{count:7d} {'flat':>10s} {1:6d} {count * (count - 1):15d} {per_node * 1e3:16.3f} ms "
+              f"{per_node * count:8.3f} s")
+
+        for size in args.committee_size:
+            committees = assign_committees(np.arange(count), size)
+            consensus = HierarchicalConsensus(values, trust, committees, committee_size=size, method='mean')
+            start = time.perf_counter()
+            digests = consensus.local_digests()
+            local = time.perf_counter() - start
+            result = consensus.combine(digests)
+            total = time.perf_counter() - start
+            print(f"{count:7d} {f'c={size}':>10s} {result['levels']:6d} {result['messages']:15d} "
+                  f"{local / len(digests) * 1e3:16.3f} ms {total:8.3f} s")
+
+if __name__ == '__main__':
+    main()
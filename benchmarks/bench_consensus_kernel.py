@@ -0,0 +1,71 @@
+"""
+Trust-weighted consensus throughput for 10 to 10k peers: the previous
+per-key np.average over nested dicts vs packing the states and running the
+matrix kernel, plus each aggregator on an already packed matrix.
+
+Usage:
+    python benchmarks/bench_consensus_kernel.py --peers 10 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import networkx as nx
+import numpy as np
+from consensus_kernel import AGGREGATORS, states_to_matrix, weighted_mean
+from population import ETHICAL_FRAMEWORKS
+
+def make_states(count: int, rng):
+    weights = rng.dirichlet(np.ones(3), count)
+    return [{'state': {
+        'node_id': i,
+        'recursion_depth': int(rng.integers(0, 100)),
+        'ethical_weights': dict(zip(ETHICAL_FRAMEWORKS, weights[i].tolist())),
+        'state': 'ACTIVE_RECURSION'
+    }} for i in range(count)]
+
+def legacy_consensus(states, trust_graph):
+    """The previous _compute_consensus and _compute_trust_weights."""
+    weights = [trust_graph.nodes.get(s['state']['node_id'], {}).get('trust_score', 1.0) for s in states]
+    consensus = {}
+    for key in ['ethical_weights', 'recursion_depth']:
+        values = [s['state'][key] for s in states]
+        if isinstance(values[0], dict):
+            consensus[key] = {k: np.average([v[k] for v in values], weights=weights) for k in values[0].keys()}
+        else:
+            consensus[key] = np.average(values, weights=weights)
+    return consensus
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peers', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'peers':>7s} {'legacy':>12s} {'pack+mean':>12s} {'pack':>12s} " + ' '.join(f"{name:>12s}" for name in AGGREGATORS))
+    for count in args.peers:
+        states = make_states(count, rng)
+        trust_graph = nx.DiGraph()
+        trust_graph.add_nodes_from((i, {'trust_score': float(t)}) for i, t in enumerate(rng.uniform(0.1, 1, count)))
+        matrix = states_to_matrix(states)
+        trust = rng.uniform(0.1, 1, count)
+        timings = [best_of(lambda: legacy_consensus(states, trust_graph), args.repeat),
+                   best_of(lambda: weighted_mean(states_to_matrix(states), trust), args.repeat),
+                   best_of(lambda: states_to_matrix(states), args.repeat)]
+        timings += [best_of(lambda: fn(matrix, trust), args.repeat) for fn in AGGREGATORS.values()]
+        print(f"{count:7d} " + ' '.join(f"{t * 1e6:9.1f} us" for t in timings))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Sustained consensus throughput: rounds run one after another vs pipelined
+rounds that overlap collection and verification with publishing.
+
+Publishing goes through a broker that spends --publish-ms per round, standing
+in for a slow broadcast.
+
+Usage:
+    python benchmarks/bench_consensus_pipeline.py --nodes 2000 --rounds 20 --publish-ms 40
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from consensus import ConsensusManager
+from simulation import build_network
+
+class SlowBroker:
+    """Broker whose broadcasts cost `round_delay` seconds per `per_round` messages."""
+    def __init__(self, round_delay: float, per_round: int):
+        self.round_delay = round_delay
+        self.per_round = per_round
+        self.sent = 0
+
+    async def broadcast(self, sender_id, message_type, payload):
+        self.sent += 1
+        if self.sent % self.per_round == 0:
+            await asyncio.sleep(self.round_delay)
+
+class NullVisualizer:
+    def plot_ontology_graph(self, graph):
+        pass
+
+    def plot_ethical_weights(self, nodes):
+        pass
+
+def run(nodes, depth, rounds, publish_delay, workers):
+    manager = ConsensusManager(SlowBroker(publish_delay, len(nodes)), verify_workers=workers, pipeline_depth=depth)
+    manager.visualizer = NullVisualizer()
+    start = time.perf_counter()
+    asyncio.run(manager.run_pipeline(nodes, rounds=rounds, interval=0))
+    elapsed = time.perf_counter() - start
+    manager.shutdown()
+    return rounds / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--publish-ms', type=float, default=40.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    nodes = build_network(args.nodes, seed=0)
+    for depth in args.depths:
+        label = 'sequential' if depth == 1 else f'pipelined x{depth}'
+        rate = run(nodes, depth, args.rounds, args.publish_ms / 1e3, args.workers)
+        print(f"{label:14s} {rate:7.2f} rounds/s ({args.nodes} nodes)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Consensus message volume and time to convergence: all-to-all state collection
+vs push-sum gossip with bounded fanout.
+
+All-to-all agrees after one round in which every node collects every other
+node's state (N * (N - 1) messages); each node's aggregation is timed with the
+consensus kernel. Gossip runs until every node's estimate agrees within the
+tolerance.
+
+Usage:
+    python benchmarks/bench_gossip.py --nodes 100 1000 10000 100000 --fanout 1 3 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from consensus_kernel import weighted_mean
+from gossip import GossipConsensus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--fanout', type=int, nargs='+', default=[1, 3, 8])
+    parser.add_argument('--tolerance', type=float, default=1e-3)
+    parser.add_argument('--all-to-all-max', type=int, default=10000,
+                        help="largest network for which all-to-all aggregation is timed")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'nodes':>7s} {'mode':>14s} {'rounds':>7s} {'messages':>15s} {'seconds':>9s}")
+    for count in args.nodes:
+        values = np.column_stack([rng.dirichlet(np.ones(3), count), rng.integers(0, 100, count)])
+        trust = rng.uniform(0.1, 1.0, count)
+
+        if count <= args.all_to_all_max:
+            start = time.perf_counter()
+            for node in range(count):
+                mask = np.arange(count) != node
+                weighted_mean(values[mask], trust[mask])
+            elapsed = f"{time.perf_counter() - start:9.3f}"
+        else:
+            elapsed = f"{'-':>9s}"
+        print(f"{count:7d} {'all-to-all':>14s} {1:7d} {count * (count - 1):15d} {elapsed}")
+
+        for fanout in args.fanout:
+            gossip = GossipConsensus(values, trust, fanout, np.random.default_rng(fanout))
+            start = time.perf_counter()
+            stats = gossip.run(args.tolerance)
+            elapsed = time.perf_counter() - start
+            print(f"{count:7d} {f'gossip k={fanout}':>14s} {stats['rounds']:7d} {stats['messages']:15d} {elapsed:9.3f}")
+
+if __name__ == '__main__':
+    main()
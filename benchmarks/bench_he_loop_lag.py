@@ -0,0 +1,79 @@
+"""
+Event-loop lag under HE load: inline encrypt_state vs encrypt_state_async.
+
+A probe coroutine sleeps in short intervals and records how late it wakes up
+while many nodes encrypt their state concurrently.
+
+Usage:
+    python benchmarks/bench_he_loop_lag.py --nodes 200 --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from he_context import he_manager
+from he_executor import HEExecutor
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+
+PROBE_INTERVAL = 0.005
+
+async def probe(lags, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(loop.time() - start - PROBE_INTERVAL)
+
+async def run(nodes, mode: str, executor: HEExecutor):
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+
+    async def inline(node):
+        await asyncio.sleep(0)
+        node.encrypt_state()
+
+    start = time.perf_counter()
+    if mode == 'inline':
+        await asyncio.gather(*(inline(node) for node in nodes))
+    else:
+        await asyncio.gather(*(node.encrypt_state_async(executor) for node in nodes))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    lags = np.array(lags or [0.0]) * 1e3
+    print(f"{mode:7s} total {elapsed:7.2f} s   lag p50 {np.percentile(lags, 50):7.2f} ms   "
+          f"p99 {np.percentile(lags, 99):7.2f} ms   max {lags.max():7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    he_manager.cache_dir = tempfile.mkdtemp(prefix='he_cache_')
+    population = NodePopulation(capacity=args.nodes)
+    nodes = [OuroborosNode(i, 'virtue', population) for i in range(args.nodes)]
+    for node in nodes:
+        node.generate_insight()
+    he_manager.get_keyed_context()
+
+    executor = HEExecutor(max_workers=args.workers)
+    try:
+        asyncio.run(run(nodes, 'inline', executor))
+        asyncio.run(run(nodes, 'pool', executor))
+    finally:
+        executor.shutdown()
+        shutil.rmtree(he_manager.cache_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
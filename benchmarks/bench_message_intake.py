@@ -0,0 +1,81 @@
+"""
+Message intake latency and idle cost: event-driven process_messages vs the old
+100 ms polling loop.
+
+1k idle nodes without queues run their intake loops while CPU time is measured.
+Queues are then attached, a burst of messages is delivered to every node and
+the enqueue-to-handle latency of each message is recorded.
+
+Usage:
+    python benchmarks/bench_message_intake.py --nodes 1000 --idle 2.0 --burst 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+
+class ProbeNode(OuroborosNode):
+    """Records how long each message waited in the queue before being handled."""
+    latencies = []
+
+    async def _handle_message(self, message):
+        self.latencies.append(time.perf_counter() - json.loads(message)['sent'])
+
+class PollingNode(ProbeNode):
+    """The previous intake loop, kept here for comparison."""
+    async def process_messages(self):
+        while True:
+            if self.message_queue:
+                message = await self.message_queue.get()
+                await self._handle_message(message)
+            await asyncio.sleep(0.1)
+
+async def run(node_cls, count: int, idle: float, burst: int):
+    population = NodePopulation(capacity=count)
+    nodes = [node_cls(i, 'virtue', population) for i in range(count)]
+    node_cls.latencies = []
+    tasks = [asyncio.create_task(node.process_messages()) for node in nodes]
+    await asyncio.sleep(0.2)
+
+    cpu_start = time.process_time()
+    await asyncio.sleep(idle)
+    idle_cpu = time.process_time() - cpu_start
+
+    for node in nodes:
+        node.message_queue = asyncio.Queue()
+    await asyncio.sleep(0.2)
+    for node in nodes:
+        for _ in range(burst):
+            node.message_queue.put_nowait(json.dumps({'topic': 'probe', 'sent': time.perf_counter()}))
+    while len(node_cls.latencies) < count * burst:
+        await asyncio.sleep(0.01)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = np.array(node_cls.latencies) * 1e3
+    print(f"{node_cls.__name__:12s} idle CPU {idle_cpu / idle * 100:6.1f} %   "
+          f"latency p50 {np.percentile(latencies, 50):7.2f} ms   p99 {np.percentile(latencies, 99):7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--idle', type=float, default=2.0)
+    parser.add_argument('--burst', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    asyncio.run(run(PollingNode, args.nodes, args.idle, args.burst))
+    asyncio.run(run(ProbeNode, args.nodes, args.idle, args.burst))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Offline buffering through a long partition: the old per-recipient list
+buffer vs the ring-buffered OfflineStore with a memory cap and disk spill.
+
+Messages are published to offline recipients round-robin, then every
+recipient reconnects and its backlog is replayed. "MiB" is the memory the
+broker holds for the backlog, measured with tracemalloc; the store's spill
+files are reported separately as "disk MiB". Buffering times include the
+tracemalloc overhead.
+
+Usage:
+    python benchmarks/bench_offline_store.py --recipients 200 --messages 200000 --memory-cap 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from messaging import Message, MessageBroker
+from offline_store import OfflineStore
+
+class ListBuffer:
+    """The previous offline buffer: a list per recipient trimmed with pop(0)."""
+    def __init__(self, buffer_size):
+        self.buffers = {}
+        self.buffer_size = buffer_size
+
+    def add(self, recipient, message):
+        buffer = self.buffers.setdefault(recipient, [])
+        buffer.append(message)
+        if len(buffer) > self.buffer_size:
+            buffer.pop(0)
+
+    def drain(self, recipient):
+        return self.buffers.pop(recipient, [])
+
+    def stats(self):
+        return {'in_memory': sum(len(buffer) for buffer in self.buffers.values()), 'on_disk': 0, 'disk_bytes': 0}
+
+async def partition(store, recipients, messages):
+    for i in range(messages):
+        store.add(i % recipients, Message.create(-1, i % recipients, 'consensus', {
+            'node_id': i, 'state_proof': '0' * 64, 'timestamp': float(i)
+        }))
+
+async def replay(broker, recipients):
+    delivered = 0
+    for node_id in range(recipients):
+        queue = await broker.subscribe(node_id, capacity=0)
+        await broker.deliver_buffered_messages(node_id, queue)
+        delivered += queue.qsize()
+        await broker.unsubscribe(node_id, queue)
+    return delivered
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=200)
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--buffer-size', type=int, default=1000)
+    parser.add_argument('--memory-cap', type=int, default=20000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'buffer':>14s} {'in memory':>10s} {'on disk':>10s} {'MiB':>8s} {'disk MiB':>9s} "
+          f"{'buffer s':>9s} {'replayed':>9s} {'replay s':>9s}")
+    with tempfile.TemporaryDirectory() as spill_dir:
+        cases = [
+            ('list', lambda: ListBuffer(args.buffer_size)),
+            ('offline store', lambda: OfflineStore(Message.to_bytes, Message.from_buffer, args.buffer_size,
+                                                   memory_cap=args.memory_cap, spill_dir=spill_dir))
+        ]
+        for label, make_store in cases:
+            store = make_store()
+            broker = MessageBroker(offline_store=store)
+            tracemalloc.start()
+            start = time.perf_counter()
+            asyncio.run(partition(store, args.recipients, args.messages))
+            buffered = time.perf_counter() - start
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats = store.stats()
+            start = time.perf_counter()
+            delivered = asyncio.run(replay(broker, args.recipients))
+            replayed = time.perf_counter() - start
+            print(f"{label:>14s} {stats['in_memory']:10d} {stats['on_disk']:10d} {current / 2**20:8.1f} "
+                  f"{stats['disk_bytes'] / 2**20:9.1f} {buffered:9.2f} {delivered:9d} {replayed:9.2f}")
+            if hasattr(store, 'close'):
+                store.close()
+            del broker, store
+
+if __name__ == '__main__':
+    main()
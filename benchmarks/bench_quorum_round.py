@@ -0,0 +1,64 @@
+"""
+Consensus round latency with heavy-tailed peer response times: waiting for
+every peer (the previous gather-then-check round) vs the quorum round engine.
+
+Peer latencies are lognormal, and a small fraction of peers stall for
+`--straggler` seconds.
+
+Usage:
+    python benchmarks/bench_quorum_round.py --peers 30 --rounds 20 --straggler 1.0
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+from quorum import QuorumRound
+
+class DelayedNode(OuroborosNode):
+    delay = 0.0
+
+    async def fetch_verifiable_state(self):
+        await asyncio.sleep(self.delay)
+        return self.get_verifiable_state()
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    population = NodePopulation(capacity=args.peers)
+    peers = [DelayedNode(i, 'virtue', population) for i in range(args.peers)]
+    engine = QuorumRound(timeout=args.straggler * 2)
+    wait_all, quorum = [], []
+    for _ in range(args.rounds):
+        delays = rng.lognormal(np.log(0.01), 0.5, args.peers)
+        delays[rng.random(args.peers) < args.straggler_rate] = args.straggler
+        for peer, delay in zip(peers, delays):
+            peer.delay = float(delay)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(peer.fetch_verifiable_state() for peer in peers))
+        wait_all.append(time.perf_counter() - start)
+        quorum.append((await engine.collect(peers)).elapsed)
+
+    for label, times in (('wait for all', wait_all), ('quorum', quorum)):
+        times = np.array(times) * 1e3
+        print(f"{label:14s} p50 {np.percentile(times, 50):8.1f} ms   p99 {np.percentile(times, 99):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peers', type=int, default=30)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--straggler', type=float, default=1.0)
+    parser.add_argument('--straggler-rate', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
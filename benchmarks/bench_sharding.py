@@ -0,0 +1,47 @@
+"""
+Sharded simulation throughput in node ticks per second for increasing worker counts.
+
+A node tick here is the batched NodePopulation equivalent of
+OuroborosNode.tick: an insight for every actively recursing node and an
+ethical bounds check. Each step also applies cross-shard influence, records
+trust verdicts in the shards' TrustStores and proves a summary with the
+nodes' state digests. There are no OuroborosNode objects, messaging,
+encryption or per-node consensus rounds, so a node tick costs well under a
+microsecond. With so little work per step, the pipe round trip to every
+worker and the serial routing in the coordinator dominate small networks:
+at 20k nodes, two workers have measured slower than one. Speedups need
+enough nodes or ticks per step for shard work to outweigh that overhead,
+and a core per worker.
+
+Usage:
+    python benchmarks/bench_sharding.py --nodes 200000 --steps 50 --ticks 10 --workers 1 2 4 8
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sharding import ShardedRunner
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=200000)
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--ticks', type=int, default=10, help="insight ticks per step")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        # Unbounded recursion so every step does the same amount of work
+        with ShardedRunner(args.nodes, workers, seed=0, recursion_limit=2 ** 62) as runner:
+            stats = runner.run(args.steps, ticks_per_step=args.ticks)
+        rate = stats['node_ticks_per_second']
+        baseline = baseline or rate
+        print(f"workers {workers:3d}   {rate / 1e6:8.2f} M node-ticks/s   speedup {rate / baseline:5.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Node startup benchmark: per-node HE key generation vs the shared context manager.
+
+The legacy path (contextGen + keyGen in every constructor) is timed on a small
+sample of nodes and extrapolated to the full node count.
+
+Usage:
+    python benchmarks/bench_startup.py --nodes 10000 --legacy-sample 20
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pyfhel import Pyfhel
+from config import ENCRYPTION_PARAMS
+from he_context import he_manager
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+
+def legacy_per_node_seconds(sample: int) -> float:
+    """Average cost of the old constructor path: a fresh context and keys per node."""
+    start = time.perf_counter()
+    for _ in range(sample):
+        he = Pyfhel()
+        he.contextGen(p=ENCRYPTION_PARAMS["p"], m=ENCRYPTION_PARAMS["m"], sec=ENCRYPTION_PARAMS["sec"])
+        he.keyGen()
+    return (time.perf_counter() - start) / sample
+
+def shared_startup_seconds(nodes: int, cache_dir: str) -> float:
+    """Create `nodes` nodes and encrypt once, starting from an empty in-memory context pool."""
+    he_manager.cache_dir = cache_dir
+    he_manager.clear()
+
+    start = time.perf_counter()
+    population = NodePopulation(capacity=nodes)
+    network = [OuroborosNode(i, 'utilitarian', population) for i in range(nodes)]
+    network[0].encrypt_state()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=10000)
+    parser.add_argument('--legacy-sample', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    per_node = legacy_per_node_seconds(args.legacy_sample)
+    cache_dir = tempfile.mkdtemp(prefix='he_cache_')
+    try:
+        cold = shared_startup_seconds(args.nodes, cache_dir)
+        warm = shared_startup_seconds(args.nodes, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"nodes:                      {args.nodes}")
+    print(f"legacy (extrapolated):      {per_node * args.nodes:10.2f} s  ({per_node * 1e3:.1f} ms/node)")
+    print(f"shared context, cold cache: {cold:10.2f} s")
+    print(f"shared context, warm cache: {warm:10.2f} s")
+
+if __name__ == '__main__':
+    main()
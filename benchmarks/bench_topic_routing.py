@@ -0,0 +1,47 @@
+"""
+Broadcast cost with every queue receiving every message vs topic-indexed
+routing, where each subscriber only subscribes to the topics it handles.
+
+Subscribers are spread evenly over --topics topics, so a broadcast interests
+1 / topics of them.
+
+Usage:
+    python benchmarks/bench_topic_routing.py --subscribers 10000 --topics 2 10 --broadcasts 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from messaging import MessageBroker
+
+async def run(subscribers, topics, broadcasts, indexed):
+    broker = MessageBroker(queue_capacity=broadcasts + 1)
+    for node_id in range(subscribers):
+        await broker.subscribe(node_id, topics=[f'topic-{node_id % topics}'] if indexed else None)
+    start = time.perf_counter()
+    for i in range(broadcasts):
+        await broker.broadcast(-1, f'topic-{i % topics}', {'round': i})
+    elapsed = time.perf_counter() - start
+    return elapsed / broadcasts, broker.get_buffer_status()['queued_messages']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--topics', type=int, nargs='+', default=[2, 10])
+    parser.add_argument('--broadcasts', type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'topics':>6s} {'routing':>8s} {'per broadcast':>14s} {'deliveries':>11s}")
+    for topics in args.topics:
+        for label, indexed in (('all', False), ('indexed', True)):
+            per_broadcast, deliveries = asyncio.run(run(args.subscribers, topics, args.broadcasts, indexed))
+            print(f"{topics:6d} {label:>8s} {per_broadcast * 1e3:11.2f} ms {deliveries:11d}")
+
+if __name__ == '__main__':
+    main()
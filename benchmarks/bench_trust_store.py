@@ -0,0 +1,77 @@
+"""
+Trust bookkeeping memory and update throughput: one networkx DiGraph per node
+(the previous layout) vs the shared sparse TrustStore.
+
+Every node records interactions with `--peers` random peers.
+
+Usage:
+    python benchmarks/bench_trust_store.py --nodes 50000 --peers 20
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import networkx as nx
+import numpy as np
+from trust_store import TrustStore
+
+def update_graph(graph, node_id, success):
+    """The previous OuroborosNode.update_trust_score."""
+    if not graph.has_node(node_id):
+        graph.add_node(node_id, trust_score=1.0)
+    current_score = graph.nodes[node_id]['trust_score']
+    delta = 0.1 if success else -0.2
+    graph.nodes[node_id]['trust_score'] = max(0.1, min(1.0, current_score + delta))
+
+def measure(label, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:28s} {current / 2 ** 20:9.1f} MiB   {elapsed:7.2f} s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=50000)
+    parser.add_argument('--peers', type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    owners = np.repeat(np.arange(args.nodes), args.peers)
+    peers = rng.integers(0, args.nodes, len(owners))
+    success = rng.random(len(owners)) < 0.7
+    print(f"{args.nodes} nodes, {len(owners)} updates")
+
+    def build_graphs():
+        graphs = [nx.DiGraph() for _ in range(args.nodes)]
+        for owner, peer, ok in zip(owners.tolist(), peers.tolist(), success.tolist()):
+            update_graph(graphs[owner], peer, ok)
+        return graphs
+
+    def build_store_single():
+        store = TrustStore()
+        for owner, peer, ok in zip(owners.tolist(), peers.tolist(), success.tolist()):
+            store.update(owner, peer, ok)
+        store.flush()
+        return store
+
+    def build_store_batch():
+        store = TrustStore()
+        store.update_batch(owners, peers, success)
+        store.flush()
+        return store
+
+    graphs = measure("per-node DiGraph", build_graphs)
+    del graphs
+    measure("TrustStore, single updates", build_store_single)
+    store = measure("TrustStore, batched updates", build_store_batch)
+    print(f"TrustStore: {store.nnz} edges, {store.nbytes() / store.nnz:.1f} bytes per edge")
+
+if __name__ == '__main__':
+    main()
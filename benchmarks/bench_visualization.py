@@ -0,0 +1,54 @@
+"""
+Consensus round time with visualizations redrawn inline after every round
+vs handed to the debounced BackgroundRenderer.
+
+Usage:
+    python benchmarks/bench_visualization.py --nodes 100 200 400 --rounds 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from consensus import ConsensusManager
+from simulation import build_network
+
+class NullBroker:
+    async def broadcast(self, sender_id, message_type, payload):
+        pass
+
+async def timed_rounds(manager, nodes, rounds, inline):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await manager.run_round(nodes)
+        if inline:
+            # The previous behaviour: redraw on the consensus coroutine before the round ends
+            manager.renderer.flush()
+        times.append(time.perf_counter() - start)
+    await manager.renderer.stop()
+    return sorted(times)[len(times) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[100, 200, 400])
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'nodes':>6s} {'inline':>12s} {'background':>12s}")
+    for count in args.nodes:
+        nodes = build_network(count, seed=0)
+        results = []
+        for inline in (True, False):
+            manager = ConsensusManager(NullBroker())
+            results.append(asyncio.run(timed_rounds(manager, nodes, args.rounds, inline)))
+            manager.shutdown()
+        print(f"{count:6d} {results[0] * 1e3:9.1f} ms {results[1] * 1e3:9.1f} ms")
+
+if __name__ == '__main__':
+    main()
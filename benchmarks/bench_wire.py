@@ -0,0 +1,93 @@
+"""
+Message serialization: JSON with uuid4 string ids vs the binary wire format.
+
+Per-message encode and parse times and frame sizes for the consensus and
+influence payloads the network broadcasts, plus a generic payload that the
+wire format still carries as JSON. Binary frames are parsed from one
+memoryview over the whole stream. Times cover the codec only: building the
+Message from the parsed fields costs the same either way. As with timeit,
+the garbage collector is off while timing.
+
+Usage:
+    python benchmarks/bench_wire.py --messages 100000
+"""
+import argparse
+import dataclasses
+import gc
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from messaging import Message
+from wire import decode_fields
+
+def json_encode(message):
+    return json.dumps({
+        'id': message.id, 'sender_id': message.sender_id, 'recipient_id': message.recipient_id,
+        'topic': message.message_type, 'payload': dict(message.payload), 'timestamp': message.timestamp
+    }).encode()
+
+def json_decode(data):
+    fields = json.loads(data)
+    return (fields['id'], fields['sender_id'], fields['recipient_id'], fields['topic'],
+            fields['payload'], fields['timestamp'])
+
+def make_messages(kind, count):
+    if kind == 'consensus':
+        return [Message.create(-1, -1, 'consensus', {
+            'node_id': i, 'state_proof': hashlib.sha256(str(i).encode()).hexdigest(), 'timestamp': float(i)
+        }) for i in range(count)]
+    if kind == 'influence':
+        return [Message.create(0, i, 'influence', {'influence': {'utilitarian': 0.1, 'virtue': -0.05}})
+                for i in range(count)]
+    return [Message.create(0, i, 'metrics', {'cpu': 0.5, 'memory': 0.25, 'queue_depth': i}) for i in range(count)]
+
+def decode_stream(data):
+    view = memoryview(data)
+    offset = 0
+    decoded = []
+    while offset < len(view):
+        fields, offset = decode_fields(view, offset)
+        decoded.append(fields)
+    return decoded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'payload':>10s} {'codec':>7s} {'bytes':>7s} {'encode us':>10s} {'parse us':>10s}")
+    for kind in ('consensus', 'influence', 'metrics'):
+        messages = make_messages(kind, args.messages)
+        # Messages as they were before integer ids
+        legacy = [dataclasses.replace(message, id=str(uuid.uuid4())) for message in messages]
+        for codec in ('json', 'wire'):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            if codec == 'json':
+                frames = [json_encode(message) for message in legacy]
+            else:
+                frames = [message.to_bytes() for message in messages]
+            encoded = time.perf_counter() - start
+            start = time.perf_counter()
+            if codec == 'json':
+                decoded = [json_decode(frame) for frame in frames]
+            else:
+                decoded = decode_stream(b''.join(frames))
+            elapsed = time.perf_counter() - start
+            gc.enable()
+            assert len(decoded) == len(messages)
+            size = sum(len(frame) for frame in frames) / len(frames)
+            print(f"{kind:>10s} {codec:>7s} {size:7.0f} {encoded / len(messages) * 1e6:10.2f} "
+                  f"{elapsed / len(messages) * 1e6:10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-state cost of ZKPVerifier proof creation and verification: the previous
+repr-based commitment vs the canonical binary encoding, with and without
+repeated states hitting the shared proof cache (PROOF_CACHE_SIZE states).
+
+Usage:
+    python benchmarks/bench_zkp_proof.py --states 4000
+"""
+import argparse
+import hashlib
+import os
+import random
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from zkp import ZKPVerifier
+
+class ReprVerifier:
+    """The previous commitment over str(sorted(state.items()))."""
+    def create_proof(self, state, nonce):
+        state_str = str(sorted(state.items()))
+        return hashlib.sha256(f"{state_str}{nonce}".encode()).hexdigest()
+
+    def verify_proof(self, state, proof, nonce):
+        return secrets.compare_digest(proof, self.create_proof(state, nonce))
+
+def make_states(count: int):
+    rng = random.Random(0)
+    states = []
+    for i in range(count):
+        weights = [rng.random() for _ in range(3)]
+        total = sum(weights)
+        states.append({
+            'node_id': i,
+            'recursion_depth': rng.randrange(100),
+            'ethical_weights': dict(zip(('utilitarian', 'deontological', 'virtue'), (w / total for w in weights))),
+            'state': 'ACTIVE_RECURSION'
+        })
+    return states
+
+def measure(verifier, states, nonces) -> float:
+    start = time.perf_counter()
+    for state, nonce in zip(states, nonces):
+        proof = verifier.create_proof(state, nonce)
+        assert verifier.verify_proof(state, proof, nonce)
+    return (time.perf_counter() - start) / len(states) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--states', type=int, default=4000)
+    args = parser.parse_args()
+
+    states = make_states(args.states)
+    nonces = [secrets.token_hex(16) for _ in states]
+    print(f"{'repr encoding':24s} {measure(ReprVerifier(), states, nonces):7.2f} us per create+verify")
+    ZKPVerifier.cache_clear()
+    verifier = ZKPVerifier()
+    print(f"{'binary, cold cache':24s} {measure(verifier, states, nonces):7.2f} us per create+verify")
+    print(f"{'binary, warm cache':24s} {measure(verifier, states, nonces):7.2f} us per create+verify")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Memory budget report: bytes per node for large networks, measured with tracemalloc.
+
+Usage:
+    python benchmarks/memory_report.py --counts 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from compact_node import CompactNode
+from population import NodePopulation
+
+DOMAINS = ('utilitarian', 'deontological', 'virtue')
+
+def build_compact(count: int):
+    return [CompactNode(i, DOMAINS[i % 3]) for i in range(count)]
+
+def build_population(count: int):
+    population = NodePopulation(capacity=count)
+    population.add_nodes(range(count), (DOMAINS[i % 3] for i in range(count)))
+    return population
+
+def bytes_per_node(factory, count: int) -> float:
+    """Net traced allocation of factory(count), divided by count."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        network = factory(count)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del network
+    return (after - before) / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8}  {'CompactNode':>12}  {'NodePopulation':>15}")
+    for count in args.counts:
+        compact = bytes_per_node(build_compact, count)
+        population = bytes_per_node(build_population, count)
+        print(f"{count:>8}  {compact:>10.0f} B  {population:>13.0f} B")
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,22 @@ from config import ADVERSARY_INTERVAL
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+def challenge_node(node, rl_agent, rng: random.Random = random) -> bool:
+    """
+    Perturb the node's ethical weights if it is at a challengeable depth.
+    Returns:
+        True if the node was challenged.
+    """
+    if node.recursion_depth % 2 == 0 and node.recursion_depth > 0:
+        logging.info(f"Adversary challenging Node {node.node_id} at depth {node.recursion_depth}")
+        perturbation = rl_agent.get_adversary_perturbation(node.ethical_weights)
+        node.ethical_weights = {k: max(0.1, rng.uniform(0.2, 0.5) * perturbation.get(k, 1.0))
+                              for k in node.ethical_weights}
+        node.population.normalize([node.row])
+        logging.info(f"Node {node.node_id} ethical weights after adversary challenge: {node.ethical_weights}")
+        return True
+    return False
+
 async def adversarial_agent(node, rl_agent) -> None:
     """
     Periodically challenges the node by perturbing its ethical weights.
@@ -12,11 +28,4 @@ async def adversarial_agent(node, rl_agent) -> None:
     """
     while True:
         await asyncio.sleep(random.uniform(*ADVERSARY_INTERVAL))
-        if node.recursion_depth % 2 == 0 and node.recursion_depth > 0:
-            logging.info(f"Adversary challenging Node {node.node_id} at depth {node.recursion_depth}")
-            perturbation = rl_agent.get_adversary_perturbation(node.ethical_weights)
-            node.ethical_weights = {k: max(0.1, random.uniform(0.2, 0.5) * perturbation.get(k, 1.0))
-                                  for k in node.ethical_weights}
-            total = sum(node.ethical_weights.values())
-            node.ethical_weights = {k: v / total for k, v in node.ethical_weights.items()}
-            logging.info(f"Node {node.node_id} ethical weights after adversary challenge: {node.ethical_weights}")
+        challenge_node(node, rl_agent)
@@ -5,6 +5,7 @@ import asyncio
 import json
 from ouroboros_node import OuroborosNode, MindState
 from metrics_collector import MetricsCollector
+from he_context import he_manager
 
 app = FastAPI(title="Ouroboros Noosphere API")
 metrics = MetricsCollector()
@@ -93,3 +94,5 @@ async def get_metrics():
 @app.on_event("startup")
 async def startup_event():
     asyncio.create_task(network.broadcast_state())
+    # Load or generate HE keys off the event loop so node creation never waits on them
+    asyncio.get_event_loop().run_in_executor(None, he_manager.get_keyed_context)
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+import networkx as nx
+
+from config import CHECKPOINT_INTERVAL
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+from rolling_digest import RollingDigest
+
+CHECKPOINT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+def _encode_json(value: Any) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode(), dtype=np.uint8)
+
+def _decode_json(section: np.ndarray) -> Any:
+    return json.loads(bytes(section).decode())
+
+def _encode_strings(strings: List[str]) -> np.ndarray:
+    """Pack strings into one NUL-separated UTF-8 blob."""
+    joined = '\0'.join(strings)
+    if joined.count('\0') != max(len(strings) - 1, 0):
+        raise ValueError("Cannot checkpoint strings containing NUL characters")
+    return np.frombuffer(joined.encode(), dtype=np.uint8)
+
+def _decode_strings(blob: np.ndarray) -> List[str]:
+    return bytes(blob).decode().split('\0') if len(blob) else []
+
+def _section_digest(array: np.ndarray) -> str:
+    h = hashlib.sha256(f"{array.dtype.str}{array.shape}".encode())
+    h.update(np.ascontiguousarray(array).data)
+    return h.hexdigest()[:24]
+
+class NetworkCheckpointer:
+    """
+    Writes network snapshots as a directory of .npy sections plus a JSON manifest.
+
+    Every piece of state is an array section: population columns directly,
+    strings and Python structures as packed uint8 blobs. Section files are
+    named by content digest, so a new checkpoint only writes sections that
+    changed since the previous one; the manifest is replaced atomically and
+    unreferenced section files are removed afterwards. On load every section
+    is memory-mapped.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._write_lock = threading.Lock()
+
+    def capture(self, nodes: List[OuroborosNode], rl_agent=None, consensus_manager=None) -> Dict[str, Any]:
+        """
+        Copy the network state so it can be written while the network keeps
+        running. Only copies happen here, so it is short enough to run on the
+        event loop; string and JSON encoding are deferred to write() as
+        callables over the copied data.
+        """
+        rows_by_population: Dict[int, tuple] = {}
+        for i, node in enumerate(nodes):
+            _, positions, rows = rows_by_population.setdefault(id(node.population), (node.population, [], []))
+            positions.append(i)
+            rows.append(node.row)
+
+        count = len(nodes)
+        sections = {
+            'node_ids': np.empty(count, dtype=np.int64),
+            'weights': np.empty((count, 3), dtype=np.float64),
+            'recursion_depth': np.empty(count, dtype=np.int64),
+            'recursive_karma': np.empty(count, dtype=np.float64),
+            'state': np.empty(count, dtype=np.int8)
+        }
+        for population, positions, rows in rows_by_population.values():
+            sections['node_ids'][positions] = population.node_ids[rows]
+            sections['weights'][positions] = population.weights[rows]
+            sections['recursion_depth'][positions] = population.recursion_depth[rows]
+            sections['recursive_karma'][positions] = population.recursive_karma[rows]
+            sections['state'][positions] = population.state[rows]
+
+        domains = sorted({node.domain for node in nodes})
+        domain_index = {domain: i for i, domain in enumerate(domains)}
+        sections['domain_codes'] = np.fromiter((domain_index[node.domain] for node in nodes), dtype=np.int32, count=count)
+
+        memories = [tuple(node.conceptual_memory) for node in nodes]
+        sections['memory_counts'] = np.fromiter((len(m) for m in memories), dtype=np.int32, count=count)
+        sections['memory_blob'] = lambda: _encode_strings([s for m in memories for s in m])
+        # Rolling digest state, so restore does not rehash every insight
+        sections['memory_hashes'] = np.array([h for node in nodes for h in node._memory_digest.hashes], dtype=np.int64)
+        sections['memory_digests'] = np.array([node._memory_digest.value for node in nodes], dtype=np.int64)
+
+        node_ids = np.fromiter((node.node_id for node in nodes), dtype=np.int64, count=count)
+        owners, peers, scores = [], [], []
+        for population, _, _ in rows_by_population.values():
+            store_owners, store_peers, store_scores = population.trust.edges()
+            mask = np.isin(store_owners, node_ids)
+            owners.append(store_owners[mask])
+            peers.append(store_peers[mask])
+            scores.append(store_scores[mask])
+        sections['trust_edges'] = np.stack([np.concatenate(owners), np.concatenate(peers)], axis=1) \
+            if owners else np.empty((0, 2), dtype=np.int64)
+        sections['trust_scores'] = np.concatenate(scores) if scores else np.empty(0)
+
+        meta = {'domains': domains}
+        if rl_agent is not None:
+            meta['q_table'] = {state: dict(actions) for state, actions in rl_agent.q_table.items()}
+        if consensus_manager is not None:
+            meta['ontology_graph'] = nx.node_link_data(consensus_manager.ontology_graph)
+        sections['meta'] = lambda: _encode_json(meta)
+        return sections
+
+    def write(self, sections: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Encode and persist captured sections, skipping any whose content is
+        unchanged. Safe to call from a worker thread.
+        Returns:
+            The new manifest.
+        """
+        with self._write_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            manifest = {'version': CHECKPOINT_VERSION, 'sections': {}}
+            written = 0
+            for name, array in sections.items():
+                array = array() if callable(array) else array
+                filename = f"{name}-{_section_digest(array)}.npy"
+                path = os.path.join(self.directory, filename)
+                if not os.path.exists(path):
+                    fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                    with os.fdopen(fd, 'wb') as f:
+                        np.save(f, array, allow_pickle=False)
+                    os.replace(tmp, path)
+                    written += 1
+                manifest['sections'][name] = filename
+
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp, os.path.join(self.directory, MANIFEST))
+
+            referenced = set(manifest['sections'].values())
+            for filename in os.listdir(self.directory):
+                if filename.endswith('.npy') and filename not in referenced:
+                    os.remove(os.path.join(self.directory, filename))
+            logging.info(f"Checkpoint written to {self.directory} ({written}/{len(sections)} sections changed)")
+            return manifest
+
+    async def checkpoint(self, nodes: List[OuroborosNode], rl_agent=None, consensus_manager=None) -> Dict[str, Any]:
+        """Capture on the loop, then hash and write in a worker thread."""
+        sections = self.capture(nodes, rl_agent, consensus_manager)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.write, sections)
+
+    async def run(self, nodes: List[OuroborosNode], rl_agent=None, consensus_manager=None,
+                  interval: float = CHECKPOINT_INTERVAL) -> None:
+        """Periodic background checkpointing."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.checkpoint(nodes, rl_agent, consensus_manager)
+            except Exception as e:
+                logging.error(f"Checkpoint failed: {e}")
+
+def load_checkpoint(directory: str) -> Dict[str, np.ndarray]:
+    """Memory-map every section of the checkpoint in `directory` (copy-on-write)."""
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {manifest['version']}")
+    return {
+        name: np.load(os.path.join(directory, filename), mmap_mode='c', allow_pickle=False)
+        for name, filename in manifest['sections'].items()
+    }
+
+def restore_network(directory: str, rl_agent=None, consensus_manager=None) -> List[OuroborosNode]:
+    """
+    Rebuild nodes from a checkpoint. Population columns stay memory-mapped
+    copy-on-write, so pages are only read as nodes touch them.
+    """
+    sections = load_checkpoint(directory)
+    meta = _decode_json(sections['meta'])
+    domains = [meta['domains'][code] for code in sections['domain_codes'].tolist()]
+    population = NodePopulation.from_arrays(
+        sections['node_ids'], sections['weights'], sections['recursion_depth'],
+        sections['recursive_karma'], sections['state'], domains
+    )
+
+    memories = _decode_strings(sections['memory_blob'])
+    hashes = sections['memory_hashes'].tolist()
+    digests = sections['memory_digests'].tolist()
+    offsets = np.concatenate(([0], np.cumsum(sections['memory_counts']))).tolist()
+    nodes = []
+    for row, (node_id, domain) in enumerate(zip(sections['node_ids'].tolist(), domains)):
+        node = OuroborosNode(node_id, domain, population, row=row)
+        start, end = offsets[row], offsets[row + 1]
+        node.conceptual_memory.extend(memories[start:end])
+        node._memory_digest = RollingDigest.from_hashes(hashes[start:end], digests[row], node.conceptual_memory.maxlen)
+        nodes.append(node)
+
+    trust_edges = np.asarray(sections['trust_edges'])
+    population.trust.set_scores(trust_edges[:, 0], trust_edges[:, 1], sections['trust_scores'])
+
+    if rl_agent is not None and 'q_table' in meta:
+        rl_agent.q_table = meta['q_table']
+    if consensus_manager is not None and 'ontology_graph' in meta:
+        consensus_manager.ontology_graph = nx.node_link_graph(meta['ontology_graph'])
+    logging.info(f"Restored {len(nodes)} nodes from {directory}")
+    return nodes
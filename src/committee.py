@@ -0,0 +1,219 @@
+import logging
+import secrets
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import COMMITTEE_PARTITION, COMMITTEE_SIZE, CONSENSUS_AGGREGATOR
+from consensus_kernel import aggregate, matrix_to_consensus
+from population import NodePopulation
+from zkp import ZKPVerifier
+
+def _mix(node_ids: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: a stable, well-spread hash of each node id."""
+    x = np.asarray(node_ids).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _balanced(count: int, committee_size: int) -> np.ndarray:
+    """Committee of each of `count` ranked nodes, splitting them into near-equal committees."""
+    committees = -(-count // committee_size)
+    return np.arange(count, dtype=np.int64) * committees // max(count, 1)
+
+def assign_committees(node_ids: Sequence[int], committee_size: int = COMMITTEE_SIZE,
+                      domains: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Committee index of every node. Nodes are ordered by a hash of their id
+    (within each domain, if `domains` is given) and split into near-equal
+    committees of at most `committee_size`, so the assignment depends only on
+    the ids and domains present, not on the order they are listed in.
+    """
+    if committee_size < 1:
+        raise ValueError("Committee size must be at least 1")
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    hashes = _mix(node_ids)
+    committees = np.empty(len(node_ids), dtype=np.int64)
+    if domains is None:
+        committees[np.argsort(hashes, kind='stable')] = _balanced(len(node_ids), committee_size)
+        return committees
+
+    if len(domains) != len(node_ids):
+        raise ValueError("Expected one domain per node")
+    _, codes = np.unique(np.asarray(domains, dtype=str), return_inverse=True)
+    order = np.lexsort((hashes, codes))
+    offset = 0
+    for start, end in _group_bounds(codes[order]):
+        split = _balanced(end - start, committee_size)
+        committees[order[start:end]] = offset + split
+        offset += int(split[-1]) + 1
+    return committees
+
+def _group_bounds(sorted_keys: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, end) of each run of equal keys in a sorted array."""
+    if not len(sorted_keys):
+        return []
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    ends = np.r_[starts[1:], len(sorted_keys)]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+class CommitteeDigest(NamedTuple):
+    """A committee's local consensus, the trust behind it and a proof binding the two."""
+    committee_id: int
+    members: int
+    weight: float
+    consensus: np.ndarray
+    nonce: str
+    proof: str
+
+    def claim(self) -> Dict[str, Any]:
+        """The fields covered by the proof."""
+        return {
+            'committee_id': self.committee_id,
+            'members': self.members,
+            'weight': self.weight,
+            **matrix_to_consensus(self.consensus)
+        }
+
+def seal_digest(committee_id: int, members: int, weight: float, consensus: np.ndarray,
+                verifier: ZKPVerifier) -> CommitteeDigest:
+    """Prove a committee's local consensus for the level above."""
+    digest = CommitteeDigest(int(committee_id), int(members), float(weight),
+                             np.asarray(consensus, dtype=np.float64), secrets.token_hex(16), '')
+    return digest._replace(proof=verifier.create_proof(digest.claim(), digest.nonce))
+
+def verify_digest(digest: CommitteeDigest, verifier: ZKPVerifier) -> bool:
+    try:
+        return verifier.verify_proof(digest.claim(), digest.proof, digest.nonce)
+    except (TypeError, ValueError) as e:
+        logging.error(f"Malformed committee digest: {e}")
+        return False
+
+def combine_digests(digests: List[CommitteeDigest], committee_size: int = COMMITTEE_SIZE,
+                    method: str = CONSENSUS_AGGREGATOR, verifier: Optional[ZKPVerifier] = None,
+                    leaders: Optional[Sequence[ZKPVerifier]] = None) -> Dict[str, Any]:
+    """
+    Verify committee digests and reduce them, level by level, to one
+    consensus state. While more digests remain than fit in one committee they
+    are grouped into committees again, and each group is verified, aggregated
+    and sealed by the leader of its first digest: `leaders` holds the
+    verifier of the node that sealed each digest. Without `leaders`,
+    `verifier` runs every level. The top level is always run by `verifier`.
+    """
+    verifier = verifier or ZKPVerifier()
+    leaders = list(leaders) if leaders is not None else [verifier] * len(digests)
+    if len(leaders) != len(digests):
+        raise ValueError("Expected one leader per digest")
+    rejected = []
+    # The committees that produced `digests` and the top level
+    levels = 2
+    messages = sum(digest.members for digest in digests) + len(digests)
+    while len(digests) > committee_size:
+        groups = _balanced(len(digests), committee_size)
+        sealed, sealed_by = [], []
+        for start, end in _group_bounds(groups):
+            leader = leaders[start]
+            valid = []
+            for digest in digests[start:end]:
+                (valid if verify_digest(digest, leader) else rejected).append(digest)
+            if valid:
+                sealed.append(seal_digest(
+                    groups[start], sum(digest.members for digest in valid), sum(digest.weight for digest in valid),
+                    aggregate(np.array([digest.consensus for digest in valid]),
+                              np.array([digest.weight for digest in valid]), method),
+                    leader
+                ))
+                sealed_by.append(leader)
+        digests, leaders = sealed, sealed_by
+        levels += 1
+        messages += len(digests)
+    valid = []
+    for digest in digests:
+        (valid if verify_digest(digest, verifier) else rejected).append(digest)
+    rejected = [digest.committee_id for digest in rejected]
+    if not valid:
+        logging.warning("No committee digest verified")
+        return {'consensus': None, 'levels': levels, 'messages': messages, 'rejected': rejected}
+    consensus = aggregate(np.array([digest.consensus for digest in valid]),
+                          np.array([digest.weight for digest in valid]), method)
+    return {
+        'consensus': matrix_to_consensus(consensus),
+        'levels': levels,
+        'messages': messages,
+        'rejected': rejected
+    }
+
+class HierarchicalConsensus:
+    """
+    Committee-based consensus over a whole network.
+
+    Nodes are partitioned into committees of at most `committee_size`. Each
+    committee aggregates its members' states with their trust and seals the
+    result, with the members' total trust as its weight, into one proved
+    CommitteeDigest. The level above verifies the digests, drops any that do
+    not verify and aggregates the rest by weight; if more digests remain than
+    fit in one committee they are grouped into committees again. No committee
+    ever handles more than `committee_size` inputs, so the work of each
+    participant grows with the committee size rather than the network size.
+
+    With the "mean" aggregator the result equals the flat trust-weighted mean;
+    "median" and "trimmed_mean" are applied per committee, level by level.
+    """
+    def __init__(self, values: np.ndarray, trust: np.ndarray, committees: np.ndarray,
+                 committee_size: int = COMMITTEE_SIZE, method: str = CONSENSUS_AGGREGATOR,
+                 verifier: Optional[ZKPVerifier] = None):
+        values = np.asarray(values, dtype=np.float64)
+        trust = np.asarray(trust, dtype=np.float64)
+        committees = np.asarray(committees, dtype=np.int64)
+        if values.ndim != 2 or trust.shape != (len(values),) or committees.shape != trust.shape:
+            raise ValueError(f"Expected a (nodes x features) matrix and per-node trust and committees, "
+                             f"got {values.shape}, {trust.shape} and {committees.shape}")
+        if not len(values):
+            raise ValueError("Hierarchical consensus needs at least one node")
+        if committee_size < 2:
+            raise ValueError("Committee size must be at least 2")
+        self.committee_size = committee_size
+        self.method = method
+        self.verifier = verifier or ZKPVerifier()
+        order = np.argsort(committees, kind='stable')
+        self.values = values[order]
+        self.trust = trust[order]
+        self.committees = committees[order]
+
+    @classmethod
+    def from_population(cls, population: NodePopulation, committee_size: int = COMMITTEE_SIZE,
+                        partition: str = COMMITTEE_PARTITION, method: str = CONSENSUS_AGGREGATOR,
+                        verifier: Optional[ZKPVerifier] = None) -> 'HierarchicalConsensus':
+        """Committees over a population's weights and recursion depth, weighted by karma."""
+        if partition not in ('hash', 'domain'):
+            raise ValueError(f"Unknown committee partition {partition!r}")
+        domains = population.domains if partition == 'domain' else None
+        committees = assign_committees(population.node_ids, committee_size, domains)
+        values = np.column_stack([population.weights, population.recursion_depth])
+        return cls(values, population.recursive_karma, committees, committee_size, method, verifier)
+
+    def _seal(self, values: np.ndarray, trust: np.ndarray, committees: np.ndarray) -> List[CommitteeDigest]:
+        """Aggregate each run of equal committee ids into a sealed digest."""
+        digests = []
+        for start, end in _group_bounds(committees):
+            digests.append(seal_digest(
+                committees[start], end - start, trust[start:end].sum(),
+                aggregate(values[start:end], trust[start:end], self.method), self.verifier
+            ))
+        return digests
+
+    def local_digests(self) -> List[CommitteeDigest]:
+        """Run every committee's local consensus."""
+        return self._seal(self.values, self.trust, self.committees)
+
+    def combine(self, digests: List[CommitteeDigest]) -> Dict[str, Any]:
+        """Verify committee digests and reduce them, level by level, to one consensus state."""
+        return combine_digests(digests, self.committee_size, self.method, self.verifier)
+
+    def run(self) -> Dict[str, Any]:
+        """One full round: local consensus in every committee, then the levels above."""
+        digests = self.local_digests()
+        result = self.combine(digests)
+        result['committees'] = len(digests)
+        result['largest_committee'] = max(digest.members for digest in digests)
+        return result
@@ -0,0 +1,99 @@
+import secrets
+import sys
+from array import array
+from typing import Any, Dict, List
+
+from config import ETHICAL_BOUNDS, RECURSION_LIMIT
+from mind_state import MindState
+from population import ETHICAL_FRAMEWORKS, conceptual_memory, memory_digest
+from zkp import ZKPVerifier
+
+# Indexed by MindState.value so nodes store a small int instead of a reference
+_STATES = (None,) + tuple(MindState)
+
+class CompactNode:
+    """
+    Low-footprint node representation for very large simulated networks.
+
+    Uses __slots__ instead of a per-instance __dict__, keeps the ethical
+    weights in a three-element float array, stores the MindState as its enum
+    value and shares one ZKPVerifier across all instances. Insights are not
+    stored as strings: they are derived from the domain and recursion depth,
+    so the conceptual memory costs nothing per insight.
+    """
+    __slots__ = ('node_id', 'domain', '_weights', 'recursion_depth', 'recursive_karma', '_state', 'peers')
+
+    zkp_verifier = ZKPVerifier()
+
+    def __init__(self, node_id: int, domain_seed: str):
+        self.node_id = node_id
+        self.domain = sys.intern(domain_seed)
+        self._weights = array('d', (0.33, 0.33, 0.33))
+        self.recursion_depth = 0
+        self.recursive_karma = 1.0
+        self._state = MindState.ACTIVE_RECURSION.value
+        self.peers = ()
+
+    @property
+    def state(self) -> MindState:
+        return _STATES[self._state]
+
+    @state.setter
+    def state(self, state: MindState) -> None:
+        self._state = state.value
+
+    @property
+    def ethical_weights(self) -> Dict[str, float]:
+        return dict(zip(ETHICAL_FRAMEWORKS, self._weights))
+
+    @ethical_weights.setter
+    def ethical_weights(self, weights: Dict[str, float]) -> None:
+        self._weights[:] = array('d', (weights[k] for k in ETHICAL_FRAMEWORKS))
+
+    @property
+    def conceptual_memory(self) -> List[str]:
+        """The most recent insights, rebuilt from the recursion depth."""
+        return conceptual_memory(self.domain, self.recursion_depth)
+
+    def generate_insight(self) -> str:
+        insight = f"{self.domain}_insight_{self.recursion_depth}"
+        self.recursion_depth += 1
+        return insight
+
+    def apply_observer_influence(self, influence: Dict[str, float]) -> None:
+        weights = self._weights
+        for i, key in enumerate(ETHICAL_FRAMEWORKS):
+            weights[i] *= (1 + influence.get(key, 0))
+        total = weights[0] + weights[1] + weights[2]
+        for i in range(3):
+            weights[i] /= total
+
+    def check_ethical_bounds(self, max_deviation: float = ETHICAL_BOUNDS["max_deviation"]) -> bool:
+        """Enter ETHICAL_CRISIS if the weights drift too far; returns True if so."""
+        deviation = sum(abs(w - 1 / 3) for w in self._weights)
+        if deviation > max_deviation:
+            self._state = MindState.ETHICAL_CRISIS.value
+            return True
+        return False
+
+    def tick(self) -> None:
+        if self._state == MindState.ACTIVE_RECURSION.value and self.recursion_depth < RECURSION_LIMIT:
+            self.generate_insight()
+
+    def state_digest(self) -> int:
+        """Same digest as OuroborosNode.state_digest for the same conceptual memory."""
+        return memory_digest(self.domain, self.recursion_depth)
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        return {
+            'node_id': self.node_id,
+            'recursion_depth': self.recursion_depth,
+            'ethical_weights': self.ethical_weights,
+            'state': self.state.name
+        }
+
+    def get_verifiable_state(self) -> Dict[str, Any]:
+        state = self.snapshot_state()
+        nonce = secrets.token_hex(16)
+        proof = self.zkp_verifier.create_proof(state, nonce)
+        return {'state': state, 'proof': proof, 'challenge': proof, 'nonce': nonce}
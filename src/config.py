@@ -94,6 +94,39 @@ ENCRYPTION_PARAMS = {
     "sec": 128,  # security parameter
 }
 
+# Directory for cached HE context and key material (empty string disables
+# caching). It holds secret keys, so it defaults to a per-user cache directory
+# rather than the working directory and is created with 0o700 permissions.
+HE_CACHE_DIR = os.getenv("HE_CACHE_DIR", os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "ouroboros", "he"
+))
+
+# Worker processes used to run HE encryption off the event loop
+HE_EXECUTOR_WORKERS = int(os.getenv("HE_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+
+# Threads used to verify consensus proofs
+CONSENSUS_VERIFY_WORKERS = int(os.getenv("CONSENSUS_VERIFY_WORKERS", str(os.cpu_count() or 1)))
+
+# Recently seen node states whose proof hashing state is memoized, shared by
+# every ZKPVerifier in the process
+PROOF_CACHE_SIZE = 4096
+
+# Schnorr group (p, q, g) for node state proofs: the 1024-bit MODP group of
+# RFC 2409 (Oakley group 2). p = 2q + 1 is a safe prime and 2 generates the
+# order-q subgroup of quadratic residues, so batch verification can check
+# commitments with a Jacobi symbol instead of an exponentiation
+SCHNORR_GROUP = (
+    int('ffffffffffffffffc90fdaa22168c234c4c6628b80dc1cd129024e088a67cc74'
+        '020bbea63b139b22514a08798e3404ddef9519b3cd3a431b302b0a6df25f1437'
+        '4fe1356d6d51c245e485b576625e7ec6f44c42e9a637ed6b0bff5cb6f406b7ed'
+        'ee386bfb5a899fa5ae9f24117c4b1fe649286651ece65381ffffffffffffffff', 16),
+    int('7fffffffffffffffe487ed5110b4611a62633145c06e0e68948127044533e63a'
+        '0105df531d89cd9128a5043cc71a026ef7ca8cd9e69d218d98158536f92f8a1b'
+        'a7f09ab6b6a8e122f242dabb312f3f637a262174d31bf6b585ffae5b7a035bf6'
+        'f71c35fdad44cfd2d74f9208be258ff324943328f67329c0ffffffffffffffff', 16),
+    2
+)
+
 # RL configuration (stub parameters)
 RL_PARAMS = {
     "learning_rate": 0.1,
@@ -101,15 +134,74 @@ RL_PARAMS = {
     "epsilon": 0.1  # Exploration rate
 }
 
+# Maximum number of queued messages a node handles per wakeup
+MESSAGE_BATCH_SIZE = 64
+
+# Capacity of each subscriber queue (0 for unbounded) and what happens when
+# one is full: "block", "drop_oldest", "drop_newest" or "coalesce" by type
+SUBSCRIBER_QUEUE_CAPACITY = int(os.getenv("SUBSCRIBER_QUEUE_CAPACITY", "1024"))
+SUBSCRIBER_OVERFLOW_POLICY = os.getenv("SUBSCRIBER_OVERFLOW_POLICY", "drop_oldest")
+
+# Message handlers the broker runs at once and the number of recent publish
+# latencies kept for percentiles
+HANDLER_CONCURRENCY = 64
+PUBLISH_LATENCY_WINDOW = 4096
+
+# Offline message store: messages kept per offline recipient, seconds a
+# stored message lives, messages held in memory across all recipients before
+# the largest ring spills to disk, spill directory, spill segment size and
+# the number of stored messages between sweeps for expired ones
+OFFLINE_BUFFER_SIZE = 1000
+OFFLINE_MESSAGE_TTL = float(os.getenv("OFFLINE_MESSAGE_TTL", "300"))
+OFFLINE_MEMORY_CAP = int(os.getenv("OFFLINE_MEMORY_CAP", "100000"))
+OFFLINE_SPILL_DIR = os.getenv("OFFLINE_SPILL_DIR", "offline_spill")
+OFFLINE_SEGMENT_BYTES = 64 * 2**20
+OFFLINE_EXPIRE_EVERY = 1024
+
 # Consensus synchronization interval in seconds
 CONSENSUS_INTERVAL = 5
 
+# Consensus rounds allowed in flight at once when rounds are pipelined
+CONSENSUS_PIPELINE_DEPTH = int(os.getenv("CONSENSUS_PIPELINE_DEPTH", "2"))
+
+# Aggregator for peer consensus states ("mean", "trimmed_mean" or "median")
+# and the fraction of trust trimmed from each end by "trimmed_mean"
+CONSENSUS_AGGREGATOR = os.getenv("CONSENSUS_AGGREGATOR", "mean")
+CONSENSUS_TRIM_FRACTION = 0.2
+
+# Consensus mode ("all_to_all", "gossip" or "hierarchical"), peers pushed to
+# per gossip round, the estimate spread at which a gossip simulation counts
+# as converged and the gossip rounds a node runs before it starts a new
+# push-sum epoch from the network's current state
+CONSENSUS_MODE = os.getenv("CONSENSUS_MODE", "all_to_all")
+GOSSIP_FANOUT = 3
+GOSSIP_TOLERANCE = 1e-3
+GOSSIP_EPOCH_ROUNDS = 20
+
+# Largest committee in hierarchical consensus and how nodes are assigned to
+# committees ("hash" of the node id, or "domain" first, then hash)
+COMMITTEE_SIZE = int(os.getenv("COMMITTEE_SIZE", "64"))
+COMMITTEE_PARTITION = os.getenv("COMMITTEE_PARTITION", "hash")
+
+# Fraction of peers whose verified states complete a consensus round, the
+# round deadline in seconds and the smoothing factor for peer response latency
+QUORUM_FRACTION = 2 / 3
+CONSENSUS_ROUND_TIMEOUT = 2.0
+PEER_LATENCY_ALPHA = 0.2
+
+# Minimum seconds between background redraws of the consensus visualizations
+VISUALIZATION_INTERVAL = float(os.getenv("VISUALIZATION_INTERVAL", "2.0"))
+
 # Observer influence interval in seconds
 OBSERVER_INTERVAL = 3
 
 # Adversary challenge interval bounds in seconds
 ADVERSARY_INTERVAL = (1.0, 2.0)
 
+# Network checkpoint directory and interval in seconds
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_INTERVAL = 60
+
 # Monitoring configuration
 MONITORING = {
     "enabled": True,
@@ -126,6 +218,9 @@ TRUST_PARAMS = {
     "failure_delta": -0.2
 }
 
+# Trust updates buffered before they are merged into the sparse trust matrix
+TRUST_DELTA_BUFFER = 4096
+
 # Ethical bounds
 ETHICAL_BOUNDS = {
     "max_deviation": 0.5,  # Maximum allowed deviation from equal weights
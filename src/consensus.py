@@ -1,58 +1,199 @@
 import asyncio
 import logging
 import networkx as nx
-from config import CONSENSUS_INTERVAL
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from config import CONSENSUS_INTERVAL, CONSENSUS_PIPELINE_DEPTH, CONSENSUS_VERIFY_WORKERS
 from zkp import ZKPVerifier
 from messaging import MessageBroker
-from visualization import NetworkVisualizer
+from visualization import BackgroundRenderer, NetworkVisualizer, VisualizationSnapshot
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 class ConsensusManager:
-    def __init__(self, message_broker: MessageBroker):
+    """
+    Runs consensus rounds over a set of nodes.
+
+    Each round first collects every node's verifiable state (a snapshot, the
+    node's proof of it and the nonce) in one pass. The published proofs are
+    then verified against their snapshots in chunks on a thread pool. Verified
+    states are recorded in the ontology graph and published as an immutable
+    snapshot to a BackgroundRenderer, which redraws the figures off the event
+    loop at most every VISUALIZATION_INTERVAL.
+
+    synchronize_nodes pipelines rounds: round k+1 collects and starts
+    verifying while round k is still verifying or publishing, with at most
+    `pipeline_depth` rounds in flight. Rounds commit (graph update and
+    publish) strictly in round order.
+    """
+    def __init__(self, message_broker: MessageBroker, verify_workers: int = CONSENSUS_VERIFY_WORKERS,
+                 pipeline_depth: int = CONSENSUS_PIPELINE_DEPTH):
         self.message_broker = message_broker
         self.verifier = ZKPVerifier()
         self.ontology_graph = nx.DiGraph()
         self.visualizer = NetworkVisualizer()
+        self.renderer = BackgroundRenderer(self.visualizer)
+        self.verify_workers = max(1, verify_workers)
+        self._verify_pool = ThreadPoolExecutor(max_workers=self.verify_workers,
+                                               thread_name_prefix='consensus-verify')
+        self.pipeline_depth = max(1, pipeline_depth)
+        # Number of the last round committed by run_pipeline, -1 before the first
+        self.committed_round = -1
         
     async def synchronize_nodes(self, nodes) -> None:
-        while True:
-            await asyncio.sleep(CONSENSUS_INTERVAL)
-            logging.info("--- Consensus Event Initiated ---")
-            
-            # Collect and verify node states
-            for node in nodes:
-                state = node.get_verifiable_state()
-                challenge, nonce = self.verifier.generate_challenge(state)
-                proof = self.verifier.create_proof(state, nonce)
-                
-                if self.verifier.verify_proof(proof, challenge):
-                    await self.message_broker.publish('consensus', {
-                        'node_id': node.node_id,
-                        'state_proof': proof.hex(),
-                        'timestamp': asyncio.get_event_loop().time()
-                    })
-                    
-                    # Update graph with verified state
-                    self._update_graph(node)
-                else:
-                    logging.warning(f"State verification failed for Node {node.node_id}")
-            
-            # Update visualizations
-            self.visualizer.plot_ontology_graph(self.ontology_graph)
-            self.visualizer.plot_ethical_weights(nodes)
-            
-            logging.info("--- Consensus Event Concluded ---")
-    
-    def _update_graph(self, node) -> None:
-        """Update the ontology graph with node state."""
+        try:
+            await self.run_pipeline(nodes)
+        finally:
+            await self.renderer.stop()
+
+    async def run_round(self, nodes) -> None:
+        """Run one consensus round: verify, publish proofs and queue a visualization snapshot."""
+        logging.info("--- Consensus Event Initiated ---")
+        self.renderer.start()
+        timestamp = asyncio.get_event_loop().time()
+        await self._publish(await self.verify_round_async(nodes, timestamp), timestamp)
+        logging.info("--- Consensus Event Concluded ---")
+
+    async def run_pipeline(self, nodes, rounds: Optional[int] = None,
+                           interval: float = CONSENSUS_INTERVAL) -> None:
+        """
+        Start a round every `interval` seconds, or as soon as a pipeline slot
+        frees up if rounds take longer than that.
+        Args:
+            rounds: Number of rounds to run; None runs until cancelled.
+        """
+        loop = asyncio.get_event_loop()
+        self.renderer.start()
+        in_flight = asyncio.Semaphore(self.pipeline_depth)
+        tasks: Set[asyncio.Task] = set()
+        previous: Optional[asyncio.Task] = None
+        round_number = 0
+        try:
+            while rounds is None or round_number < rounds:
+                await asyncio.sleep(interval)
+                await in_flight.acquire()
+                for task in tasks:
+                    if task.done() and not task.cancelled() and task.exception() is not None:
+                        in_flight.release()
+                        raise task.exception()
+                tasks = {task for task in tasks if not task.done()}
+
+                # Collection runs here, overlapping the rounds still in flight
+                timestamp = loop.time()
+                round_nodes = list(nodes)
+                states = self.collect_states(round_nodes)
+                futures = self._submit_verification(round_nodes, states)
+                previous = asyncio.ensure_future(self._complete_round(
+                    round_number, round_nodes, states, futures, timestamp, previous, in_flight
+                ))
+                tasks.add(previous)
+                round_number += 1
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _complete_round(self, round_number: int, nodes, states: List[Dict[str, Any]],
+                              futures: List[Future], timestamp: float,
+                              previous: Optional[asyncio.Task], in_flight: asyncio.Semaphore) -> None:
+        """Await a pipelined round's verification, then commit it once the round before it has."""
+        try:
+            chunks = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+            if previous is not None:
+                # Wait without re-raising: a failed round is reported by its own task
+                await asyncio.wait([previous])
+            logging.info(f"--- Consensus Event {round_number} Committing ---")
+            proofs = [proof for chunk in chunks for proof in chunk]
+            verified = self._record_round(nodes, states, proofs, timestamp)
+            await self._publish(verified, timestamp)
+            self.committed_round = round_number
+        finally:
+            in_flight.release()
+
+    async def _publish(self, verified: List[Tuple[Any, str]], timestamp: float) -> None:
+        for node, proof in verified:
+            await self.message_broker.broadcast(-1, 'consensus', {
+                'node_id': node.node_id,
+                'state_proof': proof,
+                'timestamp': timestamp
+            })
+
+    def collect_states(self, nodes) -> List[Dict[str, Any]]:
+        """Collect every node's verifiable state in one pass, before any verification starts."""
+        return [node.get_verifiable_state() for node in nodes]
+
+    def _verify_chunk(self, states: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Verify a chunk of published proofs against their snapshots and nonces.
+        Runs on the verification pool.
+        Returns:
+            The proof for each state, or None where verification failed.
+        """
+        return [
+            state['proof'] if self.verifier.verify_proof(state['state'], state['proof'], state['nonce']) else None
+            for state in states
+        ]
+
+    def _submit_verification(self, nodes, states: List[Dict[str, Any]]) -> List[Future]:
+        """Split the snapshots into one contiguous chunk per worker."""
+        size = max(1, -(-len(nodes) // self.verify_workers))
+        return [
+            self._verify_pool.submit(self._verify_chunk, states[i:i + size])
+            for i in range(0, len(nodes), size)
+        ]
+
+    def _record_round(self, nodes, states: List[Dict[str, Any]], proofs: List[Optional[str]],
+                      timestamp: float) -> List[Tuple[Any, str]]:
+        verified = []
+        verified_states = []
+        for node, state, proof in zip(nodes, states, proofs):
+            if proof is None:
+                logging.warning(f"State verification failed for Node {node.node_id}")
+                continue
+            # Update graph with verified state
+            self._update_graph(state['state'], timestamp)
+            verified.append((node, proof))
+            verified_states.append(state['state'])
+        self.renderer.publish(VisualizationSnapshot(timestamp, tuple(verified_states)))
+        return verified
+
+    def verify_round(self, nodes, timestamp: float) -> List[Tuple[Any, str]]:
+        """
+        Collect and verify node states, recording verified nodes in the ontology graph.
+        Returns:
+            (node, proof) pairs for every node whose state verified.
+        """
+        nodes = list(nodes)
+        states = self.collect_states(nodes)
+        proofs = [proof for future in self._submit_verification(nodes, states) for proof in future.result()]
+        return self._record_round(nodes, states, proofs, timestamp)
+
+    async def verify_round_async(self, nodes, timestamp: float) -> List[Tuple[Any, str]]:
+        """verify_round that awaits the verification pool instead of blocking the event loop."""
+        nodes = list(nodes)
+        states = self.collect_states(nodes)
+        chunks = await asyncio.gather(*(
+            asyncio.wrap_future(future) for future in self._submit_verification(nodes, states)
+        ))
+        proofs = [proof for chunk in chunks for proof in chunk]
+        return self._record_round(nodes, states, proofs, timestamp)
+
+    def _update_graph(self, state: Dict[str, Any], timestamp: float) -> None:
+        """Update the ontology graph with a verified state snapshot."""
         self.ontology_graph.add_node(
-            node.node_id,
-            state=node.state.name,
-            depth=node.recursion_depth,
-            timestamp=asyncio.get_event_loop().time()
+            state['node_id'],
+            state=state['state'],
+            depth=state['recursion_depth'],
+            timestamp=timestamp
         )
 
+    def shutdown(self) -> None:
+        self._verify_pool.shutdown()
+        self.renderer.close()
+
 async def consensus_synchronization(nodes) -> None:
     message_broker = MessageBroker()
     consensus_manager = ConsensusManager(message_broker)
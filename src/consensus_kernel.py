@@ -0,0 +1,94 @@
+import logging
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, List
+
+import numpy as np
+
+from config import CONSENSUS_AGGREGATOR, CONSENSUS_TRIM_FRACTION
+from population import ETHICAL_FRAMEWORKS
+
+# Column order of the peer state matrix
+CONSENSUS_FEATURES = ETHICAL_FRAMEWORKS + ('recursion_depth',)
+_WEIGHT_GETTER = itemgetter(*ETHICAL_FRAMEWORKS)
+
+def states_to_matrix(states: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Pack verifiable peer states into a (peers x features) float matrix with
+    columns in CONSENSUS_FEATURES order. Field access runs through C-level
+    itemgetters, so packing costs little more than touching each dict once.
+    """
+    count = len(states)
+    inner = list(map(itemgetter('state'), states))
+    weights = map(_WEIGHT_GETTER, map(itemgetter('ethical_weights'), inner))
+    matrix = np.empty((count, len(CONSENSUS_FEATURES)), dtype=np.float64)
+    matrix[:, :-1] = np.fromiter(
+        chain.from_iterable(weights), dtype=np.float64, count=count * len(ETHICAL_FRAMEWORKS)
+    ).reshape(count, len(ETHICAL_FRAMEWORKS))
+    matrix[:, -1] = np.fromiter(map(itemgetter('recursion_depth'), inner), dtype=np.float64, count=count)
+    return matrix
+
+def matrix_to_consensus(row: np.ndarray) -> Dict[str, Any]:
+    """Unpack an aggregated feature row into the consensus state layout."""
+    values = row.tolist()
+    return {
+        'ethical_weights': dict(zip(ETHICAL_FRAMEWORKS, values[:len(ETHICAL_FRAMEWORKS)])),
+        'recursion_depth': values[len(ETHICAL_FRAMEWORKS)]
+    }
+
+def _check_inputs(values: np.ndarray, trust: np.ndarray):
+    values = np.asarray(values, dtype=np.float64)
+    trust = np.asarray(trust, dtype=np.float64)
+    if values.ndim != 2 or trust.shape != (values.shape[0],):
+        raise ValueError(f"Expected a (peers x features) matrix and a trust vector, got {values.shape} and {trust.shape}")
+    if not len(trust) or trust.sum() <= 0 or (trust < 0).any():
+        raise ValueError("Trust weights must be non-negative with a positive sum")
+    return values, trust
+
+def _sorted_columns(values: np.ndarray, trust: np.ndarray):
+    """Sort each column independently; returns sorted values, their trust and its running sum."""
+    order = np.argsort(values, axis=0, kind='stable')
+    sorted_trust = trust[order]
+    return np.take_along_axis(values, order, axis=0), sorted_trust, np.cumsum(sorted_trust, axis=0)
+
+def weighted_mean(values: np.ndarray, trust: np.ndarray) -> np.ndarray:
+    """Trust-weighted mean of every feature column in one matrix product."""
+    values, trust = _check_inputs(values, trust)
+    return trust @ values / trust.sum()
+
+def trimmed_mean(values: np.ndarray, trust: np.ndarray, trim: float = CONSENSUS_TRIM_FRACTION) -> np.ndarray:
+    """
+    Coordinate-wise trust-weighted trimmed mean: in each column, the lowest and
+    highest `trim` fraction of total trust is discarded before averaging, so
+    peers holding less than that share of trust cannot pull the result
+    outside the range of the honest values.
+    """
+    if not 0 <= trim < 0.5:
+        raise ValueError("Trim fraction must be in [0, 0.5)")
+    values, trust = _check_inputs(values, trust)
+    ordered, sorted_trust, cumulative = _sorted_columns(values, trust)
+    total = cumulative[-1]
+    low, high = trim * total, (1 - trim) * total
+    # Each entry covers [cumulative - trust, cumulative]; keep its overlap with [low, high]
+    kept = np.clip(np.minimum(cumulative, high) - np.maximum(cumulative - sorted_trust, low), 0, None)
+    return (kept * ordered).sum(axis=0) / kept.sum(axis=0)
+
+def weighted_median(values: np.ndarray, trust: np.ndarray) -> np.ndarray:
+    """Coordinate-wise trust-weighted median (lower median on ties)."""
+    values, trust = _check_inputs(values, trust)
+    ordered, _, cumulative = _sorted_columns(values, trust)
+    index = np.argmax(cumulative >= cumulative[-1] / 2, axis=0)
+    return ordered[index, np.arange(values.shape[1])]
+
+AGGREGATORS = {
+    'mean': weighted_mean,
+    'trimmed_mean': trimmed_mean,
+    'median': weighted_median
+}
+
+def aggregate(values: np.ndarray, trust: np.ndarray, method: str = CONSENSUS_AGGREGATOR) -> np.ndarray:
+    """Aggregate a (peers x features) matrix with trust weights using a named aggregator."""
+    if method not in AGGREGATORS:
+        logging.error(f"Unknown consensus aggregator: {method}")
+        raise ValueError(f"Unknown consensus aggregator {method!r}; expected one of {sorted(AGGREGATORS)}")
+    return AGGREGATORS[method](values, trust)
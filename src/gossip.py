@@ -0,0 +1,128 @@
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from config import GOSSIP_FANOUT, GOSSIP_TOLERANCE
+from consensus_kernel import matrix_to_consensus
+from population import NodePopulation
+
+class GossipDigest(NamedTuple):
+    """
+    Push-sum mass: trust-weighted feature sums and the total trust behind
+    them, tagged with the epoch they were seeded in. Only digests of the same
+    epoch may be merged.
+    """
+    sums: np.ndarray
+    weight: float
+    epoch: int = 0
+
+    def split(self, parts: int) -> 'GossipDigest':
+        """One of `parts` equal shares of this digest."""
+        return GossipDigest(self.sums / parts, self.weight / parts, self.epoch)
+
+    def merge(self, other: 'GossipDigest') -> 'GossipDigest':
+        if other.epoch != self.epoch:
+            raise ValueError(f"Cannot merge a gossip digest of epoch {other.epoch} into epoch {self.epoch}")
+        return GossipDigest(self.sums + other.sums, self.weight + other.weight, self.epoch)
+
+    @property
+    def estimate(self) -> np.ndarray:
+        """The trust-weighted mean this digest currently stands for."""
+        return self.sums / self.weight
+
+class GossipConsensus:
+    """
+    Push-sum gossip over a whole network, vectorized over all nodes.
+
+    Every node starts with the digest (trust * features, trust). Each round it
+    keeps one share of its digest and pushes one share to each of `fanout`
+    peers sampled uniformly at random (with replacement, never itself). Total
+    mass is conserved, so every node's estimate sums / weight converges to the
+    network's trust-weighted mean in O(log N) rounds while each round costs
+    N * fanout messages instead of the N * (N - 1) of all-to-all collection.
+    """
+    def __init__(self, values: np.ndarray, trust: np.ndarray, fanout: int = GOSSIP_FANOUT,
+                 rng: Optional[np.random.Generator] = None):
+        values = np.asarray(values, dtype=np.float64)
+        trust = np.asarray(trust, dtype=np.float64)
+        if values.ndim != 2 or trust.shape != (len(values),):
+            raise ValueError(f"Expected a (nodes x features) matrix and a trust vector, got {values.shape} and {trust.shape}")
+        if len(values) < 2:
+            raise ValueError("Gossip needs at least two nodes")
+        if fanout < 1:
+            raise ValueError("Fanout must be at least 1")
+        if (trust <= 0).any():
+            raise ValueError("Trust weights must be positive")
+        self.fanout = fanout
+        self.rng = rng or np.random.default_rng()
+        self.sums = values * trust[:, None]
+        self.weights = trust.copy()
+        self.rounds = 0
+        self.messages = 0
+
+    @classmethod
+    def from_population(cls, population: NodePopulation, fanout: int = GOSSIP_FANOUT,
+                        rng: Optional[np.random.Generator] = None) -> 'GossipConsensus':
+        """
+        Gossip over a population's weights and recursion depth, weighting each
+        node by the mean trust the rest of the population places in it.
+        """
+        values = np.column_stack([population.weights, population.recursion_depth])
+        trust = population.trust.inbound(population.node_ids, population.node_ids)
+        return cls(values, trust, fanout, rng)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @property
+    def estimates(self) -> np.ndarray:
+        return self.sums / self.weights[:, None]
+
+    def spread(self) -> float:
+        """Largest disagreement between any two nodes on any feature."""
+        estimates = self.estimates
+        return float((estimates.max(axis=0) - estimates.min(axis=0)).max())
+
+    def round(self) -> int:
+        """
+        Run one gossip round.
+        Returns:
+            The number of messages sent.
+        """
+        count = len(self)
+        # Sample from the other count - 1 nodes by skipping over the sender's own index
+        targets = self.rng.integers(0, count - 1, (count, self.fanout))
+        targets += targets >= np.arange(count)[:, None]
+        targets = targets.ravel()
+
+        shares = 1.0 / (self.fanout + 1)
+        self.sums *= shares
+        self.weights *= shares
+        pushed_sums = np.repeat(self.sums, self.fanout, axis=0)
+        pushed_weights = np.repeat(self.weights, self.fanout)
+        for column in range(self.sums.shape[1]):
+            self.sums[:, column] += np.bincount(targets, weights=pushed_sums[:, column], minlength=count)
+        self.weights += np.bincount(targets, weights=pushed_weights, minlength=count)
+
+        self.rounds += 1
+        self.messages += len(targets)
+        return len(targets)
+
+    def run(self, tolerance: float = GOSSIP_TOLERANCE, max_rounds: int = 1000) -> Dict[str, Any]:
+        """Gossip until every node's estimate agrees within `tolerance`, or max_rounds pass."""
+        while self.spread() > tolerance and self.rounds < max_rounds:
+            self.round()
+        converged = self.spread() <= tolerance
+        if not converged:
+            logging.warning(f"Gossip did not converge within {max_rounds} rounds")
+        return {
+            'converged': converged,
+            'rounds': self.rounds,
+            'messages': self.messages,
+            'spread': self.spread()
+        }
+
+    def consensus(self) -> Dict[str, Any]:
+        """Mean of the current estimates, in the consensus state layout."""
+        return matrix_to_consensus(self.estimates.mean(axis=0))
@@ -0,0 +1,90 @@
+import logging
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from pyfhel import Pyfhel, PyCtxt
+
+from config import ENCRYPTION_PARAMS
+from he_context import he_manager
+from population import ETHICAL_FRAMEWORKS
+
+# Slots used per node: state digest followed by the three ethical weights
+SLOTS_PER_NODE = 4
+# Fixed-point scale for ethical weights; must stay below the plaintext modulus
+WEIGHT_SCALE = 10000
+
+def pack_states(digests: np.ndarray, weights: np.ndarray, slot_count: int,
+                plaintext_modulus: int = ENCRYPTION_PARAMS["p"]) -> List[np.ndarray]:
+    """
+    Lay out node digests and fixed-point weights in plaintext slot vectors.
+
+    Node i of a chunk occupies slots [4i, 4i + 4). Each returned vector holds
+    up to slot_count // 4 nodes and is zero-padded to slot_count.
+    """
+    per_vector = slot_count // SLOTS_PER_NODE
+    if per_vector == 0:
+        raise ValueError(f"Slot count {slot_count} cannot hold a single node")
+    rows = np.empty((len(digests), SLOTS_PER_NODE), dtype=np.int64)
+    rows[:, 0] = np.asarray(digests, dtype=np.int64) % plaintext_modulus
+    rows[:, 1:] = np.rint(np.asarray(weights, dtype=np.float64) * WEIGHT_SCALE)
+    vectors = []
+    for start in range(0, len(rows), per_vector):
+        vector = np.zeros(slot_count, dtype=np.int64)
+        chunk = rows[start:start + per_vector].ravel()
+        vector[:len(chunk)] = chunk
+        vectors.append(vector)
+    return vectors
+
+def unpack_states(vectors: Sequence[np.ndarray], count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of pack_states: return (digests, weights) for the first `count` nodes."""
+    if not vectors:
+        return np.empty(0, dtype=np.int64), np.empty((0, SLOTS_PER_NODE - 1))
+    used = (len(vectors[0]) // SLOTS_PER_NODE) * SLOTS_PER_NODE
+    rows = np.concatenate([np.asarray(v[:used], dtype=np.int64) for v in vectors])
+    rows = rows.reshape(-1, SLOTS_PER_NODE)[:count]
+    return rows[:, 0].copy(), rows[:, 1:] / WEIGHT_SCALE
+
+def _node_weights(nodes: Sequence) -> np.ndarray:
+    """Gather node weights, reading straight from a shared population when possible."""
+    population = nodes[0].population
+    if all(node.population is population for node in nodes):
+        return population.weights[[node.row for node in nodes]]
+    return np.array([node.population.weights[node.row] for node in nodes])
+
+def encrypt_states_batch(nodes: Sequence, he: Pyfhel = None) -> Dict[str, Any]:
+    """
+    Encrypt the state digests and ethical weights of many nodes into as few
+    ciphertexts as the slot count allows.
+    Returns:
+        A dict with the serialized ciphertexts, the node ids in slot order and a timestamp.
+    """
+    he = he or he_manager.get_keyed_context(ENCRYPTION_PARAMS)
+    nodes = list(nodes)
+    if not nodes:
+        return {'ciphertexts': [], 'node_ids': [], 'timestamp': time.time()}
+    digests = np.array([node.state_digest() for node in nodes], dtype=np.int64)
+    try:
+        vectors = pack_states(digests, _node_weights(nodes), he.get_nSlots())
+        ciphertexts = [he.encryptInt(vector).to_bytes() for vector in vectors]
+    except Exception as e:
+        logging.error(f"Batch encryption failed for {len(nodes)} nodes: {e}")
+        ciphertexts = None
+    return {
+        'ciphertexts': ciphertexts,
+        'node_ids': [node.node_id for node in nodes],
+        'timestamp': time.time()
+    }
+
+def decrypt_states_batch(batch: Dict[str, Any], he: Pyfhel = None) -> Dict[int, Dict[str, Any]]:
+    """Decrypt a batch produced by encrypt_states_batch into per-node digests and weights."""
+    he = he or he_manager.get_keyed_context(ENCRYPTION_PARAMS)
+    vectors = [he.decryptInt(PyCtxt(pyfhel=he, bytestring=ctxt)) for ctxt in batch['ciphertexts']]
+    digests, weights = unpack_states(vectors, len(batch['node_ids']))
+    return {
+        node_id: {
+            'digest': int(digest),
+            'ethical_weights': dict(zip(ETHICAL_FRAMEWORKS, row.tolist()))
+        }
+        for node_id, digest, row in zip(batch['node_ids'], digests, weights)
+    }
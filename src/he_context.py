@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from pyfhel import Pyfhel
+from config import ENCRYPTION_PARAMS, HE_CACHE_DIR
+
+class HEContextManager:
+    """
+    Hands out one shared Pyfhel context per encryption parameter set.
+
+    Context generation happens once per parameter set and key generation is
+    deferred until a caller actually needs to encrypt. When a cache directory
+    is configured, the context and key material are persisted there, in
+    directories only the owner can read, and reloaded on the next start
+    instead of being regenerated.
+    """
+    def __init__(self, cache_dir: Optional[str] = HE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._contexts: Dict[str, Pyfhel] = {}
+        self._keyed: set = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def params_key(params: Dict[str, Any]) -> str:
+        """Stable identifier for a parameter set, used for sharing and cache paths."""
+        encoded = json.dumps(params, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def _cache_path(self, key: str, name: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, key, name)
+
+    def _cached(self, key: str, *names: str) -> bool:
+        paths = [self._cache_path(key, name) for name in names]
+        return all(path and os.path.exists(path) for path in paths)
+
+    def get_context(self, params: Dict[str, Any] = ENCRYPTION_PARAMS) -> Pyfhel:
+        """Return the shared context for `params`, without generating keys."""
+        key = self.params_key(params)
+        with self._lock:
+            he = self._contexts.get(key)
+            if he is None:
+                he = Pyfhel()
+                if self._cached(key, 'context'):
+                    he.load_context(self._cache_path(key, 'context'))
+                else:
+                    he.contextGen(p=params["p"], m=params["m"], sec=params["sec"])
+                    self._persist(key, he.save_context, 'context')
+                self._contexts[key] = he
+            return he
+
+    def get_keyed_context(self, params: Dict[str, Any] = ENCRYPTION_PARAMS) -> Pyfhel:
+        """Return the shared context for `params` with keys loaded or generated."""
+        he = self.get_context(params)
+        key = self.params_key(params)
+        with self._lock:
+            if key not in self._keyed:
+                if self._cached(key, 'public_key', 'secret_key'):
+                    he.load_public_key(self._cache_path(key, 'public_key'))
+                    he.load_secret_key(self._cache_path(key, 'secret_key'))
+                    logging.info(f"Loaded HE keys for parameter set {key} from cache")
+                else:
+                    he.keyGen()
+                    self._persist(key, he.save_public_key, 'public_key')
+                    self._persist(key, he.save_secret_key, 'secret_key')
+                    logging.info(f"Generated HE keys for parameter set {key}")
+                self._keyed.add(key)
+            return he
+
+    def _persist(self, key: str, save, name: str) -> None:
+        """Write one piece of key material to the cache, if caching is enabled."""
+        path = self._cache_path(key, name)
+        if path is None:
+            return
+        try:
+            # makedirs only applies the mode to the last directory it creates
+            for directory in (self.cache_dir, os.path.dirname(path)):
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            save(path)
+            os.chmod(path, 0o600)
+        except Exception as e:
+            logging.error(f"Failed to cache HE {name} for parameter set {key}: {e}")
+
+    def clear(self) -> None:
+        """Drop all in-memory contexts; cached files are left untouched."""
+        with self._lock:
+            self._contexts.clear()
+            self._keyed.clear()
+
+he_manager = HEContextManager()
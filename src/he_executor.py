@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pyfhel import Pyfhel, PyCtxt
+
+from config import ENCRYPTION_PARAMS, HE_EXECUTOR_WORKERS
+from he_context import HEContextManager, he_manager
+
+# Contexts held by each worker process, keyed by HEContextManager.params_key;
+# in the parent process only when the executor has fallen back to a thread
+_worker_contexts: Dict[str, Pyfhel] = {}
+
+def _init_worker(param_sets: Sequence[Dict[str, Any]], cache_dir: str) -> None:
+    """Load every parameter set's context and keys once, when the worker starts."""
+    manager = HEContextManager(cache_dir)
+    for params in param_sets:
+        _worker_contexts[manager.params_key(params)] = manager.get_keyed_context(params)
+
+def _encrypt_frac(key: str, value: float) -> bytes:
+    return _worker_contexts[key].encryptFrac(value).to_bytes()
+
+def _encrypt_int_vector(key: str, vector: np.ndarray) -> bytes:
+    return _worker_contexts[key].encryptInt(vector).to_bytes()
+
+def _decrypt_frac(key: str, ciphertext: bytes) -> float:
+    he = _worker_contexts[key]
+    return he.decryptFrac(PyCtxt(pyfhel=he, bytestring=ciphertext))
+
+def _decrypt_int_vector(key: str, ciphertext: bytes) -> np.ndarray:
+    he = _worker_contexts[key]
+    return he.decryptInt(PyCtxt(pyfhel=he, bytestring=ciphertext))
+
+class HEExecutor:
+    """
+    Runs Pyfhel encryption and decryption in a process pool so CPU-bound HE
+    work never blocks the asyncio loop.
+
+    Workers load their contexts and keys from the HEContextManager cache when
+    they start, so only values and ciphertexts cross the process boundary and
+    every worker shares the keys of the parent process.
+
+    If the pool cannot be used (no cache directory to share keys through,
+    processes cannot be started, or a worker dies) the executor falls back to
+    a single thread in this process using the manager's contexts, which still
+    keeps HE work off the loop.
+    """
+    def __init__(self, max_workers: int = HE_EXECUTOR_WORKERS,
+                 param_sets: Sequence[Dict[str, Any]] = (ENCRYPTION_PARAMS,),
+                 manager: HEContextManager = he_manager):
+        self.max_workers = max_workers
+        self.param_sets: List[Dict[str, Any]] = list(param_sets)
+        self.manager = manager
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._fallback: Optional[ThreadPoolExecutor] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def fallback(self) -> bool:
+        """True once work runs on the in-process fallback thread."""
+        return self._fallback is not None
+
+    async def _get_pool(self) -> Executor:
+        """Start the pool on first use, generating any missing keys off the loop."""
+        if self._pool is not None or self._fallback is not None:
+            return self._pool or self._fallback
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._pool is None and self._fallback is None:
+                loop = asyncio.get_running_loop()
+                for params in self.param_sets:
+                    await loop.run_in_executor(None, self.manager.get_keyed_context, params)
+                if not self.manager.cache_dir:
+                    self._use_fallback("no HE cache directory to share keys with workers")
+                else:
+                    try:
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            initializer=_init_worker,
+                            initargs=(self.param_sets, self.manager.cache_dir)
+                        )
+                        logging.info(f"HE executor started with {self.max_workers} workers")
+                    except (OSError, NotImplementedError) as e:
+                        self._use_fallback(e)
+        return self._pool or self._fallback
+
+    def _use_fallback(self, reason: Any) -> None:
+        logging.warning(f"HE process pool unavailable ({reason}); running HE work on a thread in this process")
+        for params in self.param_sets:
+            _worker_contexts[self.manager.params_key(params)] = self.manager.get_keyed_context(params)
+        self._fallback = ThreadPoolExecutor(max_workers=1, thread_name_prefix='he-fallback')
+
+    async def _submit(self, fn, params: Dict[str, Any], *args):
+        if params not in self.param_sets:
+            raise ValueError("Parameter set was not registered with this HE executor")
+        pool = await self._get_pool()
+        loop = asyncio.get_running_loop()
+        key = self.manager.params_key(params)
+        try:
+            return await loop.run_in_executor(pool, fn, key, *args)
+        except BrokenProcessPool as e:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            if self._fallback is None:
+                self._use_fallback(e)
+            return await loop.run_in_executor(self._fallback, fn, key, *args)
+
+    async def encrypt_frac(self, value: float, params: Dict[str, Any] = ENCRYPTION_PARAMS) -> bytes:
+        """Encrypt a scalar and return the serialized ciphertext."""
+        return await self._submit(_encrypt_frac, params, float(value))
+
+    async def encrypt_int_vector(self, vector: np.ndarray, params: Dict[str, Any] = ENCRYPTION_PARAMS) -> bytes:
+        """Encrypt a packed integer slot vector and return the serialized ciphertext."""
+        return await self._submit(_encrypt_int_vector, params, np.asarray(vector, dtype=np.int64))
+
+    async def decrypt_frac(self, ciphertext: bytes, params: Dict[str, Any] = ENCRYPTION_PARAMS) -> float:
+        return await self._submit(_decrypt_frac, params, ciphertext)
+
+    async def decrypt_int_vector(self, ciphertext: bytes, params: Dict[str, Any] = ENCRYPTION_PARAMS) -> np.ndarray:
+        return await self._submit(_decrypt_int_vector, params, ciphertext)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool or fallback thread; the next call starts the pool again."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+        if self._fallback is not None:
+            self._fallback.shutdown(wait=wait)
+            self._fallback = None
+
+_he_executor: Optional[HEExecutor] = None
+
+def get_he_executor() -> HEExecutor:
+    """Return the process-wide HE executor, creating it on first use."""
+    global _he_executor
+    if _he_executor is None:
+        _he_executor = HEExecutor()
+    return _he_executor
@@ -3,6 +3,7 @@ import random
 import logging
 from config import NODE_COUNT
 from ouroboros_node import OuroborosNode
+from population import NodePopulation
 from rl_agent import RLAgent
 from metrics import MetricsCollector
 from monitor import NetworkMonitor
@@ -16,8 +17,9 @@ async def main():
     and consensus tasks, and runs everything concurrently.
     """
     domains = ['deontological', 'utilitarian', 'virtue']
+    population = NodePopulation(capacity=NODE_COUNT)
     nodes = [
-        OuroborosNode(node_id=i, domain_seed=random.choice(domains))
+        OuroborosNode(node_id=i, domain_seed=random.choice(domains), population=population)
         for i in range(NODE_COUNT)
     ]
 
@@ -1,45 +1,213 @@
 import asyncio
-from typing import Dict, Any, Callable, List, Set
+import itertools
+import secrets
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Any, Callable, FrozenSet, Iterable, List, Mapping, Optional, Set
 import json
 import logging
+import time
 from dataclasses import dataclass
 from datetime import datetime
-import uuid
+from config import (
+    HANDLER_CONCURRENCY, PUBLISH_LATENCY_WINDOW, SUBSCRIBER_OVERFLOW_POLICY, SUBSCRIBER_QUEUE_CAPACITY
+)
+from offline_store import OfflineStore
+from wire import Buffer, decode_fields, encode_message
 
-@dataclass
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest', 'coalesce')
+
+# Message ids are a random per-process prefix and a sequence number, so they
+# are unique across nodes and fit the 64-bit id of the wire format
+_ID_PREFIX = secrets.randbits(32) << 32
+_id_sequence = itertools.count()
+
+@dataclass(frozen=True)
 class Message:
-    id: str
+    """
+    Immutable message. A broadcast enqueues the same instance on every
+    subscriber queue, so neither it nor its payload may be changed in place.
+    to_bytes and from_buffer convert it to and from the binary wire format.
+    """
+    id: int
     sender_id: int
     recipient_id: int
     message_type: str
-    payload: Dict[str, Any]
+    payload: Mapping[str, Any]
     timestamp: float
     
     @classmethod
     def create(cls, sender_id: int, recipient_id: int, message_type: str, payload: Dict[str, Any]):
+        """
+        Create a message whose payload is a read-only view of a shallow copy of
+        `payload`, so later changes to the caller's dict do not reach it.
+        Nested values are shared and must not be changed in place.
+        """
         return cls(
-            id=str(uuid.uuid4()),
+            id=_ID_PREFIX | next(_id_sequence) & 0xFFFFFFFF,
             sender_id=sender_id,
             recipient_id=recipient_id,
             message_type=message_type,
-            payload=payload,
+            payload=MappingProxyType(dict(payload)),
             timestamp=datetime.now().timestamp()
         )
 
+    def to_bytes(self) -> bytes:
+        """Encode as one binary wire frame"""
+        return encode_message(self)
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer, offset: int = 0) -> 'Message':
+        """Decode the wire frame at `offset` of a bytes-like buffer, such as a memoryview"""
+        (message_id, sender_id, recipient_id, message_type, payload, timestamp), _ = decode_fields(buffer, offset)
+        return cls(message_id, sender_id, recipient_id, message_type, MappingProxyType(payload), timestamp)
+
+class SubscriberQueue(asyncio.Queue):
+    """
+    Bounded subscriber queue with a selectable overflow policy:
+
+    block: put waits for space, put_nowait raises QueueFull.
+    drop_oldest: the oldest queued message is discarded to make room.
+    drop_newest: the incoming message is discarded.
+    coalesce: a message replaces the queued message of the same message_type,
+        keeping its place in the queue; if the queue is full of other types
+        the oldest message is discarded.
+
+    A capacity of 0 means unbounded, as for asyncio.Queue.
+    """
+    def __init__(self, capacity: int = SUBSCRIBER_QUEUE_CAPACITY, policy: str = SUBSCRIBER_OVERFLOW_POLICY):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}; expected one of {OVERFLOW_POLICIES}")
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+        super().__init__(maxsize=capacity)
+
+    def _init(self, maxsize):
+        self._queue = deque()
+        # Queued slot of each message type, coalesce only
+        self._slots: Dict[str, List[Any]] = {}
+
+    def _put(self, item):
+        if self.policy != 'coalesce':
+            self._queue.append(item)
+            return
+        slot = [item]
+        key = getattr(item, 'message_type', None)
+        if key is not None:
+            self._slots[key] = slot
+        self._queue.append(slot)
+
+    def _get(self):
+        item = self._queue.popleft()
+        if self.policy != 'coalesce':
+            return item
+        slot, item = item, item[0]
+        key = getattr(item, 'message_type', None)
+        if self._slots.get(key) is slot:
+            del self._slots[key]
+        return item
+
+    def put_nowait(self, item):
+        if self.policy == 'coalesce':
+            slot = self._slots.get(getattr(item, 'message_type', None))
+            if slot is not None:
+                slot[0] = item
+                self.coalesced += 1
+                return
+        if 0 < self._maxsize <= len(self._queue):
+            if self.policy == 'block':
+                raise asyncio.QueueFull
+            self.dropped += 1
+            if self.policy == 'drop_newest':
+                return
+            self._get()
+            self.task_done()
+        super().put_nowait(item)
+        if len(self._queue) > self.high_water:
+            self.high_water = len(self._queue)
+
+    async def put(self, item):
+        if self.policy == 'block':
+            await super().put(item)
+        else:
+            self.put_nowait(item)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'depth': self.qsize(),
+            'capacity': self.maxsize,
+            'policy': self.policy,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'high_water': self.high_water
+        }
+
 class MessageBroker:
-    def __init__(self):
-        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+    """
+    Routes messages to subscriber queues. Every queue is a SubscriberQueue
+    bounded by `queue_capacity`, so a slow subscriber costs at most that many
+    queued messages; `overflow_policy` decides what gives when it is full.
+
+    Queues may subscribe to a set of topics (message types). Broadcasts are
+    routed through a topic -> queues index, so each costs one delivery per
+    interested queue; queues subscribed without topics receive everything.
+    Messages addressed to a node reach all of its queues regardless of topic.
+
+    publish never yields per delivery: one shared Message is put_nowait on
+    every target queue in a single pass, and only full queues with the
+    "block" policy are awaited afterwards. Handlers run as background tasks,
+    at most `handler_concurrency` at a time, so a slow handler cannot stall
+    publishers. Recent publish latencies are kept for percentiles.
+
+    Messages for nodes without a subscription are held in an OfflineStore
+    and replayed by deliver_buffered_messages.
+    """
+    def __init__(self, queue_capacity: int = SUBSCRIBER_QUEUE_CAPACITY,
+                 overflow_policy: str = SUBSCRIBER_OVERFLOW_POLICY,
+                 handler_concurrency: int = HANDLER_CONCURRENCY,
+                 offline_store: Optional[OfflineStore] = None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r}; expected one of {OVERFLOW_POLICIES}")
+        self.subscribers: Dict[int, Set[SubscriberQueue]] = {}
+        # Topics of each queue (None for all topics) and the queues interested in each topic
+        self.queue_topics: Dict[SubscriberQueue, Optional[FrozenSet[str]]] = {}
+        self.topic_index: Dict[str, Set[SubscriberQueue]] = {}
+        self.all_topics: Set[SubscriberQueue] = set()
         self.message_handlers: Dict[str, List[Callable]] = {}
-        self.message_buffer: Dict[int, List[Message]] = {}
-        self.buffer_size = 1000
+        self.message_buffer = offline_store if offline_store is not None else OfflineStore(Message.to_bytes, Message.from_buffer)
+        self.queue_capacity = queue_capacity
+        self.overflow_policy = overflow_policy
+        self.handler_concurrency = max(1, handler_concurrency)
+        # Created on first use so it binds to the loop that runs the handlers
+        self._handler_slots: Optional[asyncio.Semaphore] = None
+        self._handler_tasks: Set[asyncio.Task] = set()
+        self.publish_latency = deque(maxlen=PUBLISH_LATENCY_WINDOW)
         self.logger = logging.getLogger(__name__)
         
-    async def subscribe(self, node_id: int) -> asyncio.Queue:
-        """Subscribe a node to receive messages"""
+    async def subscribe(self, node_id: int, topics: Optional[Iterable[str]] = None,
+                        capacity: Optional[int] = None, policy: Optional[str] = None) -> SubscriberQueue:
+        """
+        Subscribe a node to receive messages
+        Args:
+            topics: Message types to receive broadcasts of; None receives all.
+            capacity, policy: Override the broker's queue limits for this queue.
+        """
         if node_id not in self.subscribers:
             self.subscribers[node_id] = set()
-        queue = asyncio.Queue()
+        queue = SubscriberQueue(
+            self.queue_capacity if capacity is None else capacity,
+            policy or self.overflow_policy
+        )
         self.subscribers[node_id].add(queue)
+        topics = None if topics is None else frozenset(topics)
+        self.queue_topics[queue] = topics
+        if topics is None:
+            self.all_topics.add(queue)
+        else:
+            for topic in topics:
+                self.topic_index.setdefault(topic, set()).add(queue)
         return queue
         
     async def unsubscribe(self, node_id: int, queue: asyncio.Queue):
@@ -48,37 +216,78 @@ class MessageBroker:
             self.subscribers[node_id].discard(queue)
             if not self.subscribers[node_id]:
                 del self.subscribers[node_id]
+        topics = self.queue_topics.pop(queue, None)
+        self.all_topics.discard(queue)
+        for topic in topics or ():
+            interested = self.topic_index.get(topic)
+            if interested is not None:
+                interested.discard(queue)
+                if not interested:
+                    del self.topic_index[topic]
                 
+    @staticmethod
+    def _fan_out(message: Message, queues: Iterable[SubscriberQueue], blocked: List[SubscriberQueue]) -> None:
+        """Enqueue `message` on every queue without yielding; collect full "block" queues."""
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                blocked.append(queue)
+
     async def publish(self, message: Message):
         """Publish a message to recipient(s)"""
+        start = time.perf_counter()
         try:
+            blocked: List[SubscriberQueue] = []
             if message.recipient_id == -1:  # Broadcast
-                for node_queues in self.subscribers.values():
-                    for queue in node_queues:
-                        await queue.put(message)
+                self._fan_out(message, self.topic_index.get(message.message_type, ()), blocked)
+                self._fan_out(message, self.all_topics, blocked)
             elif message.recipient_id in self.subscribers:
-                for queue in self.subscribers[message.recipient_id]:
-                    await queue.put(message)
+                self._fan_out(message, self.subscribers[message.recipient_id], blocked)
             else:
                 # Buffer message for offline recipient
-                if message.recipient_id not in self.message_buffer:
-                    self.message_buffer[message.recipient_id] = []
-                buffer = self.message_buffer[message.recipient_id]
-                buffer.append(message)
-                if len(buffer) > self.buffer_size:
-                    buffer.pop(0)  # FIFO
+                self.message_buffer.add(message.recipient_id, message)
+            for queue in blocked:
+                await queue.put(message)
                     
             # Trigger message handlers
-            if message.message_type in self.message_handlers:
-                for handler in self.message_handlers[message.message_type]:
-                    try:
-                        await handler(message)
-                    except Exception as e:
-                        self.logger.error(f"Handler error for message {message.id}: {e}")
+            for handler in self.message_handlers.get(message.message_type, ()):
+                task = asyncio.ensure_future(self._run_handler(handler, message))
+                self._handler_tasks.add(task)
+                task.add_done_callback(self._handler_tasks.discard)
                         
         except Exception as e:
             self.logger.error(f"Error publishing message {message.id}: {e}")
             raise
+        finally:
+            self.publish_latency.append(time.perf_counter() - start)
+
+    async def _run_handler(self, handler: Callable, message: Message) -> None:
+        if self._handler_slots is None:
+            self._handler_slots = asyncio.Semaphore(self.handler_concurrency)
+        async with self._handler_slots:
+            try:
+                await handler(message)
+            except Exception as e:
+                self.logger.error(f"Handler error for message {message.id}: {e}")
+
+    async def drain_handlers(self) -> None:
+        """Wait for every handler dispatched so far to finish."""
+        while self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks)
+
+    def publish_latency_percentiles(self) -> Dict[str, float]:
+        """p50/p90/p99/max of recent publish latencies, in seconds."""
+        latencies = sorted(self.publish_latency)
+        if not latencies:
+            return {}
+        last = len(latencies) - 1
+        return {
+            'p50': latencies[last * 50 // 100],
+            'p90': latencies[last * 90 // 100],
+            'p99': latencies[last * 99 // 100],
+            'max': latencies[last]
+        }
             
     def register_handler(self, message_type: str, handler: Callable):
         """Register a handler for a specific message type"""
@@ -94,11 +303,19 @@ class MessageBroker:
                 del self.message_handlers[message_type]
                 
     async def deliver_buffered_messages(self, node_id: int, queue: asyncio.Queue):
-        """Deliver any buffered messages for a node"""
-        if node_id in self.message_buffer:
-            for message in self.message_buffer[node_id]:
-                await queue.put(message)
-            del self.message_buffer[node_id]
+        """
+        Deliver any buffered messages for a node, oldest first. Messages are
+        put_nowait in one pass; a full "block" queue is awaited from there on.
+        Other queues apply their overflow policy to the replay.
+        """
+        messages = self.message_buffer.drain(node_id)
+        for delivered, message in enumerate(messages):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                for remaining in messages[delivered:]:
+                    await queue.put(remaining)
+                break
             
     async def broadcast(self, sender_id: int, message_type: str, payload: Dict[str, Any]):
         """Broadcast a message to all subscribers"""
@@ -106,9 +323,27 @@ class MessageBroker:
         await self.publish(message)
         
     def get_buffer_status(self) -> Dict[str, Any]:
-        """Get status of message buffers"""
+        """Get status of message buffers and subscriber queues"""
+        queues = {
+            node_id: [queue.stats() for queue in node_queues]
+            for node_id, node_queues in self.subscribers.items()
+        }
+        stats = [queue_stats for node_queues in queues.values() for queue_stats in node_queues]
+        offline = self.message_buffer.stats()
         return {
-            'total_buffered_messages': sum(len(buf) for buf in self.message_buffer.values()),
+            'total_buffered_messages': offline['in_memory'] + offline['on_disk'],
             'nodes_with_buffers': len(self.message_buffer),
-            'subscribers_count': len(self.subscribers)
+            'offline': offline,
+            'subscribers_count': len(self.subscribers),
+            'queued_messages': sum(queue_stats['depth'] for queue_stats in stats),
+            'dropped_messages': sum(queue_stats['dropped'] for queue_stats in stats),
+            'coalesced_messages': sum(queue_stats['coalesced'] for queue_stats in stats),
+            'topic_subscriptions': {topic: len(queues) for topic, queues in self.topic_index.items()},
+            'running_handlers': len(self._handler_tasks),
+            'publish_latency': self.publish_latency_percentiles(),
+            'queues': queues
         }
+
+    def close(self) -> None:
+        """Discard offline messages and their spill files"""
+        self.message_buffer.close()
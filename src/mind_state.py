@@ -0,0 +1,7 @@
+from enum import Enum
+
+class MindState(Enum):
+    ACTIVE_RECURSION = 1
+    NEURAL_ANNEALING = 2
+    ETHICAL_CRISIS = 3
+    OBSERVATIONAL_FREEZE = 4
@@ -1,9 +1,26 @@
 import asyncio
 import logging
+from typing import Dict
 from config import OBSERVER_INTERVAL
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+def inject_influence(nodes, rl_agent) -> Dict[str, float]:
+    """
+    Apply one round of RL-chosen observer influence to the given nodes.
+    Returns:
+        The influence that was applied.
+    """
+    influence = rl_agent.get_observer_influence()
+    logging.info(f"Observer injecting influence: {influence}")
+    # Nodes sharing a population are influenced in one batched update
+    rows_by_population = {}
+    for node in nodes:
+        rows_by_population.setdefault(id(node.population), (node.population, []))[1].append(node.row)
+    for population, rows in rows_by_population.values():
+        population.apply_observer_influence(influence, None if len(rows) == len(population) else rows)
+    return influence
+
 async def observer_module(nodes, rl_agent) -> None:
     """
     Injects influence into the network of nodes.
@@ -11,7 +28,4 @@ async def observer_module(nodes, rl_agent) -> None:
     """
     while True:
         await asyncio.sleep(OBSERVER_INTERVAL)
-        influence = rl_agent.get_observer_influence()
-        logging.info(f"Observer injecting influence: {influence}")
-        for node in nodes:
-            node.apply_observer_influence(influence)
+        inject_influence(nodes, rl_agent)
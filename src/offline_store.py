@@ -0,0 +1,327 @@
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+import weakref
+from array import array
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from config import (
+    OFFLINE_BUFFER_SIZE, OFFLINE_EXPIRE_EVERY, OFFLINE_MEMORY_CAP, OFFLINE_MESSAGE_TTL, OFFLINE_SEGMENT_BYTES,
+    OFFLINE_SPILL_DIR
+)
+
+# Spilled record header: expiry time and encoded length
+_RECORD = struct.Struct('<dI')
+
+class _SpillIndex:
+    """Where one recipient's spilled records are, in append order."""
+    __slots__ = ('segments', 'offsets', 'expires')
+
+    def __init__(self):
+        self.segments = array('l')
+        self.offsets = array('q')
+        self.expires = array('d')
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def append(self, segment: int, offset: int, expires: float) -> None:
+        self.segments.append(segment)
+        self.offsets.append(offset)
+        self.expires.append(expires)
+
+class OfflineStore:
+    """
+    Messages held for offline recipients.
+
+    Each recipient holds at most `buffer_size` messages, in memory and on
+    disk together; when it is full the oldest message is dropped. Messages
+    expire `ttl` seconds after they are stored, and every `expire_every` adds
+    the whole store is swept for expired messages, so recipients that never
+    reconnect do not hold memory or disk forever. At most `memory_cap`
+    messages are kept in memory across all recipients: past that, the largest
+    ring is spilled to an append-only segment log on disk, leaving only a
+    20-byte index entry per message in memory. Rings are indexed by length so
+    the largest is found without scanning every recipient. Segments roll over
+    at `segment_bytes` and are deleted once every record in them has been
+    replayed, dropped or expired. Replay memory-maps the segments and returns
+    a recipient's spilled messages followed by its ring, oldest first.
+
+    Items are opaque to the store; `encode` turns them into bytes for
+    spilling and `decode` turns a memoryview of those bytes back into an item.
+    The view is only valid during the call, so `decode` must not keep it. An
+    item `encode` rejects with TypeError, ValueError, OverflowError or
+    struct.error is dropped and counted in `dropped` when its ring spills.
+    """
+    def __init__(self, encode: Callable[[Any], bytes], decode: Callable[[memoryview], Any],
+                 buffer_size: int = OFFLINE_BUFFER_SIZE, ttl: float = OFFLINE_MESSAGE_TTL,
+                 memory_cap: int = OFFLINE_MEMORY_CAP, spill_dir: str = OFFLINE_SPILL_DIR,
+                 segment_bytes: int = OFFLINE_SEGMENT_BYTES, expire_every: int = OFFLINE_EXPIRE_EVERY,
+                 clock: Callable[[], float] = time.time):
+        if buffer_size < 1 or memory_cap < 1 or expire_every < 1:
+            raise ValueError("Offline buffer size, memory cap and expiry interval must be at least 1")
+        self.encode = encode
+        self.decode = decode
+        self.buffer_size = buffer_size
+        self.ttl = ttl
+        self.memory_cap = memory_cap
+        self.spill_dir = spill_dir
+        self.segment_bytes = segment_bytes
+        self.expire_every = expire_every
+        self.clock = clock
+        self._rings: Dict[int, Deque[Tuple[float, Any]]] = {}
+        self._spilled: Dict[int, _SpillIndex] = {}
+        # Recipients by ring length, and an upper bound on the longest ring
+        self._ring_lengths: Dict[int, Dict[int, None]] = {}
+        self._longest = 0
+        self._adds_since_expire = 0
+        self._in_memory = 0
+        self._on_disk = 0
+        # Records not yet replayed, dropped or expired, per segment
+        self._segment_live: Dict[int, int] = {}
+        self._directory: Optional[str] = None
+        self._active = None
+        self._active_id = -1
+        self._active_size = 0
+        self._finalizer = None
+        self.dropped = 0
+        self.expired = 0
+        self.spilled = 0
+
+    def __contains__(self, recipient: int) -> bool:
+        return recipient in self._rings or recipient in self._spilled
+
+    def __len__(self) -> int:
+        """Recipients with stored messages."""
+        return len(self._rings.keys() | self._spilled.keys())
+
+    def pending(self, recipient: int) -> int:
+        """Messages stored for `recipient`, in memory and on disk, expired or not."""
+        return len(self._rings.get(recipient, ())) + len(self._spilled.get(recipient, ()))
+
+    def add(self, recipient: int, item: Any) -> None:
+        """Store an item for an offline recipient."""
+        self._adds_since_expire += 1
+        if self._adds_since_expire >= self.expire_every:
+            self.expire()
+        now = self.clock()
+        ring = self._rings.get(recipient)
+        if ring is None:
+            ring = self._rings[recipient] = deque()
+        before = len(ring)
+        self._expire_ring(ring, now)
+        index = self._spilled.get(recipient)
+        if index is not None:
+            self._expire_spilled(recipient, index, now)
+        if len(ring) + len(index or ()) >= self.buffer_size:
+            # The oldest message is on disk if anything is
+            self.dropped += 1
+            if index:
+                self._drop_spilled(recipient, index, 1)
+            else:
+                ring.popleft()
+                self._in_memory -= 1
+        ring.append((now + self.ttl, item))
+        self._in_memory += 1
+        self._resized(recipient, before, len(ring))
+        if self._in_memory > self.memory_cap:
+            self._spill_largest(now)
+
+    def _resized(self, recipient: int, before: int, after: int) -> None:
+        """Move a recipient between ring length buckets."""
+        if before == after:
+            return
+        if before:
+            bucket = self._ring_lengths[before]
+            del bucket[recipient]
+            if not bucket:
+                del self._ring_lengths[before]
+        if after:
+            self._ring_lengths.setdefault(after, {})[recipient] = None
+            if after > self._longest:
+                self._longest = after
+
+    def _expire_ring(self, ring: Deque[Tuple[float, Any]], now: float) -> None:
+        # Rings are in arrival order, so expired entries are all at the head
+        while ring and ring[0][0] <= now:
+            ring.popleft()
+            self._in_memory -= 1
+            self.expired += 1
+
+    def _expire_spilled(self, recipient: int, index: _SpillIndex, now: float) -> None:
+        # Expiry times are non-decreasing within an index
+        count = 0
+        while count < len(index) and index.expires[count] <= now:
+            count += 1
+        if count:
+            self._drop_spilled(recipient, index, count)
+            self.expired += count
+
+    def _drop_spilled(self, recipient: int, index: _SpillIndex, count: int) -> None:
+        """Forget the oldest `count` spilled records of a recipient."""
+        segments = set(index.segments[:count])
+        for segment in index.segments[:count]:
+            self._segment_live[segment] -= 1
+        for column in (index.segments, index.offsets, index.expires):
+            del column[:count]
+        self._on_disk -= count
+        if not index:
+            del self._spilled[recipient]
+        for segment in segments:
+            self._release_segment(segment)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self._directory, f"segment-{segment:06d}.log")
+
+    def _open_segment(self) -> None:
+        if self._directory is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix='offline-', dir=self.spill_dir)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        previous = self._active_id
+        if self._active is not None:
+            self._active.close()
+        self._active_id += 1
+        self._release_segment(previous)
+        self._active = open(self._segment_path(self._active_id), 'ab')
+        self._active_size = 0
+        self._segment_live[self._active_id] = 0
+
+    def _release_segment(self, segment: int) -> None:
+        """Delete a segment once it is closed and holds no live records."""
+        if segment != self._active_id and self._segment_live.get(segment) == 0:
+            del self._segment_live[segment]
+            os.remove(self._segment_path(segment))
+
+    def _spill_largest(self, now: float) -> None:
+        while self._longest not in self._ring_lengths:
+            self._longest -= 1
+        recipient = next(iter(self._ring_lengths[self._longest]))
+        ring = self._rings.pop(recipient)
+        self._resized(recipient, len(ring), 0)
+        self._expire_ring(ring, now)
+        self._in_memory -= len(ring)
+        if not ring:
+            return
+        index = self._spilled.get(recipient)
+        spilled = 0
+        for expires, item in ring:
+            try:
+                data = self.encode(item)
+            except (TypeError, ValueError, OverflowError, struct.error) as e:
+                # Nothing was written yet, so the record is simply dropped
+                self.dropped += 1
+                logging.warning(f"Dropped an offline message for node {recipient} that cannot be spilled: {e}")
+                continue
+            if self._active is None or self._active_size >= self.segment_bytes:
+                self._open_segment()
+            self._active.write(_RECORD.pack(expires, len(data)))
+            self._active.write(data)
+            if index is None:
+                index = self._spilled[recipient] = _SpillIndex()
+            index.append(self._active_id, self._active_size, expires)
+            self._active_size += _RECORD.size + len(data)
+            self._segment_live[self._active_id] += 1
+            spilled += 1
+        self._on_disk += spilled
+        self.spilled += spilled
+        logging.debug(f"Spilled {spilled} offline messages for node {recipient} to disk")
+
+    def _replay_spilled(self, index: _SpillIndex, now: float) -> List[Any]:
+        self._active.flush()
+        items = []
+        maps: Dict[int, mmap.mmap] = {}
+        views: Dict[int, memoryview] = {}
+        try:
+            for segment, offset, expires in zip(index.segments, index.offsets, index.expires):
+                if expires > now:
+                    if segment not in maps:
+                        with open(self._segment_path(segment), 'rb') as f:
+                            maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        views[segment] = memoryview(maps[segment])
+                    _, length = _RECORD.unpack_from(views[segment], offset)
+                    start = offset + _RECORD.size
+                    items.append(self.decode(views[segment][start:start + length]))
+                else:
+                    self.expired += 1
+                self._segment_live[segment] -= 1
+        finally:
+            # Views must be released before their maps can close
+            for view in views.values():
+                view.release()
+            for mapped in maps.values():
+                mapped.close()
+        self._on_disk -= len(index)
+        for segment in set(index.segments):
+            self._release_segment(segment)
+        return items
+
+    def drain(self, recipient: int) -> List[Any]:
+        """Remove and return every unexpired item stored for `recipient`, oldest first."""
+        now = self.clock()
+        items = []
+        index = self._spilled.pop(recipient, None)
+        if index is not None:
+            items = self._replay_spilled(index, now)
+        ring = self._rings.pop(recipient, None)
+        if ring is not None:
+            self._resized(recipient, len(ring), 0)
+            self._in_memory -= len(ring)
+            for expires, item in ring:
+                if expires > now:
+                    items.append(item)
+                else:
+                    self.expired += 1
+        return items
+
+    def expire(self) -> int:
+        """Drop expired items from memory and disk; returns how many were dropped."""
+        now = self.clock()
+        before = self.expired
+        self._adds_since_expire = 0
+        for recipient in list(self._rings):
+            ring = self._rings[recipient]
+            length = len(ring)
+            self._expire_ring(ring, now)
+            self._resized(recipient, length, len(ring))
+            if not ring:
+                del self._rings[recipient]
+        for recipient in list(self._spilled):
+            self._expire_spilled(recipient, self._spilled[recipient], now)
+        return self.expired - before
+
+    def stats(self) -> Dict[str, Any]:
+        if self._active is not None:
+            self._active.flush()
+        return {
+            'in_memory': self._in_memory,
+            'on_disk': self._on_disk,
+            'segments': len(self._segment_live),
+            'disk_bytes': sum(
+                os.path.getsize(self._segment_path(segment)) for segment in self._segment_live
+            ) if self._directory else 0,
+            'dropped': self.dropped,
+            'expired': self.expired,
+            'spilled': self.spilled
+        }
+
+    def close(self) -> None:
+        """Discard everything stored and delete the spill directory."""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+        if self._finalizer is not None:
+            self._finalizer()
+        self._rings.clear()
+        self._spilled.clear()
+        self._ring_lengths.clear()
+        self._longest = 0
+        self._segment_live.clear()
+        self._directory = None
+        self._active_id = -1
+        self._in_memory = self._on_disk = 0
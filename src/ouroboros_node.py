@@ -3,7 +3,6 @@ import random
 import secrets
 import time
 from collections import deque
-from enum import Enum
 from typing import Dict, Any, List, Optional
 import json
 import numpy as np
@@ -11,42 +10,106 @@ import networkx as nx
 
 import logging
 from pyfhel import Pyfhel
-from config import ENCRYPTION_PARAMS, RECURSION_LIMIT
+from config import (
+    COMMITTEE_PARTITION, COMMITTEE_SIZE, CONSENSUS_AGGREGATOR, CONSENSUS_INTERVAL, CONSENSUS_MODE,
+    ENCRYPTION_PARAMS, ETHICAL_BOUNDS, GOSSIP_EPOCH_ROUNDS, GOSSIP_FANOUT, MESSAGE_BATCH_SIZE, PEER_LATENCY_ALPHA,
+    RECURSION_LIMIT
+)
 from zkp import ZKPVerifier
+from messaging import Message, MessageBroker
+from committee import CommitteeDigest, assign_committees, combine_digests, seal_digest
+from consensus_kernel import aggregate, matrix_to_consensus, states_to_matrix
+from gossip import GossipDigest
+from quorum import QuorumRound, RoundResult
+from he_context import he_manager
+from he_executor import HEExecutor, get_he_executor
+from mind_state import MindState
+from population import ETHICAL_FRAMEWORKS, MEMORY_WINDOW, NodePopulation
+from trust_store import TrustStore
+from rolling_digest import RollingDigest
+from wire import is_frame
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-class MindState(Enum):
-    ACTIVE_RECURSION = 1
-    NEURAL_ANNEALING = 2
-    ETHICAL_CRISIS = 3
-    OBSERVATIONAL_FREEZE = 4
-
 class OuroborosNode:
     """
     Represents an autonomous Ouroboros node that generates recursive insights,
     manages ethical weights, and simulates secure state encryption.
+
+    Numeric state (ethical weights, recursion depth, karma and MindState) is
+    stored in a row of a NodePopulation. Nodes created together should share
+    one population so batched operations can run over all of them. Passing
+    `row` attaches the node to an existing population row, e.g. on restore.
     """
-    def __init__(self, node_id: int, domain_seed: str):
+    # Broadcast topics _handle_message acts on
+    MESSAGE_TOPICS = ('consensus', 'influence')
+
+    def __init__(self, node_id: int, domain_seed: str, population: Optional[NodePopulation] = None,
+                 row: Optional[int] = None):
         self.node_id = node_id
         self.domain = domain_seed  # Domain specialization
-        self.conceptual_memory = deque(maxlen=64)
-        self.ethical_weights: Dict[str, float] = {'utilitarian': 0.33, 'deontological': 0.33, 'virtue': 0.33}
-        self.recursive_karma = 1.0
-        self.state = MindState.ACTIVE_RECURSION
-        self.recursion_depth = 0
-        self.he = self._init_encryption_context()
-        self.message_queue = None
+        self.population = population if population is not None else NodePopulation(capacity=1)
+        self.row = row if row is not None else self.population.add_node(node_id, domain_seed)
+        self.conceptual_memory = deque(maxlen=MEMORY_WINDOW)
+        self._memory_digest = RollingDigest(self.conceptual_memory.maxlen)
+        self._he: Optional[Pyfhel] = None
+        self._message_queue: Optional[asyncio.Queue] = None
+        self._queue_attached: Optional[asyncio.Event] = None
         self.zkp_verifier = ZKPVerifier()
         self.consensus_state = {}
         self.peers = []
-        self.trust_graph = nx.DiGraph()
+        self._gossip: Optional[GossipDigest] = None
+        self._gossip_rounds = 0  # Gossip rounds run in the current epoch
+        self.peer_latency: Dict[int, float] = {}  # Smoothed response latency in seconds
+
+    @property
+    def ethical_weights(self) -> Dict[str, float]:
+        return self.population.get_weights(self.row)
+
+    @ethical_weights.setter
+    def ethical_weights(self, weights: Dict[str, float]) -> None:
+        self.population.set_weights(self.row, weights)
+
+    @property
+    def recursion_depth(self) -> int:
+        return int(self.population.recursion_depth[self.row])
+
+    @recursion_depth.setter
+    def recursion_depth(self, depth: int) -> None:
+        self.population.recursion_depth[self.row] = depth
+
+    @property
+    def recursive_karma(self) -> float:
+        return float(self.population.recursive_karma[self.row])
+
+    @recursive_karma.setter
+    def recursive_karma(self, karma: float) -> None:
+        self.population.recursive_karma[self.row] = karma
+
+    @property
+    def state(self) -> MindState:
+        return self.population.get_state(self.row)
+
+    @state.setter
+    def state(self, state: MindState) -> None:
+        self.population.set_state(self.row, state)
 
-    def _init_encryption_context(self) -> Pyfhel:
-        he = Pyfhel()
-        he.contextGen(p=ENCRYPTION_PARAMS["p"], m=ENCRYPTION_PARAMS["m"], sec=ENCRYPTION_PARAMS["sec"])
-        he.keyGen()
-        return he
+    @property
+    def message_queue(self) -> Optional[asyncio.Queue]:
+        return self._message_queue
+
+    @message_queue.setter
+    def message_queue(self, queue: Optional[asyncio.Queue]) -> None:
+        self._message_queue = queue
+        if queue is not None and self._queue_attached is not None:
+            self._queue_attached.set()
+
+    @property
+    def he(self) -> Pyfhel:
+        """Shared encryption context; keys are loaded or generated on first use."""
+        if self._he is None:
+            self._he = he_manager.get_keyed_context(ENCRYPTION_PARAMS)
+        return self._he
 
     def generate_insight(self) -> str:
         """
@@ -56,78 +119,271 @@ class OuroborosNode:
         """
         insight = f"{self.domain}_insight_{self.recursion_depth}"
         self.conceptual_memory.append(insight)
+        self._memory_digest.append(insight)
         self.recursion_depth += 1
         logging.info(f"Node {self.node_id} generated insight: {insight}")
         return insight
 
+    def state_digest(self) -> int:
+        """
+        Numeric digest of the conceptual memory that gets encrypted.
+        Maintained incrementally as insights are added, so this is O(1).
+        """
+        return self._memory_digest.value % 100000
+
     def encrypt_state(self) -> Dict[str, Any]:
         """
         Encrypt the conceptual memory using Pyfhel.
         """
-        state_snapshot = "||".join(self.conceptual_memory)
         try:
-            numeric_state = abs(hash(state_snapshot)) % 100000
+            numeric_state = self.state_digest()
             enc_state = self.he.encryptFrac(float(numeric_state))
             return {'encrypted_state': enc_state.to_bytes(), 'timestamp': time.time()}
         except Exception as e:
             logging.error(f"Encryption failed for Node {self.node_id}: {e}")
             return {'encrypted_state': None, 'timestamp': time.time()}
 
-    def get_verifiable_state(self) -> Dict[str, Any]:
+    async def encrypt_state_async(self, executor: Optional[HEExecutor] = None) -> Dict[str, Any]:
         """
-        Get a verifiable snapshot of the node's state for consensus.
-        Returns a dictionary containing state data and ZKP elements.
+        Awaitable encrypt_state that runs the encryption in the HE process pool.
         """
-        state = {
+        executor = executor or get_he_executor()
+        try:
+            enc_state = await executor.encrypt_frac(float(self.state_digest()))
+            return {'encrypted_state': enc_state, 'timestamp': time.time()}
+        except Exception as e:
+            logging.error(f"Encryption failed for Node {self.node_id}: {e}")
+            return {'encrypted_state': None, 'timestamp': time.time()}
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Copy of the state fields covered by consensus proofs."""
+        return {
             'node_id': self.node_id,
             'recursion_depth': self.recursion_depth,
             'ethical_weights': self.ethical_weights.copy(),
             'state': self.state.name
         }
-        challenge, nonce = self.zkp_verifier.generate_challenge(state)
+
+    def get_verifiable_state(self) -> Dict[str, Any]:
+        """
+        Get a verifiable snapshot of the node's state for consensus.
+        Returns a dictionary containing state data and ZKP elements.
+        """
+        state = self.snapshot_state()
+        nonce = secrets.token_hex(16)
+        # The challenge and proof are the same commitment, so hash the state once
         proof = self.zkp_verifier.create_proof(state, nonce)
-        
+
         return {
             'state': state,
             'proof': proof,
-            'challenge': challenge
+            'challenge': proof,
+            'nonce': nonce
         }
 
+    async def connect(self, broker: MessageBroker) -> None:
+        """Subscribe to the topics this node handles and attach the queue."""
+        self.message_queue = await broker.subscribe(self.node_id, topics=self.MESSAGE_TOPICS)
+
     async def process_messages(self):
-        """Process incoming messages from other nodes."""
+        """
+        Process incoming messages from other nodes.
+        Blocks until a queue is attached and messages arrive, then drains up to
+        MESSAGE_BATCH_SIZE waiting messages per wakeup.
+        """
+        while self.message_queue is None:
+            if self._queue_attached is None:
+                self._queue_attached = asyncio.Event()
+            await self._queue_attached.wait()
+        queue = self.message_queue
         while True:
-            if self.message_queue:
-                message = await self.message_queue.get()
-                await self._handle_message(message)
-            await asyncio.sleep(0.1)
+            batch = [await queue.get()]
+            while len(batch) < MESSAGE_BATCH_SIZE:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            await self._handle_messages(batch)
 
-    async def _handle_message(self, message: str):
-        """Handle an incoming message."""
+    async def _handle_messages(self, batch: List[Any]):
+        """Handle a batch of messages drained from the queue in one pass."""
+        for message in batch:
+            await self._handle_message(message)
+
+    async def _handle_message(self, message: Any):
+        """Handle an incoming broker Message, binary wire frame or JSON-encoded message."""
         try:
-            data = json.loads(message)
-            if data['topic'] == 'consensus':
+            if isinstance(message, (bytes, bytearray, memoryview)) and is_frame(message):
+                message = Message.from_buffer(message)
+            if isinstance(message, (str, bytes, bytearray)):
+                data = json.loads(message)
+                topic, payload = data['topic'], data['payload']
+            else:
+                topic, payload = message.message_type, message.payload
+            if topic == 'consensus':
                 logging.info(f"Node {self.node_id} received consensus message")
                 # Handle consensus message
-            elif data['topic'] == 'influence':
+            elif topic == 'influence':
                 # Handle influence message
-                if 'influence' in data['payload']:
-                    self.apply_observer_influence(data['payload']['influence'])
+                if 'influence' in payload:
+                    self.apply_observer_influence(payload['influence'])
         except Exception as e:
             logging.error(f"Error processing message in Node {self.node_id}: {e}")
 
-    async def participate_in_consensus(self) -> Dict[str, Any]:
-        """Participate in network consensus."""
-        state = self.get_verifiable_state()
-        peer_states = await self._gather_peer_states()
-        
+    async def participate_in_consensus(self, mode: str = CONSENSUS_MODE) -> Dict[str, Any]:
+        """
+        Participate in network consensus.
+        Args:
+            mode: "all_to_all" requests every peer's state and completes once a
+                verified quorum has answered; "gossip" runs one push-sum round
+                with GOSSIP_FANOUT sampled peers; "hierarchical" aggregates
+                one proved digest per committee of peers, driven by the
+                lowest id node.
+        """
+        if mode == 'gossip':
+            return self._gossip_round()
+        if mode == 'hierarchical':
+            return await self._hierarchical_round()
+        if mode != 'all_to_all':
+            raise ValueError(f"Unknown consensus mode {mode!r}")
+        result = await QuorumRound(self.zkp_verifier).collect(self.peers)
+        self._record_round(result)
+
         # Byzantine fault tolerance check
-        valid_states = self._validate_peer_states(peer_states)
-        if len(valid_states) >= (2 * len(self.peers) // 3):
-            consensus_state = self._compute_consensus(valid_states)
+        if result.reached and result.states:
+            consensus_state = self._compute_consensus(result.states)
             self._update_local_state(consensus_state)
             return consensus_state
         return None
 
+    async def fetch_verifiable_state(self) -> Dict[str, Any]:
+        """Answer a peer's consensus request."""
+        return self.get_verifiable_state()
+
+    def _record_round(self, result: RoundResult) -> None:
+        """
+        Fold response latencies into peer_latency and score peers: verified
+        responses count as successes, invalid responses and timeouts as
+        failures. Peers cancelled after the quorum was reached are not scored.
+        """
+        for peer_id, latency in result.latencies.items():
+            previous = self.peer_latency.get(peer_id, latency)
+            self.peer_latency[peer_id] = previous + PEER_LATENCY_ALPHA * (latency - previous)
+        verified = result.verified
+        failed = result.invalid + result.timed_out
+        if verified or failed:
+            self.trust_store.update_batch(
+                [self.node_id] * (len(verified) + len(failed)),
+                verified + failed,
+                [True] * len(verified) + [False] * len(failed)
+            )
+
+    async def committee_digest(self, committee_id: int, members: List['OuroborosNode'],
+                               method: str = CONSENSUS_AGGREGATOR) -> Optional[CommitteeDigest]:
+        """
+        Lead one committee's local round: collect a verified quorum of the
+        other members' states, aggregate them with this node's own state and
+        seal the result for the level above. Returns None without a quorum.
+        """
+        result = await QuorumRound(self.zkp_verifier).collect([member for member in members if member is not self])
+        self._record_round(result)
+        if not result.reached:
+            return None
+        states = result.states + [self.get_verifiable_state()]
+        weights = self._compute_trust_weights(states)
+        consensus = aggregate(states_to_matrix(states), weights, method)
+        return seal_digest(committee_id, len(states), weights.sum(), consensus, self.zkp_verifier)
+
+    async def _hierarchical_round(self, committee_size: int = COMMITTEE_SIZE,
+                                  partition: str = COMMITTEE_PARTITION,
+                                  method: str = CONSENSUS_AGGREGATOR) -> Optional[Dict[str, Any]]:
+        """
+        One hierarchical round, driven by the lowest id node of the network.
+        Nodes are partitioned into committees, and each committee's lowest id
+        member leads its local round, so a node only ever answers its own
+        committee. Leaders then verify, aggregate and seal the upper levels
+        and the result is passed back down to every member. Any other node
+        returns the consensus it was last given, or None.
+        """
+        if any(peer.node_id < self.node_id for peer in self.peers):
+            return self.consensus_state or None
+        members = [self] + list(self.peers)
+        domains = [member.domain for member in members] if partition == 'domain' else None
+        committees = assign_committees([member.node_id for member in members], committee_size, domains)
+        groups: Dict[int, List[OuroborosNode]] = {}
+        for member, committee in zip(members, committees.tolist()):
+            groups.setdefault(committee, []).append(member)
+        leaders = {committee: min(group, key=lambda member: member.node_id) for committee, group in groups.items()}
+        digests = await asyncio.gather(*(
+            leaders[committee].committee_digest(committee, group, method) for committee, group in groups.items()
+        ))
+        sealed = [(digest, leaders[committee]) for digest, committee in zip(digests, groups) if digest is not None]
+        if len(sealed) < len(digests):
+            logging.warning(f"Node {self.node_id}: {len(digests) - len(sealed)} of {len(digests)} committees "
+                            f"reached no quorum")
+        if not sealed:
+            return None
+        result = combine_digests([digest for digest, _ in sealed], committee_size, method, self.zkp_verifier,
+                                 [leader.zkp_verifier for _, leader in sealed])
+        if result['rejected']:
+            logging.warning(f"Node {self.node_id}: committee digests {result['rejected']} did not verify")
+        consensus_state = result['consensus']
+        if consensus_state is None:
+            return None
+        # Leaders pass the result down to their committee members
+        for group in groups.values():
+            for member in group:
+                member._update_local_state(consensus_state)
+        return consensus_state
+
+    def _update_local_state(self, consensus_state: Dict[str, Any]) -> None:
+        self.consensus_state = consensus_state
+
+    def reset_gossip(self, epoch: int = 0) -> None:
+        """
+        Start gossip epoch `epoch` from this node's current state, weighted by
+        the mean trust its peers place in it.
+        """
+        weights = self.population.weights[self.row]
+        values = np.append(weights, self.recursion_depth)
+        trust = float(self.trust_store.inbound([peer.node_id for peer in self.peers], [self.node_id])[0])
+        self._gossip = GossipDigest(values * trust, trust, epoch)
+        self._gossip_rounds = 0
+
+    def receive_gossip(self, digest: GossipDigest) -> None:
+        """
+        Merge a digest share pushed by a peer. A share from a newer epoch
+        moves this node to that epoch first; shares from older epochs are
+        dropped.
+        """
+        if self._gossip is None or digest.epoch > self._gossip.epoch:
+            self.reset_gossip(digest.epoch)
+        elif digest.epoch < self._gossip.epoch:
+            return
+        self._gossip = self._gossip.merge(digest)
+
+    def _gossip_round(self, rng: random.Random = random) -> Dict[str, Any]:
+        """
+        Keep one share of the digest and push one share to each of up to
+        GOSSIP_FANOUT peers. Every GOSSIP_EPOCH_ROUNDS rounds the node starts
+        a new epoch, so later changes to weights, depth and trust reach the
+        estimate. The estimate of a new epoch replaces consensus_state once
+        it has mixed for half an epoch.
+        """
+        if self._gossip is None:
+            self.reset_gossip()
+        elif self._gossip_rounds >= GOSSIP_EPOCH_ROUNDS:
+            self.reset_gossip(self._gossip.epoch + 1)
+        targets = rng.sample(self.peers, min(GOSSIP_FANOUT, len(self.peers)))
+        share = self._gossip.split(len(targets) + 1)
+        self._gossip = share
+        for peer in targets:
+            peer.receive_gossip(share)
+        self._gossip_rounds += 1
+        if not self.consensus_state or self._gossip_rounds >= GOSSIP_EPOCH_ROUNDS // 2:
+            self._update_local_state(matrix_to_consensus(self._gossip.estimate))
+        return self.consensus_state
+
     def _validate_peer_states(self, peer_states: List[Dict]) -> List[Dict]:
         """Validate peer states using ZKP verification."""
         valid_states = []
@@ -135,46 +391,38 @@ class OuroborosNode:
             if self.zkp_verifier.verify_proof(
                 state['state'],
                 state['proof'],
-                state['challenge']
+                state['nonce']
             ):
                 valid_states.append(state)
         return valid_states
 
-    def _compute_consensus(self, valid_states: List[Dict]) -> Dict:
+    def _compute_consensus(self, valid_states: List[Dict], method: str = CONSENSUS_AGGREGATOR) -> Dict:
         """Compute consensus state using weighted trust scores."""
-        consensus = {}
+        values = states_to_matrix(valid_states)
         weights = self._compute_trust_weights(valid_states)
-        
-        for key in ['ethical_weights', 'recursion_depth']:
-            values = [s['state'][key] for s in valid_states]
-            if isinstance(values[0], dict):
-                consensus[key] = {
-                    k: np.average([v[k] for v in values], weights=weights)
-                    for k in values[0].keys()
-                }
-            else:
-                consensus[key] = np.average(values, weights=weights)
-        
-        return consensus
+        return matrix_to_consensus(aggregate(values, weights, method))
 
-    def _compute_trust_weights(self, states: List[Dict]) -> List[float]:
+    def _compute_trust_weights(self, states: List[Dict]) -> np.ndarray:
         """Compute trust weights based on historical interactions."""
-        weights = []
-        for state in states:
-            node_id = state['state']['node_id']
-            weight = self.trust_graph.nodes.get(node_id, {}).get('trust_score', 1.0)
-            weights.append(weight)
-        return weights if weights else [1.0] * len(states)
+        peer_ids = np.fromiter((state['state']['node_id'] for state in states), dtype=np.int64, count=len(states))
+        return self.trust_store.scores(self.node_id, peer_ids)
+
+    @property
+    def trust_store(self) -> TrustStore:
+        """Sparse trust matrix shared with the other nodes of this population."""
+        return self.population.trust
+
+    @property
+    def trust_graph(self) -> nx.DiGraph:
+        """Snapshot of this node's trust row as a graph of peers with trust_score attributes."""
+        graph = nx.DiGraph()
+        peers, scores = self.trust_store.row(self.node_id)
+        graph.add_nodes_from((peer, {'trust_score': score}) for peer, score in zip(peers.tolist(), scores.tolist()))
+        return graph
 
     def update_trust_score(self, node_id: int, interaction_success: bool):
         """Update trust scores based on interaction outcomes."""
-        if not self.trust_graph.has_node(node_id):
-            self.trust_graph.add_node(node_id, trust_score=1.0)
-        
-        current_score = self.trust_graph.nodes[node_id]['trust_score']
-        delta = 0.1 if interaction_success else -0.2
-        new_score = max(0.1, min(1.0, current_score + delta))
-        self.trust_graph.nodes[node_id]['trust_score'] = new_score
+        self.trust_store.update(self.node_id, node_id, interaction_success)
 
     async def run(self) -> None:
         """Enhanced run loop with consensus participation."""
@@ -183,9 +431,7 @@ class OuroborosNode:
         
         try:
             while self.recursion_depth < RECURSION_LIMIT:
-                if self.state == MindState.ACTIVE_RECURSION:
-                    self.generate_insight()
-                    await self._check_ethical_bounds()
+                self.tick()
                 await asyncio.sleep(random.uniform(0.2, 0.5))
         finally:
             message_task.cancel()
@@ -197,12 +443,34 @@ class OuroborosNode:
             await self.participate_in_consensus()
             await asyncio.sleep(CONSENSUS_INTERVAL)
 
-    async def _check_ethical_bounds(self):
-        """Check if ethical weights are within acceptable bounds."""
-        total_deviation = sum(abs(w - 1/3) for w in self.ethical_weights.values())
-        if total_deviation > 0.5:  # Threshold for ethical crisis
+    def tick(self) -> Optional[str]:
+        """
+        One step of recursive reflection: generate an insight and check the
+        ethical bounds, if the node is actively recursing.
+        Returns:
+            The generated insight, or None if the node is not active.
+        """
+        if self.state != MindState.ACTIVE_RECURSION:
+            return None
+        insight = self.generate_insight()
+        self.check_ethical_bounds()
+        return insight
+
+    def check_ethical_bounds(self) -> bool:
+        """
+        Enter ETHICAL_CRISIS if the ethical weights drift too far from
+        equilibrium; returns True if so, like CompactNode.check_ethical_bounds.
+        """
+        total_deviation = float(np.abs(self.population.weights[self.row] - 1/3).sum())
+        if total_deviation > ETHICAL_BOUNDS["max_deviation"]:  # Threshold for ethical crisis
             self.state = MindState.ETHICAL_CRISIS
             logging.warning(f"Node {self.node_id} entered ethical crisis state")
+            return True
+        return False
+
+    async def _check_ethical_bounds(self):
+        """Check if ethical weights are within acceptable bounds."""
+        self.check_ethical_bounds()
 
     def apply_observer_influence(self, influence: Dict[str, float]) -> None:
         """
@@ -210,8 +478,8 @@ class OuroborosNode:
         Args:
             influence: A dictionary with keys corresponding to ethical frameworks and values representing perturbation factors.
         """
-        for key in self.ethical_weights:
-            self.ethical_weights[key] *= (1 + influence.get(key, 0))
-        total = sum(self.ethical_weights.values())
-        self.ethical_weights = {k: v / total for k, v in self.ethical_weights.items()}
+        weights = self.population.weights[self.row]
+        for i, key in enumerate(ETHICAL_FRAMEWORKS):
+            weights[i] *= (1 + influence.get(key, 0))
+        weights /= weights.sum()
         logging.info(f"Node {self.node_id} updated ethical weights: {self.ethical_weights}")
@@ -0,0 +1,230 @@
+import functools
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import ETHICAL_BOUNDS, RECURSION_LIMIT
+from mind_state import MindState
+from rolling_digest import RollingDigest
+from trust_store import TrustStore
+
+# Column order of the weight matrix
+ETHICAL_FRAMEWORKS = ('utilitarian', 'deontological', 'virtue')
+
+# Insights kept in a node's conceptual memory
+MEMORY_WINDOW = 64
+
+def conceptual_memory(domain: str, depth: int) -> List[str]:
+    """
+    The conceptual memory of a node after `depth` insights. Insights only
+    depend on the domain and the depth they were generated at, so this is
+    what OuroborosNode.tick would have accumulated.
+    """
+    return [f"{domain}_insight_{i}" for i in range(max(0, depth - MEMORY_WINDOW), depth)]
+
+@functools.lru_cache(maxsize=4096)
+def memory_digest(domain: str, depth: int) -> int:
+    """OuroborosNode.state_digest of a node after `depth` insights."""
+    return RollingDigest.of(conceptual_memory(domain, depth), MEMORY_WINDOW).value % 100000
+
+class NodePopulation:
+    """
+    Struct-of-arrays store for the state of many nodes.
+
+    Ethical weights live in an N x 3 float matrix, recursion depth, karma and
+    MindState in flat arrays, so observer influence, normalization, crisis
+    detection and insight ticks run as single array operations over the whole
+    population instead of one dict comprehension per node. Peer trust between
+    the nodes is kept in one shared sparse TrustStore.
+    """
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, capacity)
+        self.size = 0
+        self._node_ids = np.zeros(capacity, dtype=np.int64)
+        self._weights = np.zeros((capacity, len(ETHICAL_FRAMEWORKS)), dtype=np.float64)
+        self._depth = np.zeros(capacity, dtype=np.int64)
+        self._karma = np.ones(capacity, dtype=np.float64)
+        self._state = np.full(capacity, MindState.ACTIVE_RECURSION.value, dtype=np.int8)
+        self.domains: List[str] = []
+        # Per-row index into _domain_names, so batched digests need no string work
+        self._domain_codes = np.zeros(capacity, dtype=np.int32)
+        self._domain_names: Dict[str, int] = {}
+        self.trust = TrustStore()
+
+    @classmethod
+    def from_arrays(cls, node_ids: np.ndarray, weights: np.ndarray, recursion_depth: np.ndarray,
+                    recursive_karma: np.ndarray, state: np.ndarray, domains: List[str]) -> 'NodePopulation':
+        """
+        Wrap existing arrays, e.g. copy-on-write memory maps from a checkpoint,
+        without copying them. The population reallocates only if it grows.
+        """
+        population = cls.__new__(cls)
+        population.size = len(node_ids)
+        population._node_ids = node_ids
+        population._weights = weights
+        population._depth = recursion_depth
+        population._karma = recursive_karma
+        population._state = state
+        population.domains = list(domains)
+        population._domain_names = {}
+        population._domain_codes = population._encode_domains(population.domains)
+        population.trust = TrustStore()
+        return population
+
+    # Views over the occupied rows
+    @property
+    def node_ids(self) -> np.ndarray:
+        return self._node_ids[:self.size]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights[:self.size]
+
+    @property
+    def recursion_depth(self) -> np.ndarray:
+        return self._depth[:self.size]
+
+    @property
+    def recursive_karma(self) -> np.ndarray:
+        return self._karma[:self.size]
+
+    @property
+    def state(self) -> np.ndarray:
+        return self._state[:self.size]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the backing arrays to hold at least `capacity` rows."""
+        if capacity <= len(self._depth):
+            return
+        new_capacity = max(capacity, 2 * len(self._depth))
+        for name in ('_node_ids', '_weights', '_depth', '_karma', '_state', '_domain_codes'):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add_node(self, node_id: int, domain: str) -> int:
+        """Append a node with default state and return its row index."""
+        return int(self.add_nodes([node_id], [domain])[0])
+
+    def add_nodes(self, node_ids: Iterable[int], domains: Iterable[str]) -> np.ndarray:
+        """Append many nodes at once and return their row indices."""
+        node_ids = np.asarray(list(node_ids), dtype=np.int64)
+        domains = list(domains)
+        if len(domains) != len(node_ids):
+            raise ValueError("node_ids and domains must have the same length")
+        start, end = self.size, self.size + len(node_ids)
+        self._reserve(end)
+        self._node_ids[start:end] = node_ids
+        self._weights[start:end] = 0.33
+        self._depth[start:end] = 0
+        self._karma[start:end] = 1.0
+        self._state[start:end] = MindState.ACTIVE_RECURSION.value
+        self._domain_codes[start:end] = self._encode_domains(domains)
+        self.domains.extend(domains)
+        self.size = end
+        return np.arange(start, end)
+
+    def _encode_domains(self, domains: List[str]) -> np.ndarray:
+        names = self._domain_names
+        return np.array([names.setdefault(domain, len(names)) for domain in domains], dtype=np.int32)
+
+    def get_weights(self, row: int) -> Dict[str, float]:
+        """Return the ethical weights of a row as a dict."""
+        return dict(zip(ETHICAL_FRAMEWORKS, self._weights[row].tolist()))
+
+    def set_weights(self, row: int, weights: Dict[str, float]) -> None:
+        """Overwrite the ethical weights of a row from a dict."""
+        self._weights[row] = [weights[k] for k in ETHICAL_FRAMEWORKS]
+
+    def get_state(self, row: int) -> MindState:
+        return MindState(int(self._state[row]))
+
+    def set_state(self, row: int, state: MindState) -> None:
+        self._state[row] = state.value
+
+    def _rows(self, rows: Optional[Iterable[int]]):
+        return slice(0, self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def normalize(self, rows: Optional[Iterable[int]] = None) -> None:
+        """Rescale the selected rows so each sums to 1."""
+        idx = self._rows(rows)
+        weights = self._weights[idx]
+        self._weights[idx] = weights / weights.sum(axis=1, keepdims=True)
+
+    def apply_observer_influence(self, influence: Dict[str, float],
+                                 rows: Optional[Iterable[int]] = None) -> None:
+        """
+        Batched equivalent of OuroborosNode.apply_observer_influence.
+        Args:
+            influence: Perturbation factors keyed by ethical framework.
+            rows: Rows to influence; defaults to the whole population.
+        """
+        factors = 1 + np.array([influence.get(k, 0) for k in ETHICAL_FRAMEWORKS])
+        idx = self._rows(rows)
+        self._weights[idx] *= factors
+        self.normalize(rows)
+        count = self.size if rows is None else len(idx)
+        logging.info(f"Observer influence applied to {count} nodes")
+
+    def check_ethical_bounds(self, max_deviation: float = ETHICAL_BOUNDS["max_deviation"]) -> np.ndarray:
+        """
+        Move every node whose weights deviate too far from equilibrium into
+        ETHICAL_CRISIS.
+        Returns:
+            Row indices of the nodes that newly entered the crisis state.
+        """
+        deviation = np.abs(self.weights - 1 / 3).sum(axis=1)
+        crisis = (deviation > max_deviation) & (self.state != MindState.ETHICAL_CRISIS.value)
+        rows = np.flatnonzero(crisis)
+        self._state[rows] = MindState.ETHICAL_CRISIS.value
+        if len(rows):
+            logging.warning(f"{len(rows)} nodes entered ethical crisis state")
+        return rows
+
+    def conceptual_memory(self, row: int) -> List[str]:
+        return conceptual_memory(self.domains[row], int(self._depth[row]))
+
+    def state_digests(self, rows: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Batched OuroborosNode.state_digest. Nodes at the same depth in the
+        same domain share a digest, so each distinct pair is hashed once.
+        """
+        idx = self._rows(rows)
+        depth = self._depth[idx]
+        if not len(depth):
+            return np.zeros(0, dtype=np.int64)
+        names = list(self._domain_names)
+        low = int(depth.min())
+        span = int(depth.max()) - low + 1
+        pairs, inverse = np.unique(self._domain_codes[idx].astype(np.int64) * span + (depth - low),
+                                   return_inverse=True)
+        digests = np.array([memory_digest(names[pair // span], low + pair % span) for pair in pairs.tolist()],
+                           dtype=np.int64)
+        return digests[inverse.ravel()]
+
+    def tick_insights(self, recursion_limit: int = RECURSION_LIMIT) -> np.ndarray:
+        """
+        Advance recursion depth for every actively recursing node below the limit.
+        Insights are not stored: a node's insights are determined by its
+        domain and depth, so conceptual_memory and state_digests derive the
+        memory and digest OuroborosNode.tick would have built. That only holds
+        for rows whose memory is derived here; OuroborosNode keeps its own
+        memory and must tick individually.
+        Returns:
+            Row indices of the nodes that generated an insight.
+        """
+        active = (self.state == MindState.ACTIVE_RECURSION.value) & (self.recursion_depth < recursion_limit)
+        rows = np.flatnonzero(active)
+        self._depth[rows] += 1
+        return rows
+
+    def tick(self, recursion_limit: int = RECURSION_LIMIT) -> np.ndarray:
+        """Run one insight tick followed by an ethical bounds check."""
+        rows = self.tick_insights(recursion_limit)
+        self.check_ethical_bounds()
+        return rows
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from config import CONSENSUS_ROUND_TIMEOUT, QUORUM_FRACTION
+from zkp import ZKPVerifier
+
+def quorum_size(peer_count: int, fraction: float = QUORUM_FRACTION) -> int:
+    """Verified responses needed out of `peer_count` peers."""
+    return math.ceil(peer_count * fraction)
+
+@dataclass
+class RoundResult:
+    """Outcome of one quorum round."""
+    reached: bool
+    quorum: int
+    states: List[Dict[str, Any]] = field(default_factory=list)
+    verified: List[int] = field(default_factory=list)
+    # Seconds from round start to each peer's response, by node id
+    latencies: Dict[int, float] = field(default_factory=dict)
+    invalid: List[int] = field(default_factory=list)
+    timed_out: List[int] = field(default_factory=list)
+    cancelled: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+class QuorumRound:
+    """
+    Collects verifiable states from peers concurrently and completes as soon
+    as a quorum of them has verified, or at the deadline.
+
+    Every peer is asked at once. Responses are verified as they arrive; once
+    `quorum_size` have verified the remaining requests are cancelled, so the
+    round takes as long as the quorum-th fastest peer rather than the slowest.
+    Peers still outstanding at the deadline are reported as timed out. A
+    response only counts if its proof verifies and it carries the responding
+    peer's own node id.
+    """
+    def __init__(self, verifier: Optional[ZKPVerifier] = None, fraction: float = QUORUM_FRACTION,
+                 timeout: float = CONSENSUS_ROUND_TIMEOUT):
+        self.verifier = verifier or ZKPVerifier()
+        self.fraction = fraction
+        self.timeout = timeout
+
+    @staticmethod
+    async def _fetch_default(peer) -> Dict[str, Any]:
+        return await peer.fetch_verifiable_state()
+
+    def _verify(self, peer, response: Dict[str, Any]) -> bool:
+        try:
+            return (response['state']['node_id'] == peer.node_id and
+                    self.verifier.verify_proof(response['state'], response['proof'], response['nonce']))
+        except Exception as e:
+            logging.error(f"Malformed consensus response: {e}")
+            return False
+
+    async def collect(self, peers: Sequence[Any],
+                      fetch: Optional[Callable[[Any], Awaitable[Dict[str, Any]]]] = None) -> RoundResult:
+        """
+        Run one round over `peers` (objects with a node_id).
+        Args:
+            fetch: Coroutine function returning a peer's verifiable state;
+                defaults to peer.fetch_verifiable_state().
+        """
+        fetch = fetch or self._fetch_default
+        result = RoundResult(reached=False, quorum=quorum_size(len(peers), self.fraction))
+        start = time.perf_counter()
+        if not peers:
+            result.reached = result.quorum == 0
+            return result
+
+        pending = {asyncio.ensure_future(fetch(peer)): peer for peer in peers}
+        deadline = start + self.timeout
+        expired = False
+        try:
+            # Stop early once the quorum is reached or can no longer be reached
+            while pending and len(result.states) < result.quorum <= len(result.states) + len(pending):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    expired = True
+                    break
+                done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                now = time.perf_counter()
+                for task in done:
+                    peer = pending.pop(task)
+                    result.latencies[peer.node_id] = now - start
+                    if not task.cancelled() and task.exception() is None and self._verify(peer, task.result()):
+                        result.states.append(task.result())
+                        result.verified.append(peer.node_id)
+                    else:
+                        result.invalid.append(peer.node_id)
+        finally:
+            for task, peer in pending.items():
+                task.cancel()
+                (result.timed_out if expired else result.cancelled).append(peer.node_id)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        result.reached = len(result.states) >= result.quorum
+        result.elapsed = time.perf_counter() - start
+        if not result.reached:
+            logging.warning(f"Consensus quorum not reached: {len(result.states)}/{result.quorum} verified, "
+                            f"{len(result.timed_out)} peers timed out")
+        return result
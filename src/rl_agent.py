@@ -1,17 +1,19 @@
 import random
 import logging
 import numpy as np
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 class RLAgent:
-    def __init__(self, learning_rate: float = 0.1, discount_factor: float = 0.95, epsilon: float = 0.1):
+    def __init__(self, learning_rate: float = 0.1, discount_factor: float = 0.95, epsilon: float = 0.1,
+                 rng: Optional[random.Random] = None):
         self.q_table: Dict[str, Dict[str, float]] = {}
         self.lr = learning_rate
         self.gamma = discount_factor
         self.epsilon = epsilon
         self.ethical_domains = ['utilitarian', 'deontological', 'virtue']
+        self.rng = rng or random.Random()
         
     def get_state_key(self, ethical_weights: Dict[str, float]) -> str:
         """Convert ethical weights to discrete state key"""
@@ -27,11 +29,22 @@ class RLAgent:
         if state_key not in self.q_table:
             self.q_table[state_key] = {str(action): 0.0 for action in self.get_actions()}
 
-        if random.random() < self.epsilon:
-            return random.choice(self.get_actions())
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(self.get_actions())
         
         return eval(max(self.q_table[state_key].items(), key=lambda x: x[1])[0])
 
+    def get_observer_influence(self) -> Dict[str, float]:
+        """Small random perturbation factors for the observer module"""
+        return {domain: self.rng.uniform(-0.05, 0.05) for domain in self.ethical_domains}
+
+    def get_adversary_perturbation(self, ethical_weights: Dict[str, float]) -> Dict[str, float]:
+        """Perturbation multipliers for the adversary, amplifying the domain chosen by the policy"""
+        domain, adjustment = self.choose_action(self.get_state_key(ethical_weights))
+        perturbation = {d: 1.0 for d in self.ethical_domains}
+        perturbation[domain] = 1.0 + 5 * adjustment
+        return perturbation
+
     def update(self, state: str, action: Tuple[str, float], reward: float, next_state: str):
         """Update Q-values using Q-learning"""
         if next_state not in self.q_table:
@@ -0,0 +1,60 @@
+import hashlib
+from collections import deque
+from typing import Iterable, Tuple
+
+class RollingDigest:
+    """
+    Incrementally maintained polynomial hash over a sliding window of strings.
+
+    Each item is reduced to a 64-bit SHA-256 prefix and the window digest is
+    sum(h_i * BASE^(n-1-i)) mod a Mersenne prime, so appending an item and
+    evicting the oldest one are both O(1). Unlike hash(), the result is stable
+    across processes, restarts and machines.
+    """
+    MODULUS = (1 << 61) - 1
+    BASE = 0x100000001B3
+
+    def __init__(self, window: int = 64):
+        if window <= 0:
+            raise ValueError("Window must be positive")
+        self.window = window
+        self.value = 0
+        self._hashes = deque()
+        self._oldest_weight = pow(self.BASE, window - 1, self.MODULUS)
+
+    @classmethod
+    def of(cls, items: Iterable[str], window: int = 64) -> 'RollingDigest':
+        """Build a digest from scratch over `items`."""
+        digest = cls(window)
+        for item in items:
+            digest.append(item)
+        return digest
+
+    @classmethod
+    def from_hashes(cls, hashes: Iterable[int], value: int, window: int = 64) -> 'RollingDigest':
+        """Rebuild a digest from saved item hashes and value without rehashing items."""
+        digest = cls(window)
+        digest._hashes.extend(hashes)
+        digest.value = value
+        return digest
+
+    @property
+    def hashes(self) -> Tuple[int, ...]:
+        """Reduced hashes of the items currently in the window, oldest first."""
+        return tuple(self._hashes)
+
+    @staticmethod
+    def item_hash(item: str) -> int:
+        return int.from_bytes(hashlib.sha256(item.encode()).digest()[:8], 'big')
+
+    def append(self, item: str) -> None:
+        """Add an item, evicting the oldest one if the window is full."""
+        if len(self._hashes) == self.window:
+            oldest = self._hashes.popleft()
+            self.value = (self.value - oldest * self._oldest_weight) % self.MODULUS
+        h = self.item_hash(item) % self.MODULUS
+        self.value = (self.value * self.BASE + h) % self.MODULUS
+        self._hashes.append(h)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
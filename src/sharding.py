@@ -0,0 +1,263 @@
+import logging
+import multiprocessing as mp
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import ETHICAL_BOUNDS, RECURSION_LIMIT
+from population import ETHICAL_FRAMEWORKS, NodePopulation
+from rl_agent import RLAgent
+from zkp import ZKPVerifier
+
+# Inbound/outbound traffic between shards, keyed by kind:
+#   'influence': (sender ids, target ids, N x 3 perturbation factors)
+#   'trust':     (sender ids, judge ids, success flags) reporting how peers judged a sender's influence
+Traffic = Dict[str, Tuple[np.ndarray, ...]]
+
+def partition(node_count: int, shards: int) -> List[int]:
+    """Boundaries of contiguous node id ranges; shard i owns [b[i], b[i + 1])."""
+    return [node_count * i // shards for i in range(shards + 1)]
+
+def _empty_traffic() -> Traffic:
+    return {
+        'influence': (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, 3))),
+        'trust': (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool))
+    }
+
+def _concat_traffic(parts: List[Traffic]) -> Traffic:
+    merged = _empty_traffic()
+    for kind in merged:
+        pieces = [part[kind] for part in parts if len(part[kind][0])]
+        if pieces:
+            merged[kind] = tuple(np.concatenate(columns) for columns in zip(*pieces))
+    return merged
+
+class Shard:
+    """
+    One partition of the network, owning the nodes with ids in [start, end).
+
+    Nodes are rows of a NodePopulation rather than OuroborosNode objects: a
+    tick is the batched equivalent of OuroborosNode.tick (an insight for every
+    actively recursing node, then the ethical bounds check), and the state
+    digests of the resulting conceptual memories go into the shard summary.
+    Messaging, encryption and per-node consensus rounds are not simulated.
+    Shards emit peer influence, some of it addressed to nodes in other shards.
+    A node's verdicts on the influence it received are recorded in the
+    sender's shard TrustStore as (judge, sender) edges, and a node's karma is
+    the mean trust of the peers that have judged it.
+    """
+    def __init__(self, shard_id: int, boundaries: List[int], domains: List[str],
+                 seed: Optional[int] = None, traffic_rate: float = 0.01,
+                 recursion_limit: int = RECURSION_LIMIT):
+        self.shard_id = shard_id
+        self.boundaries = boundaries
+        self.start, self.end = boundaries[shard_id], boundaries[shard_id + 1]
+        self.population = NodePopulation(capacity=self.end - self.start)
+        self.population.add_nodes(range(self.start, self.end), domains)
+        self.rng = np.random.default_rng(seed)
+        self.traffic_rate = traffic_rate
+        self.recursion_limit = recursion_limit
+        self.verifier = ZKPVerifier()
+
+    def _apply_influence(self, senders: np.ndarray, targets: np.ndarray, factors: np.ndarray) -> Traffic:
+        """Apply peer influence to local targets and report trust verdicts back to the senders."""
+        if not len(targets):
+            return _empty_traffic()
+        rows = targets - self.start
+        # multiply.at so a node influenced several times takes every factor
+        np.multiply.at(self.population.weights, rows, factors)
+        self.population.normalize(rows)
+        deviation = np.abs(self.population.weights[rows] - 1 / 3).sum(axis=1)
+        traffic = _empty_traffic()
+        traffic['trust'] = (senders, targets, deviation <= ETHICAL_BOUNDS["max_deviation"])
+        return traffic
+
+    def _apply_trust(self, senders: np.ndarray, judges: np.ndarray, success: np.ndarray) -> None:
+        """Record verdicts on local senders in the trust store and refresh the karma of judged nodes."""
+        if not len(senders):
+            return
+        trust = self.population.trust
+        trust.update_batch(judges, senders, success)
+        _, peers, scores = trust.edges()
+        rows = peers - self.start
+        raters = np.bincount(rows, minlength=len(self.population))
+        totals = np.bincount(rows, weights=scores, minlength=len(self.population))
+        judged = raters > 0
+        self.population.recursive_karma[judged] = totals[judged] / raters[judged]
+
+    def _emit_influence(self) -> Traffic:
+        count = self.rng.binomial(len(self.population), self.traffic_rate)
+        traffic = _empty_traffic()
+        traffic['influence'] = (
+            self.rng.integers(self.start, self.end, count),
+            self.rng.integers(0, self.boundaries[-1], count),
+            1 + self.rng.uniform(-0.05, 0.05, (count, 3))
+        )
+        return traffic
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate shard state for the consensus coordinator."""
+        return {
+            'shard_id': self.shard_id,
+            'count': len(self.population),
+            'weight_sum': self.population.weights.sum(axis=0).tolist(),
+            'depth_sum': int(self.population.recursion_depth.sum()),
+            'karma_sum': float(self.population.recursive_karma.sum()),
+            'digest_sum': int(self.population.state_digests().sum())
+        }
+
+    def step(self, ticks: int, influence: Optional[Dict[str, float]], inbound: Traffic) -> Dict[str, Any]:
+        """
+        Apply inbound traffic and observer influence, run `ticks` insight ticks
+        and return the outbound traffic with a proof-backed shard summary.
+        """
+        replies = self._apply_influence(*inbound['influence'])
+        self._apply_trust(*inbound['trust'])
+        if influence:
+            self.population.apply_observer_influence(influence)
+        node_ticks = 0
+        for _ in range(ticks):
+            node_ticks += len(self.population.tick(self.recursion_limit))
+
+        outbound = _concat_traffic([replies, self._emit_influence()])
+        summary = self.summary()
+        # The challenge is the proof of the summary under a fresh nonce
+        proof, nonce = self.verifier.generate_challenge(summary)
+        return {
+            'node_ticks': node_ticks,
+            'outbound': outbound,
+            'summary': summary,
+            'proof': proof,
+            'nonce': nonce
+        }
+
+def _shard_main(conn, shard_id: int, boundaries: List[int], domains: List[str],
+                seed: Optional[int], traffic_rate: float, recursion_limit: int) -> None:
+    """Worker process loop: serve step commands until told to stop."""
+    logging.disable(logging.WARNING)
+    shard = Shard(shard_id, boundaries, domains, seed, traffic_rate, recursion_limit)
+    while True:
+        command = conn.recv()
+        if command is None:
+            break
+        conn.send(shard.step(*command))
+    conn.close()
+
+class ShardedRunner:
+    """
+    Partitions the network across worker processes, one Shard per worker.
+
+    The coordinator runs in the parent process: each step it broadcasts the
+    observer influence, routes cross-shard traffic over the worker pipes,
+    verifies every shard's summary proof and merges the summaries into a
+    network-wide consensus state.
+    """
+    def __init__(self, node_count: int, workers: int, seed: Optional[int] = None,
+                 traffic_rate: float = 0.01, rl_agent: Optional[RLAgent] = None,
+                 recursion_limit: int = RECURSION_LIMIT):
+        self.node_count = node_count
+        self.workers = workers
+        self.boundaries = partition(node_count, workers)
+        self.seed = seed
+        self.traffic_rate = traffic_rate
+        self.recursion_limit = recursion_limit
+        self.rl_agent = rl_agent or RLAgent()
+        self.verifier = ZKPVerifier()
+        self.consensus_state: Dict[str, Any] = {}
+        self._pipes = []
+        self._processes = []
+        self._inbound: List[Traffic] = []
+
+    def start(self) -> None:
+        domains = ['deontological', 'utilitarian', 'virtue']
+        seeds = np.random.SeedSequence(self.seed).spawn(self.workers)
+        for shard_id in range(self.workers):
+            start, end = self.boundaries[shard_id], self.boundaries[shard_id + 1]
+            parent, child = mp.Pipe()
+            process = mp.Process(
+                target=_shard_main,
+                args=(child, shard_id, self.boundaries, [domains[i % 3] for i in range(start, end)],
+                      int(seeds[shard_id].generate_state(1)[0]), self.traffic_rate, self.recursion_limit),
+                daemon=True
+            )
+            process.start()
+            self._pipes.append(parent)
+            self._processes.append(process)
+        self._inbound = [_empty_traffic() for _ in range(self.workers)]
+        logging.info(f"Started {self.workers} shards for {self.node_count} nodes")
+
+    def stop(self) -> None:
+        for pipe in self._pipes:
+            pipe.send(None)
+        for process in self._processes:
+            process.join()
+        self._pipes, self._processes = [], []
+
+    def __enter__(self) -> 'ShardedRunner':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _route(self, outbound: List[Traffic]) -> List[Traffic]:
+        """Split every shard's outbound traffic by the shard owning each addressee."""
+        merged = _concat_traffic(outbound)
+        routed = [_empty_traffic() for _ in range(self.workers)]
+        for kind, columns in merged.items():
+            # Influence is addressed to its target, trust verdicts to the original sender
+            addressees = columns[1] if kind == 'influence' else columns[0]
+            owners = np.searchsorted(self.boundaries, addressees, side='right') - 1
+            for shard_id in range(self.workers):
+                mask = owners == shard_id
+                routed[shard_id][kind] = tuple(column[mask] for column in columns)
+        return routed
+
+    def step(self, ticks: int = 1, observe: bool = False) -> int:
+        """
+        Run one synchronized step across all shards.
+        Returns:
+            The number of node ticks performed.
+        """
+        influence = self.rl_agent.get_observer_influence() if observe else None
+        for pipe, inbound in zip(self._pipes, self._inbound):
+            pipe.send((ticks, influence, inbound))
+        results = [pipe.recv() for pipe in self._pipes]
+        self._inbound = self._route([result['outbound'] for result in results])
+        self._merge_consensus(results)
+        return sum(result['node_ticks'] for result in results)
+
+    def _merge_consensus(self, results: List[Dict[str, Any]]) -> None:
+        verified = [
+            result['summary'] for result in results
+            if self.verifier.verify_proof(result['summary'], result['proof'], result['nonce'])
+        ]
+        if len(verified) < len(results):
+            logging.warning(f"{len(results) - len(verified)} shard summaries failed verification")
+        count = sum(summary['count'] for summary in verified)
+        if not count:
+            return
+        weight_sum = np.sum([summary['weight_sum'] for summary in verified], axis=0)
+        self.consensus_state = {
+            'ethical_weights': dict(zip(ETHICAL_FRAMEWORKS, (weight_sum / count).tolist())),
+            'recursion_depth': sum(summary['depth_sum'] for summary in verified) / count,
+            'average_karma': sum(summary['karma_sum'] for summary in verified) / count,
+            'digest_sum': sum(summary['digest_sum'] for summary in verified),
+            'shards': len(verified)
+        }
+
+    def run(self, steps: int, ticks_per_step: int = 1, observer_every: int = 10) -> Dict[str, Any]:
+        """Run `steps` steps and report throughput in node ticks per second."""
+        start = time.perf_counter()
+        node_ticks = 0
+        for step in range(steps):
+            node_ticks += self.step(ticks_per_step, observe=(step % observer_every == 0))
+        wall = time.perf_counter() - start
+        return {
+            'workers': self.workers,
+            'node_ticks': node_ticks,
+            'wall_seconds': wall,
+            'node_ticks_per_second': node_ticks / wall if wall > 0 else float('inf'),
+            'consensus': self.consensus_state
+        }
@@ -0,0 +1,139 @@
+import argparse
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import ADVERSARY_INTERVAL, CONSENSUS_INTERVAL, NODE_COUNT, OBSERVER_INTERVAL, RECURSION_LIMIT
+from adversary import challenge_node
+from observer import inject_influence
+from consensus import ConsensusManager
+from messaging import MessageBroker
+from ouroboros_node import OuroborosNode
+from population import NodePopulation
+from rl_agent import RLAgent
+
+# Reflection interval bounds in seconds, matching OuroborosNode.run
+NODE_TICK_INTERVAL = (0.2, 0.5)
+
+class VirtualClock:
+    """Simulated time in seconds, advanced only by the event scheduler."""
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+class EventScheduler:
+    """Priority-queue scheduler that fires callbacks in virtual-time order."""
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.processed = 0
+        self._queue = []
+        self._sequence = itertools.count()  # FIFO tie-break for simultaneous events
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        heapq.heappush(self._queue, (self.clock.now + delay, next(self._sequence), callback))
+
+    def run_until(self, end_time: float) -> None:
+        """Fire every event due at or before end_time, then move the clock there."""
+        while self._queue and self._queue[0][0] <= end_time:
+            when, _, callback = heapq.heappop(self._queue)
+            self.clock.now = when
+            callback()
+            self.processed += 1
+        self.clock.now = max(self.clock.now, end_time)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+class DiscreteEventSimulation:
+    """
+    Runs the node, adversary, observer and consensus logic of main.py against a
+    virtual clock, so simulated time advances as fast as the CPU allows.
+
+    Every random choice is drawn from generators seeded by `seed`, so runs with
+    the same seed and nodes are reproducible.
+    """
+    def __init__(self, nodes: List[OuroborosNode], rl_agent: Optional[RLAgent] = None,
+                 consensus_manager: Optional[ConsensusManager] = None, seed: Optional[int] = None):
+        self.nodes = nodes
+        self.rng = random.Random(seed)
+        self.rl_agent = rl_agent or RLAgent(rng=random.Random(self.rng.getrandbits(64)))
+        self.consensus_manager = consensus_manager or ConsensusManager(MessageBroker())
+        self.clock = VirtualClock()
+        self.scheduler = EventScheduler(self.clock)
+        self.consensus_rounds = 0
+
+        for node in nodes:
+            self._schedule_node_tick(node)
+            self._schedule_adversary(node)
+        self.scheduler.schedule(OBSERVER_INTERVAL, self._observer_event)
+        self.scheduler.schedule(CONSENSUS_INTERVAL, self._consensus_event)
+
+    def _schedule_node_tick(self, node: OuroborosNode) -> None:
+        def event():
+            node.tick()
+            if node.recursion_depth < RECURSION_LIMIT:
+                self._schedule_node_tick(node)
+        self.scheduler.schedule(self.rng.uniform(*NODE_TICK_INTERVAL), event)
+
+    def _schedule_adversary(self, node: OuroborosNode) -> None:
+        def event():
+            challenge_node(node, self.rl_agent, self.rng)
+            self._schedule_adversary(node)
+        self.scheduler.schedule(self.rng.uniform(*ADVERSARY_INTERVAL), event)
+
+    def _observer_event(self) -> None:
+        inject_influence(self.nodes, self.rl_agent)
+        self.scheduler.schedule(OBSERVER_INTERVAL, self._observer_event)
+
+    def _consensus_event(self) -> None:
+        self.consensus_manager.verify_round(self.nodes, self.clock.now)
+        self.consensus_rounds += 1
+        self.scheduler.schedule(CONSENSUS_INTERVAL, self._consensus_event)
+
+    def run(self, duration: float) -> Dict[str, Any]:
+        """
+        Advance the simulation by `duration` simulated seconds.
+        Returns:
+            Summary statistics for this run.
+        """
+        start_wall = time.perf_counter()
+        start_events = self.scheduler.processed
+        self.scheduler.run_until(self.clock.now + duration)
+        wall = time.perf_counter() - start_wall
+        return {
+            'simulated_seconds': duration,
+            'wall_seconds': wall,
+            'events': self.scheduler.processed - start_events,
+            'consensus_rounds': self.consensus_rounds,
+            'speedup': duration / wall if wall > 0 else float('inf')
+        }
+
+def build_network(node_count: int, seed: Optional[int] = None) -> List[OuroborosNode]:
+    """Create nodes with seeded domain choices, all sharing one population."""
+    rng = random.Random(seed)
+    domains = ['deontological', 'utilitarian', 'virtue']
+    population = NodePopulation(capacity=node_count)
+    return [OuroborosNode(i, rng.choice(domains), population) for i in range(node_count)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Discrete-event Ouroboros network simulation")
+    parser.add_argument('--nodes', type=int, default=NODE_COUNT)
+    parser.add_argument('--duration', type=float, default=3600.0, help="simulated seconds")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    simulation = DiscreteEventSimulation(build_network(args.nodes, args.seed), seed=args.seed)
+    stats = simulation.run(args.duration)
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
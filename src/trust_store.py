@@ -0,0 +1,260 @@
+import logging
+from array import array
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+
+from config import TRUST_DELTA_BUFFER, TRUST_PARAMS
+
+_COLUMN_BITS = 32
+
+def _add_clamped(values: np.ndarray, index: np.ndarray, deltas: np.ndarray,
+                minimum: float, maximum: float) -> None:
+    """
+    Add deltas[i] to values[index[i]] in order, clamping to [minimum, maximum]
+    after every step exactly like one update at a time. Entries that repeat
+    an index are applied in rounds: the k-th delta of every index together.
+    """
+    if not len(index):
+        return
+    order = np.argsort(index, kind='stable')
+    index = index[order]
+    deltas = deltas[order]
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(index)]))
+    rank = np.arange(len(index)) - starts[group]
+    by_rank = np.argsort(rank, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        selected = by_rank[start:end]
+        targets = index[selected]
+        values[targets] = np.clip(values[targets] + deltas[selected], minimum, maximum)
+
+class TrustStore:
+    """
+    Sparse trust matrix shared by many nodes: entry (owner, peer) is the trust
+    `owner` places in `peer`.
+
+    Scores live in CSR arrays (indptr, int32 peer indices, float64 scores)
+    with one row per owner id up to the largest one, so a node's trust row is
+    a pair of array slices. Memory grows with the number of edges plus 8
+    bytes per id below the largest owner id, so owner ids must be dense
+    (e.g. 0..N-1), not arbitrary 31-bit values. Updates are
+    appended to a compact delta buffer and merged into the CSR arrays in one
+    vectorized pass when the buffer fills or a read needs them. The merge
+    applies each edge's deltas in order, clamping after every step exactly
+    like the per-update rule, to [minimum_trust, initial_trust].
+    """
+    def __init__(self, initial_trust: float = TRUST_PARAMS["initial_trust"],
+                 minimum_trust: float = TRUST_PARAMS["minimum_trust"],
+                 buffer_size: int = TRUST_DELTA_BUFFER):
+        self.initial_trust = initial_trust
+        self.minimum_trust = minimum_trust
+        self.buffer_size = buffer_size
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._scores = np.zeros(0, dtype=np.float64)
+        self._pending_owners = array('q')
+        self._pending_peers = array('q')
+        self._pending_deltas = array('d')
+
+    @property
+    def rows(self) -> int:
+        return len(self._indptr) - 1
+
+    @property
+    def nnz(self) -> int:
+        self.flush()
+        return len(self._scores)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_deltas)
+
+    def nbytes(self) -> int:
+        """Bytes held by the CSR arrays and the delta buffer."""
+        buffers = (self._pending_owners, self._pending_peers, self._pending_deltas)
+        return (self._indptr.nbytes + self._indices.nbytes + self._scores.nbytes
+                + sum(buffer.itemsize * buffer.buffer_info()[1] for buffer in buffers))
+
+    @staticmethod
+    def _check_ids(ids: np.ndarray) -> None:
+        if len(ids) and (ids.min() < 0 or ids.max() >= 1 << (_COLUMN_BITS - 1)):
+            raise ValueError("Trust store ids must be in [0, 2**31)")
+
+    def update(self, owner: int, peer: int, interaction_success: bool) -> None:
+        """Record the outcome of one interaction of `owner` with `peer`."""
+        if not (0 <= owner < 1 << (_COLUMN_BITS - 1) and 0 <= peer < 1 << (_COLUMN_BITS - 1)):
+            raise ValueError("Trust store ids must be in [0, 2**31)")
+        self._pending_owners.append(owner)
+        self._pending_peers.append(peer)
+        self._pending_deltas.append(
+            TRUST_PARAMS["success_delta"] if interaction_success else TRUST_PARAMS["failure_delta"]
+        )
+        if len(self._pending_deltas) >= self.buffer_size:
+            self.flush()
+
+    def update_batch(self, owners: Iterable[int], peers: Iterable[int],
+                     interaction_success: Union[Iterable[bool], np.ndarray]) -> None:
+        """Record many interaction outcomes at once, in order."""
+        owners = np.asarray(owners, dtype=np.int64)
+        peers = np.asarray(peers, dtype=np.int64)
+        success = np.asarray(interaction_success, dtype=bool)
+        if not owners.shape == peers.shape == success.shape:
+            raise ValueError("owners, peers and interaction_success must have the same length")
+        self._check_ids(owners)
+        self._check_ids(peers)
+        deltas = np.where(success, TRUST_PARAMS["success_delta"], TRUST_PARAMS["failure_delta"])
+        self._pending_owners.frombytes(owners.tobytes())
+        self._pending_peers.frombytes(peers.tobytes())
+        self._pending_deltas.frombytes(deltas.astype(np.float64).tobytes())
+        if len(self._pending_deltas) >= self.buffer_size:
+            self.flush()
+
+    def _keys(self) -> np.ndarray:
+        """Sorted (owner << 32 | peer) keys of the stored entries."""
+        owners = np.repeat(np.arange(self.rows, dtype=np.int64), np.diff(self._indptr))
+        return (owners << _COLUMN_BITS) | self._indices
+
+    def _locate(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Stored keys, insertion positions of `keys` and whether each key is already stored."""
+        existing = self._keys()
+        positions = np.searchsorted(existing, keys)
+        found = positions < len(existing)
+        found[found] = existing[positions[found]] == keys[found]
+        return existing, positions, found
+
+    def _merge(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """Write `values` for sorted unique `keys`, inserting entries that do not exist yet."""
+        existing, positions, found = self._locate(keys)
+        scores = self._scores.copy()
+        scores[positions[found]] = values[found]
+        new = ~found
+        keys = np.insert(existing, positions[new], keys[new])
+        scores = np.insert(scores, positions[new], values[new])
+
+        owners = keys >> _COLUMN_BITS
+        rows = max(self.rows, int(owners[-1]) + 1 if len(owners) else 0)
+        self._indptr = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owners, minlength=rows), out=self._indptr[1:])
+        self._indices = (keys & ((1 << _COLUMN_BITS) - 1)).astype(np.int32)
+        self._scores = scores
+
+    def _stored(self, keys: np.ndarray) -> np.ndarray:
+        """Merged scores for `keys`, ignoring the delta buffer."""
+        result = np.full(len(keys), self.initial_trust, dtype=np.float64)
+        _, positions, found = self._locate(keys)
+        result[found] = self._scores[positions[found]]
+        return result
+
+    def _clamp(self, values: np.ndarray) -> np.ndarray:
+        return np.clip(values, self.minimum_trust, self.initial_trust)
+
+    def flush(self) -> None:
+        """Merge buffered deltas into the CSR arrays."""
+        if not self._pending_deltas:
+            return
+        owners = np.frombuffer(self._pending_owners, dtype=np.int64)
+        peers = np.frombuffer(self._pending_peers, dtype=np.int64)
+        keys = (owners << _COLUMN_BITS) | peers
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        deltas = np.frombuffer(self._pending_deltas, dtype=np.float64)[order]
+        self._pending_owners = array('q')
+        self._pending_peers = array('q')
+        self._pending_deltas = array('d')
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        unique_keys = keys[starts]
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(keys)]))
+
+        values = self._stored(unique_keys)
+        _add_clamped(values, group, deltas, self.minimum_trust, self.initial_trust)
+        self._merge(unique_keys, values)
+        logging.debug(f"Merged {len(keys)} trust updates into {len(unique_keys)} edges")
+
+    def set_scores(self, owners: Iterable[int], peers: Iterable[int], scores: Iterable[float]) -> None:
+        """Overwrite scores directly, e.g. when restoring a checkpoint. Later duplicates win."""
+        self.flush()
+        owners = np.asarray(owners, dtype=np.int64)
+        peers = np.asarray(peers, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float64)
+        self._check_ids(owners)
+        self._check_ids(peers)
+        keys = (owners << _COLUMN_BITS) | peers
+        # np.unique keeps the first occurrence, so search the reversed arrays
+        unique_keys, last = np.unique(keys[::-1], return_index=True)
+        self._merge(unique_keys, scores[::-1][last])
+
+    def get_many(self, owners: Iterable[int], peers: Iterable[int]) -> np.ndarray:
+        """Scores for (owner, peer) pairs; pairs without an entry get initial_trust."""
+        self.flush()
+        owners = np.asarray(owners, dtype=np.int64)
+        peers = np.asarray(peers, dtype=np.int64)
+        return self._stored((owners << _COLUMN_BITS) | peers)
+
+    def _pending_for(self, owner: int) -> np.ndarray:
+        if not self._pending_deltas:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(np.frombuffer(self._pending_owners, dtype=np.int64) == owner)
+
+    def row(self, owner: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Peer ids and scores of one owner's trust row, as views into the CSR
+        arrays (copy before holding on to them across updates). Only merges
+        the delta buffer if it holds updates for this owner.
+        """
+        if len(self._pending_for(owner)):
+            self.flush()
+        if owner < 0 or owner >= self.rows:
+            return self._indices[:0], self._scores[:0]
+        start, end = self._indptr[owner], self._indptr[owner + 1]
+        return self._indices[start:end], self._scores[start:end]
+
+    def scores(self, owner: int, peers: Iterable[int]) -> np.ndarray:
+        """
+        Trust `owner` places in each of `peers`, initial_trust where there is
+        no entry. Buffered updates for this owner are replayed on top of the
+        stored row instead of forcing a merge.
+        """
+        peers = np.asarray(peers, dtype=np.int64)
+        result = np.full(len(peers), self.initial_trust, dtype=np.float64)
+        if 0 <= owner < self.rows and len(peers):
+            start, end = self._indptr[owner], self._indptr[owner + 1]
+            indices = self._indices[start:end]
+            if len(indices):
+                positions = np.minimum(np.searchsorted(indices, peers), len(indices) - 1)
+                found = indices[positions] == peers
+                result[found] = self._scores[start:end][positions[found]]
+        for i in self._pending_for(owner).tolist():
+            matches = peers == self._pending_peers[i]
+            result[matches] = self._clamp(result[matches] + self._pending_deltas[i])
+        return result
+
+    def inbound(self, owners: Iterable[int], peers: Iterable[int]) -> np.ndarray:
+        """
+        Mean trust the distinct `owners` place in each of `peers`, counting
+        initial_trust for pairs without an entry and leaving out a peer's
+        trust in itself. Peers no other owner can rate get initial_trust.
+        """
+        owners = np.unique(np.asarray(owners, dtype=np.int64))
+        peers, inverse = np.unique(np.asarray(peers, dtype=np.int64), return_inverse=True)
+        stored_owners, stored_peers, scores = self.edges()
+        positions = np.minimum(np.searchsorted(peers, stored_peers), max(len(peers) - 1, 0))
+        rated = np.isin(stored_owners, owners) & (stored_owners != stored_peers)
+        if len(peers):
+            rated &= peers[positions] == stored_peers
+        # Entries only move a pair away from initial_trust
+        offsets = np.bincount(positions[rated], weights=scores[rated] - self.initial_trust, minlength=len(peers))
+        raters = len(owners) - np.isin(peers, owners)
+        means = self.initial_trust + np.divide(offsets, raters, out=np.zeros(len(peers)), where=raters > 0)
+        return means[inverse.ravel()]
+
+    def get(self, owner: int, peer: int) -> float:
+        return float(self.scores(owner, [peer])[0])
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All entries as (owners, peers, scores) arrays."""
+        self.flush()
+        owners = np.repeat(np.arange(self.rows, dtype=np.int64), np.diff(self._indptr))
+        return owners, self._indices.astype(np.int64), self._scores.copy()
@@ -2,9 +2,11 @@ import plotly.graph_objects as go
 import plotly.express as px
 import networkx as nx
 import pandas as pd
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 import asyncio
 import logging
+from config import VISUALIZATION_INTERVAL
 
 class NetworkVisualizer:
     def __init__(self):
@@ -92,9 +94,96 @@ class NetworkVisualizer:
                 logging.error(f"Visualization update error: {e}")
             await asyncio.sleep(self.update_interval)
             
+    def render(self, G: nx.Graph, nodes_data: List[Dict[str, Any]]):
+        """Rebuild both figures"""
+        self.update_network_graph(G)
+        if nodes_data:
+            self.update_ethics_distribution(nodes_data)
+
     def get_figures(self):
         """Get current figure objects"""
         return {
             'network': self.fig_network,
             'ethics': self.fig_ethics
         }
+
+class VisualizationSnapshot(NamedTuple):
+    """The verified state snapshots of one consensus round. Never mutated after publishing."""
+    timestamp: float
+    states: Tuple[Dict[str, Any], ...]
+
+class BackgroundRenderer:
+    """
+    Debounced renderer that keeps layouts and figure construction off the
+    event loop.
+
+    Consensus publishes a VisualizationSnapshot per round; publishing only
+    records the latest snapshot state of each node. A background task wakes
+    on new snapshots, hands everything pending to a single worker thread and
+    then waits out the rest of `interval`, so the figures are redrawn at most
+    once per interval however many rounds commit in between. The renderer's
+    graph is only ever touched by the worker thread.
+    """
+    def __init__(self, visualizer: NetworkVisualizer, interval: float = VISUALIZATION_INTERVAL):
+        self.visualizer = visualizer
+        self.interval = interval
+        self.graph = nx.DiGraph()
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self._pending: Dict[int, Tuple[Dict[str, Any], float]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='visualization')
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.renders = 0
+
+    def publish(self, snapshot: VisualizationSnapshot) -> None:
+        """Queue a round's snapshot for the next redraw. Never blocks on rendering."""
+        for state in snapshot.states:
+            self._pending[state['node_id']] = (state, snapshot.timestamp)
+        self.published += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background task on the running loop, if it is not already running."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        if self._pending:
+            self._wakeup.set()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            started = loop.time()
+            batch, self._pending = self._pending, {}
+            try:
+                await loop.run_in_executor(self._executor, self._render, batch)
+            except Exception as e:
+                logging.error(f"Visualization update error: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    def _render(self, batch: Dict[int, Tuple[Dict[str, Any], float]]) -> None:
+        for node_id, (state, timestamp) in batch.items():
+            self.graph.add_node(node_id, state=state['state'], depth=state['recursion_depth'], timestamp=timestamp)
+            self._nodes[node_id] = {'id': node_id, 'ethical_weights': state['ethical_weights']}
+        self.visualizer.render(self.graph, list(self._nodes.values()))
+        self.renders += 1
+
+    def flush(self) -> None:
+        """Render whatever is pending now, on the worker, and wait for it."""
+        batch, self._pending = self._pending, {}
+        if batch:
+            self._executor.submit(self._render, batch).result()
+
+    def close(self) -> None:
+        self._executor.shutdown()
@@ -0,0 +1,112 @@
+import json
+import struct
+from typing import Any, Dict, Mapping, Tuple, Union
+
+from population import ETHICAL_FRAMEWORKS
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# First byte of every frame, so binary frames can be told apart from JSON text
+MAGIC = 0xB7
+
+# Frame header: magic, payload schema, payload length, message id, sender,
+# recipient and timestamp
+_HEADER = struct.Struct('<BBxxIQqqd')
+HEADER_SIZE = _HEADER.size
+
+SCHEMA_GENERIC = 0
+SCHEMA_CONSENSUS = 1
+SCHEMA_INFLUENCE = 2
+
+# Generic payloads: message type length, then the type and a JSON payload
+_GENERIC = struct.Struct('<B')
+# Consensus payloads: node id, timestamp and the raw SHA-256 state proof
+_CONSENSUS = struct.Struct('<qd32s')
+_CONSENSUS_KEYS = frozenset(('node_id', 'state_proof', 'timestamp'))
+# Influence payloads: a bitmask of the frameworks present, then one factor per framework
+_INFLUENCE = struct.Struct('<B' + 'd' * len(ETHICAL_FRAMEWORKS))
+_FRAMEWORKS = frozenset(ETHICAL_FRAMEWORKS)
+
+def is_frame(data: Buffer) -> bool:
+    """Whether `data` starts with a binary message frame."""
+    return len(data) >= HEADER_SIZE and data[0] == MAGIC
+
+def _consensus_body(payload: Mapping[str, Any]) -> bytes:
+    proof = payload['state_proof']
+    if payload.keys() != _CONSENSUS_KEYS or not isinstance(proof, str) or len(proof) != 64:
+        return b''
+    try:
+        raw = bytes.fromhex(proof)
+    except ValueError:
+        return b''
+    # Only lowercase hex digests survive the round trip through raw bytes
+    if raw.hex() != proof or type(payload['node_id']) is not int:
+        return b''
+    return _CONSENSUS.pack(payload['node_id'], payload['timestamp'], raw)
+
+def _influence_body(payload: Mapping[str, Any]) -> bytes:
+    influence = payload['influence']
+    if payload.keys() != {'influence'} or not isinstance(influence, Mapping) or not influence.keys() <= _FRAMEWORKS:
+        return b''
+    mask = 0
+    for i, key in enumerate(ETHICAL_FRAMEWORKS):
+        if key in influence:
+            mask |= 1 << i
+    return _INFLUENCE.pack(mask, *(float(influence.get(key, 0.0)) for key in ETHICAL_FRAMEWORKS))
+
+def encode_message(message: Any) -> bytes:
+    """
+    Encode a Message as one binary frame. Consensus and influence payloads
+    in their usual layout use fixed struct schemas (influence factors are
+    carried as doubles); anything else falls back to a JSON payload.
+    """
+    payload = message.payload
+    schema = SCHEMA_GENERIC
+    body = b''
+    if message.message_type == 'consensus' and 'state_proof' in payload:
+        body = _consensus_body(payload)
+        schema = SCHEMA_CONSENSUS
+    elif message.message_type == 'influence' and 'influence' in payload:
+        body = _influence_body(payload)
+        schema = SCHEMA_INFLUENCE
+    if not body:
+        message_type = message.message_type.encode()
+        body = _GENERIC.pack(len(message_type)) + message_type + json.dumps(dict(payload)).encode()
+        schema = SCHEMA_GENERIC
+    return _HEADER.pack(
+        MAGIC, schema, len(body), message.id, message.sender_id, message.recipient_id, message.timestamp
+    ) + body
+
+def decode_fields(buffer: Buffer, offset: int = 0) -> Tuple[Tuple[int, int, int, str, Dict[str, Any], float], int]:
+    """
+    Decode the frame at `offset` without copying the buffer.
+    Returns:
+        The message fields (id, sender_id, recipient_id, message_type,
+        payload, timestamp) and the offset just past the frame.
+    """
+    magic, schema, length, message_id, sender_id, recipient_id, timestamp = _HEADER.unpack_from(buffer, offset)
+    if magic != MAGIC:
+        raise ValueError(f"Not a message frame (magic byte {magic:#04x})")
+    start = offset + HEADER_SIZE
+    end = start + length
+    if end > len(buffer):
+        raise ValueError(f"Truncated message frame: {len(buffer) - start} of {length} payload bytes")
+    if schema == SCHEMA_CONSENSUS:
+        node_id, state_timestamp, proof = _CONSENSUS.unpack_from(buffer, start)
+        message_type = 'consensus'
+        payload = {'node_id': node_id, 'state_proof': proof.hex(), 'timestamp': state_timestamp}
+    elif schema == SCHEMA_INFLUENCE:
+        mask, *factors = _INFLUENCE.unpack_from(buffer, start)
+        message_type = 'influence'
+        payload = {'influence': {
+            key: factor for i, (key, factor) in enumerate(zip(ETHICAL_FRAMEWORKS, factors)) if mask >> i & 1
+        }}
+    elif schema == SCHEMA_GENERIC:
+        type_length, = _GENERIC.unpack_from(buffer, start)
+        type_end = start + _GENERIC.size + type_length
+        view = memoryview(buffer)
+        message_type = str(view[start + _GENERIC.size:type_end], 'utf-8')
+        payload = json.loads(bytes(view[type_end:end]))
+    else:
+        raise ValueError(f"Unknown payload schema {schema}")
+    return (message_id, sender_id, recipient_id, message_type, payload, timestamp), end
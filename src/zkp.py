@@ -1,55 +1,295 @@
+import functools
 import hashlib
+import numbers
 import secrets
-from typing import Dict, Any, Tuple
+import struct
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import random
 import logging
 
+import numpy as np
+
+from config import PROOF_CACHE_SIZE, SCHNORR_GROUP
+from population import ETHICAL_FRAMEWORKS
+
+_NODE_STATE_KEYS = frozenset(('node_id', 'recursion_depth', 'ethical_weights', 'state'))
+# node_id, recursion_depth, then ethical weights in ETHICAL_FRAMEWORKS order
+_NODE_STATE = struct.Struct('<qq3d')
+_FLOAT = struct.Struct('<d')
+_LENGTH = struct.Struct('<I')
+_NODE_STATE_TYPES = (int, int, *(float,) * len(ETHICAL_FRAMEWORKS), str)
+
+def _node_state_key(state: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Flat tuple of a node state's fields in canonical order, or None for other
+    states. Fields are normalized to the types they are encoded as, so equal
+    keys always mean equal encodings: a float node_id equals an int one in a
+    tuple, but takes the generic path instead of the fixed layout.
+    """
+    if state.keys() != _NODE_STATE_KEYS:
+        return None
+    weights = state['ethical_weights']
+    if len(weights) != len(ETHICAL_FRAMEWORKS):
+        return None
+    try:
+        # Adding 0.0 turns -0.0 into 0.0: the two are equal as keys but pack differently
+        key = (state['node_id'], state['recursion_depth'],
+               *(weights[framework] + 0.0 for framework in ETHICAL_FRAMEWORKS), state['state'])
+    except (KeyError, TypeError):
+        return None
+    if tuple(map(type, key)) == _NODE_STATE_TYPES:
+        return key
+    # Slow path for numpy scalars, bools and the like
+    node_id, depth, *values, name = key
+    if not (isinstance(node_id, numbers.Integral) and isinstance(depth, numbers.Integral)
+            and isinstance(name, str) and all(isinstance(value, numbers.Real) for value in values)):
+        return None
+    return (int(node_id), int(depth), *map(float, values), str(name))
+
+def _encode_node_state(key: tuple) -> bytes:
+    return b'N' + _NODE_STATE.pack(*key[:-1]) + key[-1].encode()
+
+@functools.lru_cache(maxsize=PROOF_CACHE_SIZE)
+def _node_state_prefix(key: tuple):
+    """SHA-256 context that has absorbed a node state's encoding; shared by every ZKPVerifier."""
+    return hashlib.sha256(_encode_node_state(key))
+
+def _encode_value(value: Any, out: List[bytes]) -> None:
+    """Type-tagged, length-prefixed encoding; dict entries are ordered by encoded key."""
+    if value is None:
+        out.append(b'n')
+    elif isinstance(value, bool):
+        out.append(b't' if value else b'f')
+    elif isinstance(value, numbers.Integral):
+        value = int(value)
+        raw = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+        out.append(b'i' + _LENGTH.pack(len(raw)) + raw)
+    elif isinstance(value, numbers.Real):
+        out.append(b'd' + _FLOAT.pack(value))
+    elif isinstance(value, str):
+        raw = value.encode()
+        out.append(b's' + _LENGTH.pack(len(raw)) + raw)
+    elif isinstance(value, bytes):
+        out.append(b'b' + _LENGTH.pack(len(value)) + value)
+    elif isinstance(value, dict):
+        items = []
+        for key, item in value.items():
+            encoded_key = []
+            _encode_value(key, encoded_key)
+            items.append((b''.join(encoded_key), item))
+        items.sort(key=lambda pair: pair[0])
+        out.append(b'm' + _LENGTH.pack(len(items)))
+        for encoded_key, item in items:
+            out.append(encoded_key)
+            _encode_value(item, out)
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        values = value.tolist() if isinstance(value, np.ndarray) else value
+        out.append(b'l' + _LENGTH.pack(len(values)))
+        for item in values:
+            _encode_value(item, out)
+    else:
+        raise TypeError(f"Cannot canonicalize value of type {type(value).__name__}")
+
 class ZKPVerifier:
     """
     Simple Zero-Knowledge Proof implementation using hash-based commitments.
     This is a basic implementation and should be replaced with a more robust ZKP system in production.
+
+    States are committed to through a canonical binary encoding. Node states
+    use a fixed-layout fast path, and an LRU cache maps recently seen node
+    states to a SHA-256 context that has already absorbed their encoding, so
+    proving and verifying the same state again only hashes the nonce. The
+    cache holds PROOF_CACHE_SIZE states and is shared by every verifier in
+    the process, so its memory does not grow with the number of nodes.
     """
+
+    @staticmethod
+    def canonicalize(state: Dict[str, Any]) -> bytes:
+        """Canonical binary encoding of a state, the bytes a proof commits to."""
+        key = _node_state_key(state)
+        if key is not None:
+            try:
+                return _encode_node_state(key)
+            except (struct.error, AttributeError):
+                pass
+        out = []
+        _encode_value(state, out)
+        return b''.join(out)
+
+    def _state_hash(self, state: Dict[str, Any]):
+        """SHA-256 context over the canonical state, served from the cache for node states."""
+        key = _node_state_key(state)
+        if key is not None:
+            try:
+                # Copy so the cached context is never updated
+                return _node_state_prefix(key).copy()
+            except (struct.error, AttributeError, TypeError):
+                pass
+        return hashlib.sha256(self.canonicalize(state))
+
+    @staticmethod
+    def cache_info():
+        return _node_state_prefix.cache_info()
+
+    @staticmethod
+    def cache_clear() -> None:
+        _node_state_prefix.cache_clear()
+
     def generate_challenge(self, state: Dict[str, Any]) -> Tuple[str, str]:
         """Generate a challenge for the given state."""
         nonce = secrets.token_hex(16)
-        state_str = str(sorted(state.items()))
-        challenge = hashlib.sha256(f"{state_str}{nonce}".encode()).hexdigest()
+        challenge = self.create_proof(state, nonce)
         return challenge, nonce
 
     def create_proof(self, state: Dict[str, Any], nonce: str) -> str:
         """Create a proof for the given state and nonce."""
-        state_str = str(sorted(state.items()))
-        return hashlib.sha256(f"{state_str}{nonce}".encode()).hexdigest()
+        h = self._state_hash(state)
+        h.update(nonce.encode())
+        return h.hexdigest()
 
     def verify_proof(self, state: Dict[str, Any], proof: str, nonce: str) -> bool:
         """Verify the proof against the given state."""
-        expected_proof = self.create_proof(state, nonce)
-        return secrets.compare_digest(proof, expected_proof)
+        return secrets.compare_digest(proof, self.create_proof(state, nonce))
+
+def multi_exp(bases: Sequence[int], exponents: Sequence[int], modulus: int, window: int = 4) -> int:
+    """
+    Product of base_i ** exponent_i mod modulus using Straus' interleaved
+    windowed method: all bases share one chain of squarings, so the cost is
+    one squaring per exponent bit plus one multiplication per non-zero window.
+    """
+    if not bases:
+        return 1 % modulus
+    size = 1 << window
+    mask = size - 1
+    tables = []
+    for base in bases:
+        table = [1, base % modulus]
+        for _ in range(size - 2):
+            table.append(table[-1] * base % modulus)
+        tables.append(table)
+
+    digits = -(-max(e.bit_length() for e in exponents) // window)
+    result = 1
+    for position in range(digits - 1, -1, -1):
+        if result != 1:
+            for _ in range(window):
+                result = result * result % modulus
+        shift = position * window
+        for table, exponent in zip(tables, exponents):
+            digit = (exponent >> shift) & mask
+            if digit:
+                result = result * table[digit] % modulus
+    return result % modulus
+
+def jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a / n) for odd positive n, by binary quadratic reciprocity."""
+    a %= n
+    result = 1
+    while a:
+        twos = (a & -a).bit_length() - 1
+        a >>= twos
+        if twos & 1 and n & 7 in (3, 5):
+            result = -result
+        if a & n & 3 == 3:
+            result = -result
+        a, n = n % a, a
+    return result if n == 1 else 0
+
+class FixedBaseTable:
+    """
+    Precomputed powers base ** (d * 2 ** (window * j)) mod modulus, so raising
+    the fixed base to an exponent below 2 ** max_bits takes one multiplication
+    per non-zero window and no squarings.
+    """
+    def __init__(self, base: int, modulus: int, max_bits: int, window: int = 4):
+        self.modulus = modulus
+        self.window = window
+        self.max_bits = max_bits
+        self._mask = (1 << window) - 1
+        self._rows = []
+        row_base = base % modulus
+        for _ in range(-(-max_bits // window)):
+            row = [1, row_base]
+            for _ in range(self._mask - 1):
+                row.append(row[-1] * row_base % modulus)
+            self._rows.append(row)
+            row_base = row[-1] * row_base % modulus
+        
+    def pow(self, exponent: int) -> int:
+        if exponent < 0 or exponent.bit_length() > self.max_bits:
+            return pow(self._rows[0][1], exponent, self.modulus)
+        result = 1
+        for row in self._rows:
+            digit = exponent & self._mask
+            if digit:
+                result = result * row[digit] % self.modulus
+            exponent >>= self.window
+            if not exponent:
+                break
+        return result % self.modulus
 
 class SchnorrZKP:
     """Schnorr Zero-Knowledge Proof implementation"""
-    def __init__(self, p: int = None, q: int = None, g: int = None):
-        # If parameters not provided, use default safe primes
-        self.p = p or 0x7FFFFFFF # Safe prime
-        self.q = q or (self.p - 1) // 2  # Sophie Germain prime
-        self.g = g or 2  # Generator
-        
+    # Bit length of the random weights used in batch verification
+    BATCH_SECURITY_BITS = 64
+    # Below this modulus size the builtin pow beats table lookups done in Python
+    FAST_EXP_MIN_BITS = 64
+
+    def __init__(self, p: int = None, q: int = None, g: int = None, window: int = 4):
+        # Without a modulus use the configured group, otherwise default to a
+        # safe prime p = 2q + 1 with generator 2
+        if p is None:
+            p, q, g = SCHNORR_GROUP
+        self.p = p
+        self.q = q or (self.p - 1) // 2
+        self.g = g or 2
+        self.window = window
+        self._fast_exp = self.p.bit_length() >= self.FAST_EXP_MIN_BITS
+        # For a safe prime the order-q subgroup is the quadratic residues
+        self._safe_prime = self.p == 2 * self.q + 1
+        # Elsewhere checking subgroup membership costs as much as verifying
+        # a proof, so only large safe-prime groups batch
+        self._combined_check = self._fast_exp and self._safe_prime
+        self._g_table: Optional[FixedBaseTable] = None
+        # verify_batch calls that ran the combined check vs. one proof at a time
+        self.batched = 0
+        self.sequential = 0
+
+    def pow_g(self, exponent: int) -> int:
+        """g ** exponent mod p using the fixed-base table, built on first use."""
+        if not self._fast_exp:
+            return pow(self.g, exponent, self.p)
+        if self._g_table is None:
+            self._g_table = FixedBaseTable(self.g, self.p, self.q.bit_length(), self.window)
+        return self._g_table.pow(exponent)
+
+    def in_subgroup(self, x: int) -> bool:
+        """Whether x is in the order-q subgroup, by Jacobi symbol when p is a safe prime."""
+        if not 0 < x < self.p:
+            return False
+        if self._safe_prime:
+            return jacobi(x, self.p) == 1
+        return pow(x, self.q, self.p) == 1
+
     def generate_keypair(self) -> Tuple[int, int]:
         """Generate public-private keypair"""
         private_key = random.randrange(1, self.q)
-        public_key = pow(self.g, private_key, self.p)
+        public_key = self.pow_g(private_key)
         return private_key, public_key
 
+    def _challenge(self, state_hash: bytes, r: int) -> int:
+        return int.from_bytes(hashlib.sha256(
+            state_hash + str(r).encode()
+        ).digest(), byteorder='big') % self.q
+
     def create_proof(self, private_key: int, state_hash: bytes) -> Dict[str, int]:
         """Create a zero-knowledge proof for a given state"""
         # Random commitment
         k = random.randrange(1, self.q)
-        r = pow(self.g, k, self.p)
+        r = self.pow_g(k)
         
         # Challenge
-        h = int.from_bytes(hashlib.sha256(
-            state_hash + str(r).encode()
-        ).digest(), byteorder='big') % self.q
+        h = self._challenge(state_hash, r)
         
         # Response
         s = (k - private_key * h) % self.q
@@ -61,20 +301,69 @@ class SchnorrZKP:
         r, s, h = proof['r'], proof['s'], proof['h']
         
         # Verify: g^s * y^h ≡ r (mod p)
-        left_side = (pow(self.g, s, self.p) * 
+        left_side = (self.pow_g(s) * 
                     pow(public_key, h, self.p)) % self.p
         
         # Verify hash
-        computed_h = int.from_bytes(hashlib.sha256(
-            state_hash + str(r).encode()
-        ).digest(), byteorder='big') % self.q
+        computed_h = self._challenge(state_hash, r)
         
         return left_side == r and computed_h == h
 
+    def verify_batch(self, items: Sequence[Tuple[int, bytes, Dict[str, int]]]) -> bool:
+        """
+        Verify many (public_key, state_hash, proof) tuples at once.
+
+        Each challenge hash is checked individually. The group equations are
+        combined with random weights z_i into one check,
+            g^(sum z_i s_i) * prod y_i^(z_i h_i) == prod r_i^z_i  (mod p),
+        which holds for all proofs if they are valid and fails with
+        overwhelming probability if any is not. That only holds when every
+        commitment and public key is in the order-q subgroup, which is checked
+        first: otherwise elements of order 2, such as p - g^k, could cancel in
+        pairs. Proofs sharing a public key share one base in the
+        multi-exponentiation. Small groups, and groups that are not safe
+        primes, verify each proof on its own instead.
+        Returns:
+            True only if every proof is valid.
+        """
+        if not self._combined_check:
+            self.sequential += 1
+            return all(self.verify_proof(*item) for item in items)
+        self.batched += 1
+        g_exponent = 0
+        key_exponents: Dict[int, int] = {}
+        commitments, weights = [], []
+        for public_key, state_hash, proof in items:
+            r, s, h = proof['r'], proof['s'], proof['h']
+            if not (0 <= s < self.q and 0 <= h < self.q and self.in_subgroup(r)):
+                return False
+            if self._challenge(state_hash, r) != h:
+                return False
+            z = secrets.randbits(self.BATCH_SECURITY_BITS)
+            g_exponent += z * s
+            key_exponents[public_key] = (key_exponents.get(public_key, 0) + z * h) % self.q
+            commitments.append(r)
+            weights.append(z)
+
+        if not all(map(self.in_subgroup, key_exponents)):
+            return False
+        left_side = self.pow_g(g_exponent % self.q) * multi_exp(
+            list(key_exponents), list(key_exponents.values()), self.p, self.window
+        ) % self.p
+        return left_side == multi_exp(commitments, weights, self.p, self.window)
+
+    def stats(self) -> Dict[str, Any]:
+        """verify_batch calls per path, and whether this group takes the combined check."""
+        return {
+            'combined_check': self._combined_check,
+            'batched': self.batched,
+            'sequential': self.sequential
+        }
+
 class ZKPManager:
     """Manages ZKP operations for nodes"""
-    def __init__(self):
-        self.zkp = SchnorrZKP()
+    def __init__(self, zkp: Optional[SchnorrZKP] = None):
+        self.zkp = zkp or SchnorrZKP()
         self.keypairs = {}  # node_id -> (private_key, public_key)
         
     def initialize_node(self, node_id: int) -> int:
@@ -83,13 +372,17 @@ class ZKPManager:
         self.keypairs[node_id] = (private_key, public_key)
         return public_key
     
+    @staticmethod
+    def _state_hash(state: Dict) -> bytes:
+        return hashlib.sha256(str(state).encode()).digest()
+
     def create_state_proof(self, node_id: int, state: Dict) -> Dict:
         """Create proof for node state"""
         if node_id not in self.keypairs:
             raise ValueError(f"Node {node_id} not initialized")
             
         private_key = self.keypairs[node_id][0]
-        state_hash = hashlib.sha256(str(state).encode()).digest()
+        state_hash = self._state_hash(state)
         
         try:
             proof = self.zkp.create_proof(private_key, state_hash)
@@ -108,9 +401,53 @@ class ZKPManager:
             
         public_key = self.keypairs[node_id][1]
         state_hash = bytes.fromhex(proof_data['state_hash'])
+        if state_hash != self._state_hash(state):
+            return False
         
         try:
             return self.zkp.verify_proof(public_key, state_hash, proof_data['proof'])
         except Exception as e:
             logging.error(f"Error verifying proof: {e}")
             return False
+
+    def verify_state_proofs_batch(self, entries: Sequence[Tuple[int, Dict, Dict]]) -> List[bool]:
+        """
+        Verify (node_id, state, proof_data) entries with batched Schnorr
+        verification. If the batch fails it is split in halves until the
+        invalid proofs are isolated, so a few bad proofs cost O(log n)
+        extra batches each.
+        Returns:
+            One verdict per entry, in order.
+        """
+        results = [False] * len(entries)
+        items, positions = [], []
+        for i, (node_id, state, proof_data) in enumerate(entries):
+            if node_id not in self.keypairs:
+                raise ValueError(f"Node {node_id} not initialized")
+            try:
+                state_hash = bytes.fromhex(proof_data['state_hash'])
+                if state_hash != self._state_hash(state):
+                    continue
+                items.append((self.keypairs[node_id][1], state_hash, proof_data['proof']))
+                positions.append(i)
+            except Exception as e:
+                logging.error(f"Error verifying proof: {e}")
+
+        def verify_range(start: int, end: int) -> None:
+            if start == end:
+                return
+            try:
+                valid = self.zkp.verify_batch(items[start:end])
+            except Exception as e:
+                logging.error(f"Error verifying proof: {e}")
+                valid = False
+            if valid:
+                for i in positions[start:end]:
+                    results[i] = True
+            elif end - start > 1:
+                middle = (start + end) // 2
+                verify_range(start, middle)
+                verify_range(middle, end)
+
+        verify_range(0, len(items))
+        return results
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.checkpoint import NetworkCheckpointer, restore_network
+from src.ouroboros_node import OuroborosNode
+from src.population import NodePopulation
+from src.rl_agent import RLAgent
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        population = NodePopulation()
+        self.nodes = [OuroborosNode(i, ['virtue', 'utilitarian'][i % 2], population) for i in range(4)]
+        for node in self.nodes:
+            for _ in range(node.node_id + 1):
+                node.generate_insight()
+        self.nodes[1].apply_observer_influence({'virtue': 0.2})
+        self.nodes[2].update_trust_score(3, False)
+        self.rl_agent = RLAgent()
+        self.rl_agent.choose_action('state')
+        self.checkpointer = NetworkCheckpointer(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_roundtrip(self):
+        """Test restored nodes match the checkpointed network"""
+        self.checkpointer.write(self.checkpointer.capture(self.nodes, self.rl_agent))
+        agent = RLAgent()
+        restored = restore_network(self.directory, rl_agent=agent)
+        for original, node in zip(self.nodes, restored):
+            self.assertEqual(node.node_id, original.node_id)
+            self.assertEqual(node.domain, original.domain)
+            self.assertEqual(node.ethical_weights, original.ethical_weights)
+            self.assertEqual(node.recursion_depth, original.recursion_depth)
+            self.assertEqual(list(node.conceptual_memory), list(original.conceptual_memory))
+            self.assertEqual(node.state_digest(), original.state_digest())
+        self.assertEqual(restored[2].trust_graph.nodes[3]['trust_score'], 0.8)
+        self.assertEqual(agent.q_table, self.rl_agent.q_table)
+
+    def test_restored_state_is_writable(self):
+        self.checkpointer.write(self.checkpointer.capture(self.nodes))
+        restored = restore_network(self.directory)
+        restored[0].generate_insight()
+        self.assertEqual(restored[0].recursion_depth, 2)
+
+    def test_incremental_write(self):
+        """Test unchanged sections are not rewritten"""
+        first = self.checkpointer.write(self.checkpointer.capture(self.nodes))
+        self.nodes[0].generate_insight()
+        second = self.checkpointer.write(self.checkpointer.capture(self.nodes))
+        self.assertEqual(first['sections']['weights'], second['sections']['weights'])
+        self.assertNotEqual(first['sections']['recursion_depth'], second['sections']['recursion_depth'])
+        files = [f for f in os.listdir(self.directory) if f.endswith('.npy')]
+        self.assertEqual(len(files), len(second['sections']))
+
+if __name__ == '__main__':
+    unittest.main()
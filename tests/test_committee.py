@@ -0,0 +1,110 @@
+import unittest
+import numpy as np
+from src.committee import HierarchicalConsensus, assign_committees, combine_digests, seal_digest, verify_digest
+from src.population import NodePopulation
+from src.zkp import ZKPVerifier
+
+class TestAssignCommittees(unittest.TestCase):
+    def test_sizes_bounded_and_balanced(self):
+        committees = assign_committees(range(1000), committee_size=64)
+        sizes = np.bincount(committees)
+        self.assertEqual(len(sizes), 16)
+        self.assertLessEqual(sizes.max(), 64)
+        self.assertLessEqual(sizes.max() - sizes.min(), 1)
+
+    def test_independent_of_listing_order(self):
+        ids = np.arange(200)
+        shuffled = np.random.default_rng(0).permutation(ids)
+        by_id = dict(zip(ids.tolist(), assign_committees(ids, 16).tolist()))
+        by_shuffled = dict(zip(shuffled.tolist(), assign_committees(shuffled, 16).tolist()))
+        self.assertEqual(by_id, by_shuffled)
+
+    def test_domain_partition(self):
+        domains = ['virtue'] * 10 + ['utilitarian'] * 5
+        committees = assign_committees(range(15), 4, domains)
+        for committee in set(committees.tolist()):
+            self.assertEqual(len({domains[i] for i in np.flatnonzero(committees == committee)}), 1)
+        self.assertEqual(len(set(committees.tolist())), 3 + 2)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            assign_committees(range(4), 0)
+
+class TestHierarchicalConsensus(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = rng.uniform(0, 1, (2000, 4))
+        self.trust = rng.uniform(0.1, 1.0, 2000)
+        self.committees = assign_committees(range(2000), 16)
+
+    def test_mean_matches_flat_consensus(self):
+        result = HierarchicalConsensus(self.values, self.trust, self.committees, committee_size=16).run()
+        expected = np.average(self.values, axis=0, weights=self.trust)
+        self.assertEqual(result['levels'], 3)
+        self.assertLessEqual(result['largest_committee'], 16)
+        self.assertAlmostEqual(result['consensus']['recursion_depth'], expected[3])
+        np.testing.assert_allclose(list(result['consensus']['ethical_weights'].values()), expected[:3])
+
+    def test_tampered_digest_rejected(self):
+        consensus = HierarchicalConsensus(self.values, self.trust, self.committees, committee_size=16)
+        digests = consensus.local_digests()
+        digests[3] = digests[3]._replace(weight=1e6)
+        result = consensus.combine(digests)
+        self.assertEqual(result['rejected'], [digests[3].committee_id])
+
+    def test_upper_levels_run_by_leaders(self):
+        class CountingVerifier(ZKPVerifier):
+            def __init__(self):
+                self.proofs = self.verified = 0
+
+            @property
+            def sealed(self):
+                return self.proofs - self.verified
+
+            def create_proof(self, state, nonce):
+                self.proofs += 1
+                return super().create_proof(state, nonce)
+
+            def verify_proof(self, state, proof, nonce):
+                self.verified += 1
+                return super().verify_proof(state, proof, nonce)
+
+        consensus = HierarchicalConsensus(self.values, self.trust, self.committees, committee_size=16)
+        digests = consensus.local_digests()
+        leaders = [CountingVerifier() for _ in digests]
+        root = CountingVerifier()
+        result = combine_digests(digests, 16, 'mean', root, leaders)
+        self.assertEqual(result['levels'], 3)
+        self.assertEqual((root.verified, root.sealed), (8, 0))
+        self.assertEqual(sum(leader.verified for leader in leaders), len(digests))
+        # The first leader of each of the 8 upper-level groups sealed it
+        self.assertEqual(sum(leader.sealed for leader in leaders), 8)
+        self.assertEqual(result['consensus'], consensus.combine(digests)['consensus'])
+        with self.assertRaises(ValueError):
+            combine_digests(digests, 16, 'mean', root, leaders[1:])
+
+    def test_median_resists_outlier_committee(self):
+        values = np.full((64, 4), 5.0)
+        values[:8] = 1000.0
+        committees = np.repeat(np.arange(8), 8)
+        result = HierarchicalConsensus(values, np.ones(64), committees, committee_size=8, method='median').run()
+        self.assertEqual(result['consensus']['ethical_weights']['utilitarian'], 5.0)
+
+    def test_from_population(self):
+        population = NodePopulation()
+        population.add_nodes(range(8), ['virtue'] * 4 + ['deontological'] * 4)
+        population.recursion_depth[:] = np.arange(8) * 2
+        result = HierarchicalConsensus.from_population(population, committee_size=2, partition='domain').run()
+        self.assertEqual(result['committees'], 4)
+        self.assertAlmostEqual(result['consensus']['recursion_depth'], 7.0)
+        with self.assertRaises(ValueError):
+            HierarchicalConsensus.from_population(population, partition='random')
+
+    def test_digest_roundtrip(self):
+        verifier = ZKPVerifier()
+        digest = seal_digest(2, 10, 4.5, np.array([0.2, 0.3, 0.5, 7.0]), verifier)
+        self.assertTrue(verify_digest(digest, verifier))
+        self.assertFalse(verify_digest(digest._replace(members=11), verifier))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import tracemalloc
+import unittest
+from src.compact_node import CompactNode, MindState
+
+# Regression budget for the slotted representation, in bytes per node
+COMPACT_NODE_BUDGET = 300
+
+class TestCompactNode(unittest.TestCase):
+    def setUp(self):
+        self.node = CompactNode(node_id=1, domain_seed='utilitarian')
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.node, '__dict__'))
+
+    def test_shared_verifier(self):
+        other = CompactNode(node_id=2, domain_seed='virtue')
+        self.assertIs(self.node.zkp_verifier, other.zkp_verifier)
+
+    def test_insights_are_derived(self):
+        """Test conceptual memory is rebuilt from depth and bounded"""
+        for _ in range(70):
+            self.node.generate_insight()
+        memory = self.node.conceptual_memory
+        self.assertEqual(len(memory), 64)
+        self.assertEqual(memory[-1], 'utilitarian_insight_69')
+
+    def test_state_and_influence(self):
+        self.node.apply_observer_influence({'utilitarian': 5.0})
+        self.assertAlmostEqual(sum(self.node.ethical_weights.values()), 1.0)
+        self.assertTrue(self.node.check_ethical_bounds())
+        self.assertEqual(self.node.state, MindState.ETHICAL_CRISIS)
+
+    def test_memory_budget(self):
+        """Test per-node footprint stays within budget at 1k nodes"""
+        count = 1000
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        nodes = [CompactNode(i, 'virtue') for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertLess((after - before) / count, COMPACT_NODE_BUDGET)
+        self.assertEqual(len(nodes), count)
+
+if __name__ == '__main__':
+    unittest.main()
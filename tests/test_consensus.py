@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+import unittest
+from src.consensus import ConsensusManager
+from src.messaging import MessageBroker
+from src.simulation import build_network
+
+class TamperingVerifier:
+    """Prover that commits to something other than the snapshot it was given."""
+    def create_proof(self, state, nonce):
+        return '0' * 64
+
+class RecordingBroker:
+    """Broker that takes `delay` seconds per broadcast and records every payload."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.published = []
+
+    async def broadcast(self, sender_id, message_type, payload):
+        await asyncio.sleep(self.delay)
+        self.published.append(payload)
+
+class FailingBroker:
+    async def broadcast(self, sender_id, message_type, payload):
+        raise ConnectionError("broker unavailable")
+
+class SlowVisualizer:
+    """Visualizer whose redraws take `delay` seconds and record the thread they ran on."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = []
+
+    def render(self, graph, nodes_data):
+        time.sleep(self.delay)
+        self.threads.append(threading.current_thread().name)
+
+class TrackingManager(ConsensusManager):
+    """Records how many rounds are in flight whenever a new one starts collecting."""
+    def __init__(self, *args, slow_first_round=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slow_first_round = slow_first_round
+        self.started = 0
+        self.max_in_flight = 0
+        self._verify_calls = 0
+        self._lock = threading.Lock()
+
+    def collect_states(self, nodes):
+        self.started += 1
+        self.max_in_flight = max(self.max_in_flight, self.started - (self.committed_round + 1))
+        return super().collect_states(nodes)
+
+    def _verify_chunk(self, states):
+        with self._lock:
+            first = self._verify_calls == 0
+            self._verify_calls += 1
+        if first:
+            time.sleep(self.slow_first_round)
+        return super()._verify_chunk(states)
+
+class TestConsensusManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = ConsensusManager(MessageBroker(), verify_workers=3)
+        self.nodes = build_network(10, seed=1)
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def test_verify_round_records_all_nodes(self):
+        verified = self.manager.verify_round(self.nodes, 1.0)
+        self.assertEqual([node for node, _ in verified], self.nodes)
+        self.assertEqual(set(self.manager.ontology_graph.nodes), set(range(10)))
+        self.assertEqual(self.manager.ontology_graph.nodes[0]['timestamp'], 1.0)
+
+    def test_failed_proof_excluded(self):
+        self.nodes[4].zkp_verifier = TamperingVerifier()
+        verified = self.manager.verify_round(self.nodes, 1.0)
+        self.assertEqual(len(verified), 9)
+        self.assertNotIn(4, self.manager.ontology_graph.nodes)
+
+    def test_graph_uses_snapshot(self):
+        states = self.manager.collect_states(self.nodes)
+        self.nodes[0].generate_insight()
+        proofs = self.manager._verify_chunk(states)
+        self.manager._record_round(self.nodes, states, proofs, 2.0)
+        self.assertEqual(self.manager.ontology_graph.nodes[0]['depth'], states[0]['state']['recursion_depth'])
+
+    def test_published_proof_must_match_state(self):
+        """Test a proof published for one state does not verify another"""
+        verifiable = self.nodes[3].get_verifiable_state
+        self.nodes[3].get_verifiable_state = lambda: dict(
+            verifiable(), state=dict(self.nodes[3].snapshot_state(), recursion_depth=99)
+        )
+        verified = self.manager.verify_round(self.nodes, 1.0)
+        self.assertEqual(len(verified), 9)
+        self.assertNotIn(3, self.manager.ontology_graph.nodes)
+
+    def test_verifiable_state_nonce(self):
+        """Test a node's own proof verifies against its published nonce"""
+        verifiable = self.nodes[0].get_verifiable_state()
+        self.assertTrue(self.manager.verifier.verify_proof(
+            verifiable['state'], verifiable['proof'], verifiable['nonce']
+        ))
+
+class TestConsensusPipeline(unittest.TestCase):
+    def setUp(self):
+        self.nodes = build_network(6, seed=2)
+
+    def run_pipeline(self, manager, rounds):
+        try:
+            asyncio.run(manager.run_pipeline(self.nodes, rounds=rounds, interval=0))
+        finally:
+            manager.shutdown()
+
+    def test_rounds_commit_in_order(self):
+        """Test a slow early round holds back later rounds' commits"""
+        broker = RecordingBroker()
+        manager = TrackingManager(broker, verify_workers=2, pipeline_depth=3, slow_first_round=0.1)
+        self.run_pipeline(manager, 4)
+        timestamps = [payload['timestamp'] for payload in broker.published]
+        self.assertEqual(len(timestamps), 4 * len(self.nodes))
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(manager.committed_round, 3)
+
+    def test_in_flight_rounds_bounded(self):
+        """Test collection overlaps publishing without exceeding the pipeline depth"""
+        manager = TrackingManager(RecordingBroker(delay=0.005), verify_workers=1, pipeline_depth=2)
+        self.run_pipeline(manager, 5)
+        self.assertEqual(manager.started, 5)
+        self.assertEqual(manager.max_in_flight, 2)
+
+    def test_failed_round_raises(self):
+        manager = TrackingManager(FailingBroker(), pipeline_depth=2)
+        with self.assertRaises(ConnectionError):
+            self.run_pipeline(manager, 3)
+
+    def test_rendering_off_the_round(self):
+        """Test slow redraws neither delay rounds nor run on the event loop thread"""
+        manager = TrackingManager(RecordingBroker(), pipeline_depth=2)
+        visualizer = SlowVisualizer(delay=0.5)
+        manager.renderer.visualizer = visualizer
+        start = time.perf_counter()
+        asyncio.run(manager.run_pipeline(self.nodes, rounds=5, interval=0))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        manager.shutdown()
+        self.assertEqual(manager.renderer.published, 5)
+        self.assertLessEqual(len(visualizer.threads), 1)
+        self.assertTrue(all(name.startswith('visualization') for name in visualizer.threads))
+
+if __name__ == '__main__':
+    unittest.main()
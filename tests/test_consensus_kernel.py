@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+from src.consensus_kernel import (
+    CONSENSUS_FEATURES, aggregate, matrix_to_consensus, states_to_matrix,
+    trimmed_mean, weighted_mean, weighted_median
+)
+
+class TestConsensusKernel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = rng.uniform(0, 1, (50, len(CONSENSUS_FEATURES)))
+        self.trust = rng.uniform(0.1, 1.0, 50)
+
+    def test_weighted_mean_matches_np_average(self):
+        expected = [np.average(self.values[:, j], weights=self.trust) for j in range(self.values.shape[1])]
+        np.testing.assert_allclose(weighted_mean(self.values, self.trust), expected)
+
+    def test_weighted_median(self):
+        values = np.array([[1.0], [2.0], [3.0], [100.0]])
+        self.assertEqual(weighted_median(values, np.ones(4))[0], 2.0)
+        self.assertEqual(weighted_median(values, np.array([1.0, 1.0, 1.0, 5.0]))[0], 100.0)
+
+    def test_trimmed_mean(self):
+        np.testing.assert_allclose(trimmed_mean(self.values, self.trust, trim=0.0),
+                                   weighted_mean(self.values, self.trust))
+        values = np.array([[0.0], [1.0], [2.0], [3.0], [1000.0]])
+        self.assertAlmostEqual(trimmed_mean(values, np.ones(5), trim=0.2)[0], 2.0)
+
+    def test_robust_to_byzantine_minority(self):
+        honest = np.full((9, 4), 0.3)
+        byzantine = np.full((1, 4), 1e6)
+        values, trust = np.vstack([honest, byzantine]), np.ones(10)
+        self.assertGreater(weighted_mean(values, trust)[0], 1e4)
+        np.testing.assert_allclose(trimmed_mean(values, trust), 0.3)
+        np.testing.assert_allclose(weighted_median(values, trust), 0.3)
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(ValueError):
+            aggregate(self.values, self.trust, 'mode')
+        with self.assertRaises(ValueError):
+            weighted_mean(self.values, self.trust[:-1])
+        with self.assertRaises(ValueError):
+            weighted_mean(self.values, np.zeros(50))
+
+    def test_state_roundtrip(self):
+        states = [{'state': {
+            'node_id': i,
+            'recursion_depth': i,
+            'ethical_weights': {'utilitarian': 0.5, 'deontological': 0.25, 'virtue': 0.25}
+        }} for i in range(3)]
+        consensus = matrix_to_consensus(aggregate(states_to_matrix(states), np.ones(3), 'mean'))
+        self.assertEqual(consensus['recursion_depth'], 1.0)
+        self.assertEqual(consensus['ethical_weights'], {'utilitarian': 0.5, 'deontological': 0.25, 'virtue': 0.25})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from src.gossip import GossipConsensus, GossipDigest
+from src.population import NodePopulation
+
+class TestGossipConsensus(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = rng.uniform(0, 1, (500, 4))
+        self.trust = rng.uniform(0.1, 1.0, 500)
+        self.gossip = GossipConsensus(self.values, self.trust, fanout=2, rng=np.random.default_rng(1))
+
+    def test_converges_to_trust_weighted_mean(self):
+        stats = self.gossip.run(tolerance=1e-6)
+        self.assertTrue(stats['converged'])
+        expected = np.average(self.values, axis=0, weights=self.trust)
+        np.testing.assert_allclose(self.gossip.estimates, np.tile(expected, (500, 1)), atol=1e-6)
+
+    def test_conserves_mass(self):
+        for _ in range(5):
+            self.gossip.round()
+        self.assertAlmostEqual(self.gossip.weights.sum(), self.trust.sum())
+        np.testing.assert_allclose(self.gossip.sums.sum(axis=0), (self.values * self.trust[:, None]).sum(axis=0))
+
+    def test_message_volume(self):
+        stats = self.gossip.run(tolerance=1e-3)
+        self.assertEqual(stats['messages'], 500 * 2 * stats['rounds'])
+
+    def test_logarithmic_rounds(self):
+        rng = np.random.default_rng(2)
+        rounds = []
+        for count in (100, 10000):
+            gossip = GossipConsensus(rng.uniform(0, 1, (count, 1)), np.ones(count), fanout=3, rng=rng)
+            rounds.append(gossip.run(tolerance=1e-3)['rounds'])
+        self.assertLess(rounds[1], 2 * rounds[0])
+
+    def test_from_population(self):
+        population = NodePopulation()
+        population.add_nodes(range(4), ['virtue'] * 4)
+        population.recursion_depth[:] = [0, 4, 8, 12]
+        gossip = GossipConsensus.from_population(population, rng=np.random.default_rng(0))
+        gossip.run(tolerance=1e-6)
+        self.assertAlmostEqual(gossip.consensus()['recursion_depth'], 6.0, places=5)
+
+    def test_from_population_weights_by_inbound_trust(self):
+        population = NodePopulation()
+        population.add_nodes(range(4), ['virtue'] * 4)
+        population.recursion_depth[:] = [0, 4, 8, 12]
+        population.trust.set_scores([0, 1, 2], [3, 3, 3], [0.1, 0.1, 0.1])
+        gossip = GossipConsensus.from_population(population, rng=np.random.default_rng(0))
+        np.testing.assert_allclose(gossip.weights, [1.0, 1.0, 1.0, 0.1])
+        gossip.run(tolerance=1e-6)
+        self.assertAlmostEqual(gossip.consensus()['recursion_depth'], 13.2 / 3.1, places=5)
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(ValueError):
+            GossipConsensus(self.values[:1], self.trust[:1])
+        with self.assertRaises(ValueError):
+            GossipConsensus(self.values, self.trust, fanout=0)
+        with self.assertRaises(ValueError):
+            GossipConsensus(self.values, np.zeros(500))
+
+    def test_digest_split_and_merge(self):
+        digest = GossipDigest(np.array([2.0, 4.0]), 2.0)
+        share = digest.split(4)
+        np.testing.assert_allclose(share.merge(share).estimate, [1.0, 2.0])
+        self.assertEqual(GossipDigest(np.ones(2), 1.0, epoch=3).split(2).epoch, 3)
+        with self.assertRaises(ValueError):
+            share.merge(GossipDigest(np.ones(2), 1.0, epoch=1))
+
+if __name__ == '__main__':
+    unittest.main()
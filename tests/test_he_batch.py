@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+from src.he_batch import pack_states, unpack_states, SLOTS_PER_NODE
+
+class TestStatePacking(unittest.TestCase):
+    def setUp(self):
+        self.digests = np.arange(10) * 1000 + 7
+        self.weights = np.tile([0.2, 0.3, 0.5], (10, 1))
+
+    def test_vector_count(self):
+        """Test nodes are packed slot_count // 4 per vector"""
+        vectors = pack_states(self.digests, self.weights, slot_count=16)
+        self.assertEqual(len(vectors), 3)
+        self.assertTrue(all(len(v) == 16 for v in vectors))
+
+    def test_roundtrip(self):
+        """Test unpacking recovers digests and weights"""
+        vectors = pack_states(self.digests, self.weights, slot_count=16)
+        digests, weights = unpack_states(vectors, len(self.digests))
+        np.testing.assert_array_equal(digests, self.digests)
+        np.testing.assert_allclose(weights, self.weights)
+
+    def test_digest_reduced_mod_plaintext(self):
+        vectors = pack_states([70000], [[1.0, 0.0, 0.0]], slot_count=SLOTS_PER_NODE, plaintext_modulus=65537)
+        self.assertEqual(vectors[0][0], 70000 - 65537)
+
+    def test_slot_count_too_small(self):
+        with self.assertRaises(ValueError):
+            pack_states(self.digests, self.weights, slot_count=3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import stat
+import tempfile
+import unittest
+from pyfhel import PyCtxt
+from src.config import ENCRYPTION_PARAMS
+from src.he_context import HEContextManager
+
+class TestHEContextManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'he')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def mode(self, path):
+        return stat.S_IMODE(os.stat(path).st_mode)
+
+    def test_keys_saved_and_loaded(self):
+        """Test keys written by one manager are loaded, not regenerated, by the next"""
+        manager = HEContextManager(self.cache_dir)
+        he = manager.get_keyed_context()
+        ciphertext = he.encryptFrac(2.5).to_bytes()
+        key_dir = os.path.join(self.cache_dir, manager.params_key(ENCRYPTION_PARAMS))
+        self.assertEqual(sorted(os.listdir(key_dir)), ['context', 'public_key', 'secret_key'])
+        self.assertEqual(self.mode(self.cache_dir), 0o700)
+        self.assertEqual(self.mode(key_dir), 0o700)
+        self.assertEqual(self.mode(os.path.join(key_dir, 'secret_key')), 0o600)
+
+        restarted = HEContextManager(self.cache_dir)
+        with self.assertLogs(level='INFO') as logs:
+            loaded = restarted.get_keyed_context()
+        self.assertTrue(any('Loaded HE keys' in line for line in logs.output))
+        self.assertAlmostEqual(loaded.decryptFrac(PyCtxt(pyfhel=loaded, bytestring=ciphertext)), 2.5, places=2)
+
+    def test_context_shared_per_parameter_set(self):
+        manager = HEContextManager(self.cache_dir)
+        self.assertIs(manager.get_context(), manager.get_keyed_context())
+        other = dict(ENCRYPTION_PARAMS, m=4096)
+        self.assertNotEqual(manager.params_key(other), manager.params_key(ENCRYPTION_PARAMS))
+
+    def test_no_cache_dir_writes_nothing(self):
+        cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        try:
+            HEContextManager(cache_dir='').get_keyed_context()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+if __name__ == '__main__':
+    unittest.main()
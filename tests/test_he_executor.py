@@ -0,0 +1,94 @@
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+import numpy as np
+from pyfhel import PyCtxt
+from src.config import ENCRYPTION_PARAMS
+from src.he_context import HEContextManager
+from src.he_executor import HEExecutor
+
+class BrokenPool:
+    """Process pool whose workers have died."""
+    def __init__(self, **kwargs):
+        pass
+
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True):
+        pass
+
+class TestHEExecutor(unittest.TestCase):
+    def setUp(self):
+        self.cache = tempfile.TemporaryDirectory()
+        self.manager = HEContextManager(self.cache.name)
+        self.executor = HEExecutor(max_workers=1, manager=self.manager)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.cache.cleanup()
+
+    def roundtrip(self, value):
+        async def run():
+            ciphertext = await self.executor.encrypt_frac(value)
+            return ciphertext, await self.executor.decrypt_frac(ciphertext)
+        return asyncio.run(run())
+
+    def test_roundtrip_through_pool(self):
+        """Test values encrypted in a worker decrypt in workers and in this process"""
+        ciphertext, value = self.roundtrip(3.25)
+        self.assertAlmostEqual(value, 3.25, places=2)
+        self.assertIsNotNone(self.executor._pool)
+        self.assertFalse(self.executor.fallback)
+        he = self.manager.get_keyed_context(ENCRYPTION_PARAMS)
+        self.assertAlmostEqual(he.decryptFrac(PyCtxt(pyfhel=he, bytestring=ciphertext)), 3.25, places=2)
+
+        async def vector_roundtrip():
+            ciphertext = await self.executor.encrypt_int_vector(np.arange(4))
+            return await self.executor.decrypt_int_vector(ciphertext)
+        np.testing.assert_array_equal(np.asarray(asyncio.run(vector_roundtrip()))[:4], np.arange(4))
+
+    def test_fallback_when_pool_cannot_start(self):
+        with mock.patch('src.he_executor.ProcessPoolExecutor', side_effect=OSError("no processes")):
+            _, value = self.roundtrip(1.5)
+        self.assertAlmostEqual(value, 1.5, places=2)
+        self.assertTrue(self.executor.fallback)
+        self.assertIsNone(self.executor._pool)
+
+    def test_fallback_when_worker_dies(self):
+        with mock.patch('src.he_executor.ProcessPoolExecutor', BrokenPool):
+            _, value = self.roundtrip(2.5)
+        self.assertAlmostEqual(value, 2.5, places=2)
+        self.assertTrue(self.executor.fallback)
+        self.assertIsNone(self.executor._pool)
+
+    def test_fallback_without_cache_dir(self):
+        executor = HEExecutor(max_workers=1, manager=HEContextManager(cache_dir=None))
+        try:
+            value = asyncio.run(executor.encrypt_frac(0.5))
+            self.assertIsInstance(value, bytes)
+            self.assertTrue(executor.fallback)
+        finally:
+            executor.shutdown()
+
+    def test_shutdown(self):
+        self.roundtrip(1.0)
+        pool = self.executor._pool
+        self.executor.shutdown()
+        self.assertIsNone(self.executor._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(abs, -1)
+        self.executor.shutdown()
+        # The next call starts a new pool
+        _, value = self.roundtrip(4.0)
+        self.assertAlmostEqual(value, 4.0, places=2)
+        self.assertIsNot(self.executor._pool, pool)
+
+    def test_unregistered_params(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(self.executor.encrypt_frac(1.0, params=dict(ENCRYPTION_PARAMS, m=4096)))
+
+if __name__ == '__main__':
+    unittest.main()
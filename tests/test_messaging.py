@@ -1,6 +1,10 @@
 import unittest
 import asyncio
-from src.messaging import MessageBroker, Message
+import dataclasses
+import tempfile
+import numpy as np
+from src.messaging import MessageBroker, Message, SubscriberQueue
+from src.offline_store import OfflineStore
 
 class TestMessageBroker(unittest.TestCase):
     def setUp(self):
@@ -67,7 +71,7 @@ class TestMessageBroker(unittest.TestCase):
             
             self.assertIn(2, self.broker.message_buffer)
             self.assertEqual(
-                len(self.broker.message_buffer[2]), 1
+                self.broker.message_buffer.pending(2), 1
             )
             
             queue = await self.broker.subscribe(2)
@@ -78,3 +82,241 @@ class TestMessageBroker(unittest.TestCase):
             self.assertNotIn(2, self.broker.message_buffer)
             
         self.loop.run_until_complete(test())
+
+    def test_bounded_queue_drop_oldest(self):
+        async def test():
+            queue = await self.broker.subscribe(1, capacity=3, policy='drop_oldest')
+            for i in range(5):
+                await self.broker.broadcast(0, "consensus", {"round": i})
+            self.assertEqual([queue.get_nowait().payload["round"] for _ in range(3)], [2, 3, 4])
+            self.assertEqual(queue.dropped, 2)
+            
+        self.loop.run_until_complete(test())
+        
+    def test_bounded_queue_drop_newest(self):
+        async def test():
+            queue = await self.broker.subscribe(1, capacity=3, policy='drop_newest')
+            for i in range(5):
+                await self.broker.broadcast(0, "consensus", {"round": i})
+            self.assertEqual([queue.get_nowait().payload["round"] for _ in range(3)], [0, 1, 2])
+            self.assertEqual(queue.dropped, 2)
+            
+        self.loop.run_until_complete(test())
+        
+    def test_bounded_queue_coalesce(self):
+        async def test():
+            queue = await self.broker.subscribe(1, capacity=2, policy='coalesce')
+            await self.broker.broadcast(0, "consensus", {"round": 0})
+            await self.broker.broadcast(0, "influence", {"influence": {}})
+            await self.broker.broadcast(0, "consensus", {"round": 1})
+            self.assertEqual(queue.coalesced, 1)
+            first = queue.get_nowait()
+            self.assertEqual((first.message_type, first.payload["round"]), ("consensus", 1))
+            await self.broker.broadcast(0, "consensus", {"round": 2})
+            self.assertEqual(queue.get_nowait().message_type, "influence")
+            self.assertEqual(queue.get_nowait().payload["round"], 2)
+            await self.broker.broadcast(0, "probe", {})
+            await self.broker.broadcast(0, "consensus", {"round": 3})
+            await self.broker.broadcast(0, "influence", {})
+            self.assertEqual(queue.dropped, 1)
+            self.assertEqual(queue.get_nowait().message_type, "consensus")
+            
+        self.loop.run_until_complete(test())
+        
+    def test_bounded_queue_block(self):
+        async def test():
+            queue = await self.broker.subscribe(1, capacity=1, policy='block')
+            await self.broker.broadcast(0, "consensus", {"round": 0})
+            publisher = asyncio.ensure_future(self.broker.broadcast(0, "consensus", {"round": 1}))
+            await asyncio.sleep(0)
+            self.assertFalse(publisher.done())
+            self.assertEqual(queue.get_nowait().payload["round"], 0)
+            await publisher
+            self.assertEqual(queue.get_nowait().payload["round"], 1)
+            self.assertEqual(queue.dropped, 0)
+            
+        self.loop.run_until_complete(test())
+        
+    def test_queue_status(self):
+        async def test():
+            await self.broker.subscribe(1, capacity=2)
+            await self.broker.subscribe(2, capacity=10)
+            for i in range(4):
+                await self.broker.broadcast(0, "consensus", {"round": i})
+            status = self.broker.get_buffer_status()
+            self.assertEqual(status['queued_messages'], 6)
+            self.assertEqual(status['dropped_messages'], 2)
+            self.assertEqual(status['queues'][1][0]['depth'], 2)
+            self.assertEqual(status['queues'][2][0]['high_water'], 4)
+            
+        self.loop.run_until_complete(test())
+        
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            MessageBroker(overflow_policy='spill')
+        with self.assertRaises(ValueError):
+            SubscriberQueue(4, 'spill')
+
+    def test_topic_routing(self):
+        async def test():
+            consensus = await self.broker.subscribe(1, topics=['consensus'])
+            influence = await self.broker.subscribe(2, topics=['influence'])
+            everything = await self.broker.subscribe(3)
+            await self.broker.broadcast(0, "consensus", {"round": 0})
+            await self.broker.broadcast(0, "influence", {"influence": {}})
+            self.assertEqual(consensus.get_nowait().message_type, "consensus")
+            self.assertTrue(consensus.empty())
+            self.assertEqual(influence.get_nowait().message_type, "influence")
+            self.assertTrue(influence.empty())
+            self.assertEqual(everything.qsize(), 2)
+            
+            # Addressed messages ignore topics
+            await self.broker.publish(Message.create(0, 2, "consensus", {}))
+            self.assertEqual(influence.get_nowait().message_type, "consensus")
+            
+            await self.broker.unsubscribe(1, consensus)
+            await self.broker.broadcast(0, "consensus", {"round": 1})
+            self.assertTrue(consensus.empty())
+            self.assertEqual(self.broker.get_buffer_status()['topic_subscriptions'], {'influence': 1})
+            
+        self.loop.run_until_complete(test())
+
+    def test_broadcast_shares_frozen_message(self):
+        async def test():
+            queues = [await self.broker.subscribe(i) for i in range(3)]
+            await self.broker.broadcast(0, "consensus", {"round": 0})
+            messages = [queue.get_nowait() for queue in queues]
+            self.assertTrue(all(message is messages[0] for message in messages))
+            with self.assertRaises(dataclasses.FrozenInstanceError):
+                messages[0].message_type = "influence"
+            with self.assertRaises(TypeError):
+                messages[0].payload["round"] = 1
+            
+        self.loop.run_until_complete(test())
+
+    def test_message_copies_payload(self):
+        payload = {"round": 0}
+        message = Message.create(0, 1, "consensus", payload)
+        payload["round"] = 1
+        payload["extra"] = True
+        self.assertEqual(dict(message.payload), {"round": 0})
+        
+    def test_slow_handlers_do_not_stall_publish(self):
+        async def test():
+            broker = MessageBroker(handler_concurrency=2)
+            running = []
+            peak = []
+            
+            async def slow_handler(message):
+                running.append(message)
+                peak.append(len(running))
+                await asyncio.sleep(0.05)
+                running.remove(message)
+                
+            broker.register_handler("consensus", slow_handler)
+            start = self.loop.time()
+            for i in range(6):
+                await broker.broadcast(0, "consensus", {"round": i})
+            self.assertLess(self.loop.time() - start, 0.05)
+            await broker.drain_handlers()
+            self.assertEqual(len(peak), 6)
+            self.assertEqual(max(peak), 2)
+            
+        self.loop.run_until_complete(test())
+        
+    def test_handler_errors_logged(self):
+        async def test():
+            async def failing_handler(message):
+                raise RuntimeError("boom")
+                
+            self.broker.register_handler("consensus", failing_handler)
+            with self.assertLogs('src.messaging', level='ERROR'):
+                await self.broker.broadcast(0, "consensus", {})
+                await self.broker.drain_handlers()
+            
+        self.loop.run_until_complete(test())
+        
+    def test_publish_latency_percentiles(self):
+        async def test():
+            self.assertEqual(self.broker.publish_latency_percentiles(), {})
+            await self.broker.subscribe(1)
+            for i in range(10):
+                await self.broker.broadcast(0, "consensus", {"round": i})
+            latency = self.broker.get_buffer_status()['publish_latency']
+            self.assertLessEqual(latency['p50'], latency['p99'])
+            self.assertLessEqual(latency['p99'], latency['max'])
+            
+        self.loop.run_until_complete(test())
+
+    def test_offline_replay_after_spill(self):
+        async def test():
+            with tempfile.TemporaryDirectory() as spill_dir:
+                store = OfflineStore(Message.to_bytes, Message.from_buffer, memory_cap=10, spill_dir=spill_dir)
+                broker = MessageBroker(offline_store=store)
+                for i in range(25):
+                    await broker.publish(Message.create(0, 7, "consensus", {"round": i}))
+                status = broker.get_buffer_status()
+                self.assertEqual(status['total_buffered_messages'], 25)
+                self.assertLessEqual(status['offline']['in_memory'], 10)
+                
+                queue = await broker.subscribe(7, capacity=0)
+                await broker.deliver_buffered_messages(7, queue)
+                self.assertEqual([queue.get_nowait().payload["round"] for _ in range(25)], list(range(25)))
+                self.assertNotIn(7, broker.message_buffer)
+                self.assertEqual(broker.get_buffer_status()['offline']['segments'], 1)
+                broker.close()
+            
+        self.loop.run_until_complete(test())
+        
+    def test_unencodable_offline_message_does_not_fail_publish(self):
+        async def test():
+            with tempfile.TemporaryDirectory() as spill_dir:
+                store = OfflineStore(Message.to_bytes, Message.from_buffer, memory_cap=2, spill_dir=spill_dir)
+                broker = MessageBroker(offline_store=store)
+                await broker.publish(Message.create(0, 7, "status", {"node_id": np.int64(3)}))
+                await broker.publish(Message.create(0, 7, "x" * 300, {"round": 1}))
+                for i in range(3):
+                    await broker.publish(Message.create(0, 7, "consensus", {"round": i}))
+                status = broker.get_buffer_status()['offline']
+                self.assertEqual(status['dropped'], 2)
+                self.assertEqual(status['on_disk'] + status['in_memory'], 3)
+                queue = await broker.subscribe(7, capacity=0)
+                await broker.deliver_buffered_messages(7, queue)
+                self.assertEqual([queue.get_nowait().payload["round"] for _ in range(3)], [0, 1, 2])
+                broker.close()
+
+        self.loop.run_until_complete(test())
+
+    def test_offline_messages_expire_without_reconnect(self):
+        async def test():
+            now = [1000.0]
+            with tempfile.TemporaryDirectory() as spill_dir:
+                store = OfflineStore(Message.to_bytes, Message.from_buffer, ttl=60.0, memory_cap=10,
+                                     spill_dir=spill_dir, expire_every=16, clock=lambda: now[0])
+                broker = MessageBroker(offline_store=store)
+                for i in range(40):
+                    await broker.publish(Message.create(0, 7, "consensus", {"round": i}))
+                self.assertEqual(broker.get_buffer_status()['total_buffered_messages'], 40)
+                now[0] += 61
+                for i in range(16):
+                    await broker.publish(Message.create(0, 8, "consensus", {"round": i}))
+                status = broker.get_buffer_status()
+                self.assertNotIn(7, broker.message_buffer)
+                self.assertEqual(status['offline']['expired'], 40)
+                self.assertEqual(status['total_buffered_messages'], 16)
+                broker.close()
+
+        self.loop.run_until_complete(test())
+
+    def test_replay_into_block_queue(self):
+        async def test():
+            for i in range(3):
+                await self.broker.publish(Message.create(0, 4, "consensus", {"round": i}))
+            queue = await self.broker.subscribe(4, capacity=2, policy='block')
+            replay = asyncio.ensure_future(self.broker.deliver_buffered_messages(4, queue))
+            await asyncio.sleep(0)
+            self.assertEqual(queue.get_nowait().payload["round"], 0)
+            await replay
+            self.assertEqual([queue.get_nowait().payload["round"] for _ in range(2)], [1, 2])
+            
+        self.loop.run_until_complete(test())
@@ -1,5 +1,24 @@
 import unittest
-from src.ouroboros_node import OuroborosNode, MindState
+import asyncio
+import random
+import tempfile
+import numpy as np
+from src.config import GOSSIP_EPOCH_ROUNDS
+from src.gossip import GossipDigest
+from src.ouroboros_node import OuroborosNode, MindState, he_manager
+from src.population import NodePopulation
+from src.messaging import Message, MessageBroker
+
+_he_cache = None
+
+def setUpModule():
+    # Keep generated HE keys out of the user's cache
+    global _he_cache
+    _he_cache = tempfile.TemporaryDirectory()
+    he_manager.cache_dir = _he_cache.name
+
+def tearDownModule():
+    _he_cache.cleanup()
 
 class TestOuroborosNode(unittest.TestCase):
     def setUp(self):
@@ -19,6 +38,17 @@ class TestOuroborosNode(unittest.TestCase):
         self.assertIn('utilitarian', insight)
         self.assertEqual(len(self.node.conceptual_memory), 1)
 
+    def test_batched_ticks_match_node_ticks(self):
+        """Test a population tick leaves the memory and digest OuroborosNode.tick builds"""
+        population = NodePopulation()
+        population.add_nodes([7, 8], ['utilitarian', 'virtue'])
+        for _ in range(70):
+            self.node.tick()
+            population.tick()
+        self.assertEqual(population.conceptual_memory(0), list(self.node.conceptual_memory))
+        self.assertEqual(population.state_digests().tolist()[0], self.node.state_digest())
+        self.assertNotEqual(population.state_digests().tolist()[1], self.node.state_digest())
+
     def test_state_encryption(self):
         """Test state encryption functionality"""
         self.node.generate_insight()
@@ -26,5 +56,165 @@ class TestOuroborosNode(unittest.TestCase):
         self.assertIn('encrypted_state', encrypted_state)
         self.assertIn('timestamp', encrypted_state)
 
+    def test_ethical_bounds_report_crisis(self):
+        """Test check_ethical_bounds returns True on crisis, like CompactNode"""
+        self.assertFalse(self.node.check_ethical_bounds())
+        self.node.apply_observer_influence({'utilitarian': 5.0})
+        self.assertTrue(self.node.check_ethical_bounds())
+        self.assertEqual(self.node.state, MindState.ETHICAL_CRISIS)
+
+    def test_shared_encryption_context(self):
+        """Test nodes share one lazily keyed encryption context"""
+        other = OuroborosNode(node_id=2, domain_seed='virtue')
+        self.assertIsNone(other._he)
+        self.assertIs(self.node.he, other.he)
+
+    def test_message_batch_drain(self):
+        """Test queued messages are drained in one batch once a queue is attached"""
+        batches = []
+
+        async def record(batch):
+            batches.append(batch)
+
+        async def test():
+            self.node._handle_messages = record
+            task = asyncio.create_task(self.node.process_messages())
+            await asyncio.sleep(0)
+            queue = asyncio.Queue()
+            for i in range(3):
+                queue.put_nowait(i)
+            self.node.message_queue = queue
+            await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(test())
+        self.assertEqual(batches, [[0, 1, 2]])
+
+    def test_connect_subscribes_to_handled_topics(self):
+        async def test():
+            broker = MessageBroker()
+            await self.node.connect(broker)
+            await broker.broadcast(0, 'metrics', {'cpu': 1.0})
+            await broker.broadcast(0, 'influence', {'influence': {'virtue': 0.2}})
+            self.assertEqual(self.node.message_queue.qsize(), 1)
+            await self.node._handle_message(self.node.message_queue.get_nowait())
+
+        before = self.node.ethical_weights['virtue']
+        asyncio.run(test())
+        self.assertNotEqual(self.node.ethical_weights['virtue'], before)
+
+    def test_handle_binary_frame(self):
+        message = Message.create(0, 1, 'influence', {'influence': {'virtue': 0.2}})
+        before = self.node.ethical_weights['virtue']
+        asyncio.run(self.node._handle_message(memoryview(message.to_bytes())))
+        self.assertNotEqual(self.node.ethical_weights['virtue'], before)
+
+    def test_trust_weighted_consensus(self):
+        peers = [OuroborosNode(i, "virtue") for i in range(1, 5)]
+        peers[3].recursion_depth = 1000
+        states = [peer.get_verifiable_state() for peer in peers]
+        self.node.update_trust_score(4, False)
+        self.node.update_trust_score(4, False)
+        consensus = self.node._compute_consensus(states, method='mean')
+        self.assertAlmostEqual(consensus['recursion_depth'], 1000 * 0.6 / 3.6)
+        for key, weight in peers[0].ethical_weights.items():
+            self.assertAlmostEqual(consensus['ethical_weights'][key], weight)
+        self.assertEqual(self.node._compute_consensus(states, method='median')['recursion_depth'], 0)
+
+    def test_consensus_modes(self):
+        nodes = [OuroborosNode(i, "virtue") for i in range(6)]
+        for i, node in enumerate(nodes):
+            node.recursion_depth = i
+            node.peers = [peer for peer in nodes if peer is not node]
+        consensus = asyncio.run(nodes[0].participate_in_consensus(mode='all_to_all'))
+        self.assertAlmostEqual(consensus['recursion_depth'], 3.0)
+        for _ in range(40):
+            for node in nodes:
+                asyncio.run(node.participate_in_consensus(mode='gossip'))
+        for node in nodes:
+            self.assertAlmostEqual(node.consensus_state['recursion_depth'], 2.5, places=3)
+        with self.assertRaises(ValueError):
+            asyncio.run(nodes[0].participate_in_consensus(mode='flood'))
+
+    def test_gossip_epochs_follow_state_changes(self):
+        population = NodePopulation()
+        nodes = [OuroborosNode(i, "virtue", population) for i in range(6)]
+        for i, node in enumerate(nodes):
+            node.recursion_depth = i
+            node.peers = [peer for peer in nodes if peer is not node]
+        rng = random.Random(0)
+        for _ in range(GOSSIP_EPOCH_ROUNDS):
+            for node in nodes:
+                node._gossip_round(rng)
+        self.assertAlmostEqual(nodes[0].consensus_state['recursion_depth'], 2.5, places=3)
+        # Node 5 loses the trust of every peer and jumps ahead; later epochs pick both up
+        for peer in nodes[:5]:
+            peer.update_trust_score(5, False)
+            peer.update_trust_score(5, False)
+        nodes[5].recursion_depth = 11
+        for _ in range(2 * GOSSIP_EPOCH_ROUNDS):
+            for node in nodes:
+                node._gossip_round(rng)
+        for node in nodes:
+            self.assertGreater(node._gossip.epoch, 0)
+            self.assertAlmostEqual(node.consensus_state['recursion_depth'], (10 + 11 * 0.6) / 5.6, places=3)
+
+    def test_stale_gossip_epoch_is_dropped(self):
+        self.node.reset_gossip(epoch=2)
+        before = self.node._gossip
+        self.node.receive_gossip(GossipDigest(np.ones(4), 1.0, epoch=1))
+        self.assertIs(self.node._gossip, before)
+        self.node.receive_gossip(GossipDigest(np.zeros(4), 1.0, epoch=3))
+        self.assertEqual((self.node._gossip.epoch, self.node._gossip.weight), (3, 2.0))
+
+    def test_hierarchical_consensus(self):
+        nodes = [OuroborosNode(i, "virtue") for i in range(12)]
+        for i, node in enumerate(nodes):
+            node.recursion_depth = i
+            node.peers = [peer for peer in nodes if peer is not node]
+        consensus = asyncio.run(nodes[0]._hierarchical_round(committee_size=4))
+        self.assertAlmostEqual(consensus['recursion_depth'], 5.5)
+        self.assertEqual(len(nodes[0].consensus_state), 2)
+        self.assertEqual(asyncio.run(nodes[0].participate_in_consensus(mode='hierarchical')), consensus)
+
+    def test_hierarchical_round_is_committee_local(self):
+        fetches = []
+
+        class CountingNode(OuroborosNode):
+            async def fetch_verifiable_state(self):
+                fetches.append(self.node_id)
+                return self.get_verifiable_state()
+
+        nodes = [CountingNode(i, "virtue") for i in range(40)]
+        for i, node in enumerate(nodes):
+            node.recursion_depth = i
+            node.peers = [peer for peer in nodes if peer is not node]
+        # Only the lowest id node drives a round
+        self.assertIsNone(asyncio.run(nodes[7]._hierarchical_round(committee_size=3)))
+        self.assertEqual(fetches, [])
+        consensus = asyncio.run(nodes[0]._hierarchical_round(committee_size=3))
+        self.assertAlmostEqual(consensus['recursion_depth'], 19.5)
+        # Every node answered its own committee leader once, and leaders were never asked
+        self.assertEqual(len(fetches), len(set(fetches)))
+        self.assertEqual(len(fetches), 40 - 14)
+        for node in nodes:
+            self.assertEqual(node.consensus_state, consensus)
+        self.assertEqual(asyncio.run(nodes[7]._hierarchical_round(committee_size=3)), consensus)
+
+    def test_quorum_round_scores_peers(self):
+        class SlowNode(OuroborosNode):
+            async def fetch_verifiable_state(self):
+                await asyncio.sleep(30)
+
+        class ForgingNode(OuroborosNode):
+            async def fetch_verifiable_state(self):
+                return dict(self.get_verifiable_state(), proof='0' * 64)
+
+        self.node.peers = [OuroborosNode(i, "virtue") for i in (1, 2, 3, 6)] + [SlowNode(4, "virtue"), ForgingNode(5, "virtue")]
+        self.assertIsNotNone(asyncio.run(self.node.participate_in_consensus(mode='all_to_all')))
+        self.assertEqual(set(self.node.peer_latency), {1, 2, 3, 5, 6})
+        self.assertEqual(self.node.trust_store.get(self.node.node_id, 5), 0.8)
+        self.assertEqual(self.node.trust_store.get(self.node.node_id, 4), 1.0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+from src.offline_store import OfflineStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestOfflineStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_store(self, **kwargs):
+        options = dict(buffer_size=100, ttl=60.0, memory_cap=1000, spill_dir=self.directory.name, clock=self.clock)
+        options.update(kwargs)
+        return OfflineStore(lambda item: item.encode(), lambda data: bytes(data).decode(), **options)
+
+    def test_ring_drops_oldest(self):
+        store = self.make_store(buffer_size=3)
+        for i in range(5):
+            store.add(1, f"m{i}")
+        self.assertEqual(store.pending(1), 3)
+        self.assertEqual(store.dropped, 2)
+        self.assertEqual(store.drain(1), ["m2", "m3", "m4"])
+        self.assertNotIn(1, store)
+
+    def test_ttl_expiry(self):
+        store = self.make_store()
+        store.add(1, "old")
+        self.clock.now += 30
+        store.add(1, "new")
+        self.clock.now += 40
+        self.assertEqual(store.drain(1), ["new"])
+        self.assertEqual(store.expired, 1)
+
+    def test_memory_cap_spills_largest_ring(self):
+        store = self.make_store(memory_cap=10)
+        for i in range(8):
+            store.add(1, f"a{i}")
+        for i in range(3):
+            store.add(2, f"b{i}")
+        stats = store.stats()
+        self.assertEqual((stats['in_memory'], stats['on_disk'], stats['spilled']), (3, 8, 8))
+        store.add(1, "a8")
+        self.assertEqual(store.drain(1), [f"a{i}" for i in range(9)])
+        self.assertEqual(store.drain(2), ["b0", "b1", "b2"])
+        self.assertEqual(store.stats()['on_disk'], 0)
+        store.close()
+
+    def test_buffer_size_caps_ring_and_disk(self):
+        store = self.make_store(buffer_size=5, memory_cap=10)
+        for i in range(3000):
+            store.add(1, f"a{i}")
+            store.add(i % 7 + 2, f"b{i}")
+        self.assertEqual(store.pending(1), 5)
+        self.assertLessEqual(store.stats()['in_memory'], 10)
+        self.assertEqual(store.drain(1), [f"a{i}" for i in range(2995, 3000)])
+        self.assertTrue(all(store.pending(recipient) <= 5 for recipient in range(2, 9)))
+        store.close()
+
+    def test_spills_longest_ring(self):
+        store = self.make_store(memory_cap=6)
+        for recipient, count in ((1, 2), (2, 4), (3, 1)):
+            for i in range(count):
+                store.add(recipient, f"{recipient}-{i}")
+        self.assertEqual(store.stats()['on_disk'], 4)
+        self.assertEqual(store.pending(2), 4)
+        self.assertNotIn(2, store._rings)
+        store.close()
+
+    def test_unencodable_item_dropped_on_spill(self):
+        def encode(item):
+            if item == "bad":
+                raise TypeError("not serializable")
+            return item.encode()
+        store = self.make_store(memory_cap=3)
+        store.encode = encode
+        for item in ("a", "bad", "b", "c"):
+            store.add(1, item)
+        stats = store.stats()
+        self.assertEqual((stats['on_disk'], stats['dropped']), (3, 1))
+        self.assertEqual(store.drain(1), ["a", "b", "c"])
+        store.close()
+
+    def test_segments_roll_over_and_are_deleted(self):
+        store = self.make_store(memory_cap=1, segment_bytes=64)
+        for i in range(20):
+            store.add(i % 2, "x" * 20)
+        self.assertGreater(store.stats()['segments'], 2)
+        directory = store._directory
+        store.drain(0)
+        store.drain(1)
+        # Only the active segment is left
+        self.assertEqual(len(os.listdir(directory)), 1)
+        store.close()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_expire_sweeps_memory_and_disk(self):
+        store = self.make_store(memory_cap=5)
+        for i in range(8):
+            store.add(1, f"m{i}")
+        self.clock.now += 61
+        store.add(2, "fresh")
+        self.assertEqual(store.expire(), 8)
+        self.assertNotIn(1, store)
+        self.assertEqual(store.stats()['on_disk'], 0)
+        self.assertEqual(store.drain(2), ["fresh"])
+        store.close()
+
+    def test_add_sweeps_expired_periodically(self):
+        store = self.make_store(memory_cap=5, expire_every=10)
+        for i in range(8):
+            store.add(1, f"m{i}")
+        self.clock.now += 61
+        store.add(2, "n0")
+        self.assertIn(1, store)
+        # The tenth add sweeps recipient 1, which never comes back
+        store.add(2, "n1")
+        self.assertNotIn(1, store)
+        stats = store.stats()
+        self.assertEqual((stats['on_disk'], stats['expired']), (0, 8))
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from src.population import NodePopulation, MindState, ETHICAL_FRAMEWORKS, memory_digest
+
+class TestNodePopulation(unittest.TestCase):
+    def setUp(self):
+        self.population = NodePopulation(capacity=2)
+        self.rows = self.population.add_nodes(range(5), ['utilitarian'] * 5)
+
+    def test_growth_preserves_rows(self):
+        """Test that adding past capacity keeps existing state"""
+        self.population.recursion_depth[0] = 7
+        row = self.population.add_node(5, 'virtue')
+        self.assertEqual(row, 5)
+        self.assertEqual(len(self.population), 6)
+        self.assertEqual(self.population.recursion_depth[0], 7)
+        self.assertEqual(self.population.domains[row], 'virtue')
+
+    def test_observer_influence_normalizes(self):
+        """Test batched influence matches the per-node rule"""
+        influence = {'utilitarian': 0.05, 'deontological': -0.05}
+        self.population.apply_observer_influence(influence)
+        expected = np.array([1.05, 0.95, 1.0]) / 3.0
+        np.testing.assert_allclose(self.population.weights, np.tile(expected, (5, 1)))
+
+    def test_influence_on_subset(self):
+        """Test influence only touches the selected rows"""
+        self.population.apply_observer_influence({'virtue': 0.5}, rows=[1])
+        self.assertGreater(self.population.weights[1, 2], self.population.weights[0, 2])
+        self.assertAlmostEqual(self.population.weights[0].sum(), 0.99)
+
+    def test_ethical_crisis_detection(self):
+        """Test crisis detection only flags deviating rows"""
+        self.population.set_weights(2, {'utilitarian': 0.9, 'deontological': 0.05, 'virtue': 0.05})
+        crisis = self.population.check_ethical_bounds()
+        self.assertEqual(crisis.tolist(), [2])
+        self.assertEqual(self.population.get_state(2), MindState.ETHICAL_CRISIS)
+        self.assertEqual(self.population.check_ethical_bounds().tolist(), [])
+
+    def test_insight_tick(self):
+        """Test insight ticks skip inactive nodes and respect the limit"""
+        self.population.set_state(0, MindState.NEURAL_ANNEALING)
+        self.population.recursion_depth[1] = 3
+        advanced = self.population.tick_insights(recursion_limit=3)
+        self.assertEqual(advanced.tolist(), [2, 3, 4])
+        self.assertEqual(self.population.recursion_depth.tolist(), [0, 3, 1, 1, 1])
+
+    def test_state_digests_follow_depth(self):
+        """Test digests depend on domain and depth only"""
+        self.population.add_node(5, 'virtue')
+        self.population.recursion_depth[:] = [3, 3, 0, 70, 3, 3]
+        digests = self.population.state_digests()
+        self.assertEqual(digests[0], digests[1])
+        self.assertNotEqual(digests[0], digests[5])
+        self.assertEqual(digests.tolist(), [
+            memory_digest(domain, int(depth))
+            for domain, depth in zip(self.population.domains, self.population.recursion_depth)
+        ])
+        self.assertEqual(self.population.state_digests([3]).tolist(), [digests[3]])
+        self.assertEqual(len(self.population.conceptual_memory(3)), 64)
+        self.assertEqual(self.population.conceptual_memory(3)[-1], 'utilitarian_insight_69')
+
+    def test_weights_dict_roundtrip(self):
+        weights = {'utilitarian': 0.2, 'deontological': 0.3, 'virtue': 0.5}
+        self.population.set_weights(4, weights)
+        self.assertEqual(list(self.population.get_weights(4)), list(ETHICAL_FRAMEWORKS))
+        self.assertAlmostEqual(self.population.get_weights(4)['virtue'], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import secrets
+import unittest
+from src.quorum import QuorumRound, quorum_size
+from src.zkp import ZKPVerifier
+
+class FakePeer:
+    verifier = ZKPVerifier()
+
+    def __init__(self, node_id: int, delay: float = 0.0, valid: bool = True, claimed_id: int = None):
+        self.node_id = node_id
+        self.delay = delay
+        self.valid = valid
+        self.claimed_id = node_id if claimed_id is None else claimed_id
+
+    async def fetch_verifiable_state(self):
+        await asyncio.sleep(self.delay)
+        state = {'node_id': self.claimed_id, 'recursion_depth': 1}
+        nonce = secrets.token_hex(16)
+        proof = self.verifier.create_proof(state, nonce) if self.valid else '0' * 64
+        return {'state': state, 'proof': proof, 'nonce': nonce}
+
+class TestQuorumRound(unittest.TestCase):
+    def collect(self, peers, timeout=2.0):
+        return asyncio.run(QuorumRound(timeout=timeout).collect(peers))
+
+    def test_quorum_size(self):
+        self.assertEqual([quorum_size(n) for n in (0, 1, 3, 4, 9)], [0, 1, 2, 3, 6])
+
+    def test_completes_without_stragglers(self):
+        peers = [FakePeer(i, 0.01) for i in range(5)] + [FakePeer(5, 30.0)]
+        result = self.collect(peers)
+        self.assertTrue(result.reached)
+        self.assertGreaterEqual(len(result.states), 4)
+        self.assertIn(5, result.cancelled)
+        self.assertLess(result.elapsed, 1.0)
+        self.assertEqual(result.timed_out, [])
+
+    def test_deadline(self):
+        peers = [FakePeer(0, 0.01), FakePeer(1, 30.0), FakePeer(2, 30.0)]
+        result = self.collect(peers, timeout=0.1)
+        self.assertFalse(result.reached)
+        self.assertEqual(result.verified, [0])
+        self.assertEqual(sorted(result.timed_out), [1, 2])
+        self.assertLess(result.elapsed, 1.0)
+
+    def test_invalid_responses(self):
+        peers = [FakePeer(0), FakePeer(1, valid=False), FakePeer(2, claimed_id=0), FakePeer(3, 30.0)]
+        result = self.collect(peers)
+        self.assertFalse(result.reached)
+        self.assertEqual(sorted(result.invalid), [1, 2])
+        # Quorum of 3 became unreachable, so the slow peer is cancelled instead of awaited
+        self.assertEqual(result.cancelled, [3])
+        self.assertLess(result.elapsed, 1.0)
+
+    def test_latencies_recorded(self):
+        result = self.collect([FakePeer(0, 0.05), FakePeer(1, 0.0)])
+        self.assertEqual(set(result.latencies), {0, 1})
+        self.assertGreater(result.latencies[0], result.latencies[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from src.rolling_digest import RollingDigest
+
+class TestRollingDigest(unittest.TestCase):
+    def test_incremental_matches_scratch(self):
+        """Test the rolling value equals a digest built over the current window"""
+        digest = RollingDigest(window=4)
+        items = [f"virtue_insight_{i}" for i in range(10)]
+        for i, item in enumerate(items):
+            digest.append(item)
+            window = items[max(0, i - 3):i + 1]
+            self.assertEqual(digest.value, RollingDigest.of(window, window=4).value)
+        self.assertEqual(len(digest), 4)
+
+    def test_order_sensitive(self):
+        a = RollingDigest.of(['x', 'y'])
+        b = RollingDigest.of(['y', 'x'])
+        self.assertNotEqual(a.value, b.value)
+
+    def test_deterministic_value(self):
+        """Test the digest does not depend on per-process hash salting"""
+        self.assertEqual(RollingDigest.of(['a']).value, RollingDigest.item_hash('a') % RollingDigest.MODULUS)
+        self.assertEqual(RollingDigest.of(['a', 'b']).value, 1824533272318015644)
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            RollingDigest(window=0)
+
+if __name__ == '__main__':
+    unittest.main()
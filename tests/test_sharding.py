@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from src.population import memory_digest
+from src.sharding import Shard, ShardedRunner, partition
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.boundaries = partition(10, 2)
+        self.shard = Shard(1, self.boundaries, ['virtue'] * 5, seed=0, traffic_rate=1.0)
+
+    def test_partition(self):
+        self.assertEqual(partition(10, 3), [0, 3, 6, 10])
+
+    def test_inbound_influence_replies_with_trust(self):
+        """Test influence on local targets yields trust verdicts for the senders"""
+        inbound = {
+            'influence': (np.array([0, 1]), np.array([5, 9]), np.array([[1.05, 1.0, 1.0], [9.0, 1.0, 1.0]])),
+            'trust': (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool))
+        }
+        result = self.shard.step(0, None, inbound)
+        senders, judges, success = result['outbound']['trust']
+        self.assertEqual(senders.tolist(), [0, 1])
+        self.assertEqual(judges.tolist(), [5, 9])
+        self.assertEqual(success.tolist(), [True, False])
+        self.assertAlmostEqual(self.shard.population.weights[4].sum(), 1.0)
+
+    def test_trust_verdicts_go_through_trust_store(self):
+        """Test verdicts become (judge, sender) edges and karma is the judges' mean trust"""
+        judges = np.array([0] * 5 + [1] + [0] * 3 + [2] * 10)
+        success = np.array([False] * 5 + [False] + [True] * 3 + [False] * 10)
+        inbound = {
+            'influence': (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, 3))),
+            'trust': (np.array([5] * 9 + [6] * 10), judges, success)
+        }
+        self.shard.step(0, None, inbound)
+        trust = self.shard.population.trust
+        # Clamped after every verdict: 1.0 -> 0.1 after five failures, then 0.4
+        self.assertAlmostEqual(trust.get(0, 5), 0.4)
+        self.assertAlmostEqual(trust.get(1, 5), 0.8)
+        self.assertAlmostEqual(trust.get(2, 6), 0.1)
+        karma = self.shard.population.recursive_karma
+        np.testing.assert_allclose(karma[:3], [0.6, 0.1, 1.0])
+
+    def test_repeated_influence_target_takes_every_factor(self):
+        inbound = {
+            'influence': (np.array([0, 1]), np.array([5, 5]), np.array([[2.0, 1.0, 1.0], [2.0, 1.0, 1.0]])),
+            'trust': (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool))
+        }
+        before = self.shard.population.weights[0].copy()
+        self.shard.step(0, None, inbound)
+        expected = before * [4.0, 1.0, 1.0]
+        np.testing.assert_allclose(self.shard.population.weights[0], expected / expected.sum())
+
+class TestShardedRunner(unittest.TestCase):
+    def test_ticks_and_consensus_across_shards(self):
+        with ShardedRunner(100, workers=2, seed=1, traffic_rate=0.1) as runner:
+            stats = runner.run(steps=3, ticks_per_step=2)
+        self.assertEqual(stats['node_ticks'], 600)
+        self.assertEqual(stats['consensus']['shards'], 2)
+        self.assertEqual(stats['consensus']['digest_sum'], 34 * memory_digest('deontological', 6)
+                         + 33 * (memory_digest('utilitarian', 6) + memory_digest('virtue', 6)))
+        self.assertAlmostEqual(stats['consensus']['recursion_depth'], 6.0)
+        self.assertAlmostEqual(sum(stats['consensus']['ethical_weights'].values()), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from src.simulation import DiscreteEventSimulation, EventScheduler, VirtualClock, build_network
+
+class TestEventScheduler(unittest.TestCase):
+    def test_events_fire_in_time_order(self):
+        clock = VirtualClock()
+        scheduler = EventScheduler(clock)
+        fired = []
+        scheduler.schedule(2.0, lambda: fired.append(('b', clock.now)))
+        scheduler.schedule(1.0, lambda: fired.append(('a', clock.now)))
+        scheduler.schedule(5.0, lambda: fired.append(('c', clock.now)))
+        scheduler.run_until(3.0)
+        self.assertEqual(fired, [('a', 1.0), ('b', 2.0)])
+        self.assertEqual(clock.now, 3.0)
+        self.assertEqual(len(scheduler), 1)
+
+class TestDiscreteEventSimulation(unittest.TestCase):
+    def _run(self, seed):
+        nodes = build_network(5, seed=seed)
+        simulation = DiscreteEventSimulation(nodes, seed=seed)
+        stats = simulation.run(60.0)
+        return stats, [(n.recursion_depth, n.ethical_weights, n.state) for n in nodes]
+
+    def test_runs_faster_than_wall_clock(self):
+        stats, _ = self._run(seed=1)
+        self.assertEqual(stats['consensus_rounds'], 12)
+        self.assertLess(stats['wall_seconds'], 60.0)
+
+    def test_reproducible_from_seed(self):
+        """Test identical seeds yield identical network state"""
+        self.assertEqual(self._run(seed=7)[1], self._run(seed=7)[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import random
+import unittest
+import numpy as np
+from src.trust_store import TrustStore
+
+def reference_scores(updates):
+    """The previous per-node rule: clamp to [0.1, 1.0] after every update."""
+    scores = {}
+    for owner, peer, success in updates:
+        current = scores.get((owner, peer), 1.0)
+        scores[(owner, peer)] = max(0.1, min(1.0, current + (0.1 if success else -0.2)))
+    return scores
+
+class TestTrustStore(unittest.TestCase):
+    def setUp(self):
+        self.store = TrustStore(buffer_size=16)
+
+    def test_matches_sequential_clamping(self):
+        rng = random.Random(0)
+        updates = [(rng.randrange(5), rng.randrange(5), rng.random() < 0.6) for _ in range(500)]
+        for owner, peer, success in updates[:250]:
+            self.store.update(owner, peer, success)
+        owners, peers, success = zip(*updates[250:])
+        self.store.update_batch(owners, peers, success)
+        for (owner, peer), score in reference_scores(updates).items():
+            self.assertAlmostEqual(self.store.get(owner, peer), score)
+
+    def test_reads_see_buffered_updates(self):
+        self.store.update(1, 2, False)
+        self.store.update(1, 2, False)
+        self.assertEqual(self.store.pending, 2)
+        self.assertAlmostEqual(self.store.get(1, 2), 0.6)
+        self.assertEqual(self.store.pending, 2)
+        self.assertEqual(self.store.get(1, 3), 1.0)
+        self.assertEqual(self.store.get(7, 2), 1.0)
+
+    def test_row_view(self):
+        self.store.update_batch([3, 3, 3, 4], [9, 1, 5, 9], [False, False, True, False])
+        peers, scores = self.store.row(3)
+        np.testing.assert_array_equal(peers, [1, 5, 9])
+        np.testing.assert_allclose(scores, [0.8, 1.0, 0.8])
+        self.assertEqual(len(self.store.row(100)[0]), 0)
+        self.assertEqual(self.store.nnz, 4)
+        np.testing.assert_allclose(self.store.scores(3, [9, 2, 1]), [0.8, 1.0, 0.8])
+
+    def test_set_scores_and_edges(self):
+        self.store.set_scores([2, 0, 2], [1, 4, 1], [0.5, 0.3, 0.7])
+        owners, peers, scores = self.store.edges()
+        np.testing.assert_array_equal(owners, [0, 2])
+        np.testing.assert_array_equal(peers, [4, 1])
+        np.testing.assert_allclose(scores, [0.3, 0.7])
+        self.store.update(2, 1, True)
+        self.assertAlmostEqual(self.store.get(2, 1), 0.8)
+
+    def test_inbound_means(self):
+        self.store.set_scores([0, 1, 2, 2, 5], [2, 2, 2, 0, 2], [0.4, 0.6, 0.1, 0.5, 0.2])
+        # Peer 2 is rated by owners 0 and 1 and, by default, 3; its self-trust and owner 5 are left out
+        np.testing.assert_allclose(self.store.inbound([0, 1, 2, 3], [2, 0, 9, 2]), [2 / 3, 5 / 6, 1.0, 2 / 3])
+        np.testing.assert_allclose(self.store.inbound([4], [4]), [1.0])
+
+    def test_invalid_ids(self):
+        with self.assertRaises(ValueError):
+            self.store.update(-1, 0, True)
+        with self.assertRaises(ValueError):
+            self.store.update(2 ** 31, 0, True)
+        with self.assertRaises(ValueError):
+            self.store.update(0, 2 ** 31, True)
+        self.assertEqual(self.store.pending, 0)
+        with self.assertRaises(ValueError):
+            self.store.update_batch([0], [2 ** 31], [True])
+        with self.assertRaises(ValueError):
+            self.store.update_batch([0, 1], [2], [True])
+
+if __name__ == '__main__':
+    unittest.main()
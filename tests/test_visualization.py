@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+from src.visualization import BackgroundRenderer, VisualizationSnapshot
+
+class RecordingVisualizer:
+    def __init__(self):
+        self.renders = []
+
+    def render(self, graph, nodes_data):
+        self.renders.append((graph.number_of_nodes(), len(nodes_data)))
+
+def snapshot(timestamp, node_ids, depth=0):
+    return VisualizationSnapshot(timestamp, tuple(
+        {'node_id': i, 'recursion_depth': depth, 'state': 'ACTIVE_RECURSION',
+         'ethical_weights': {'utilitarian': 0.2, 'deontological': 0.3, 'virtue': 0.5}}
+        for i in node_ids
+    ))
+
+class TestBackgroundRenderer(unittest.TestCase):
+    def setUp(self):
+        self.visualizer = RecordingVisualizer()
+        self.renderer = BackgroundRenderer(self.visualizer, interval=0.2)
+
+    def tearDown(self):
+        self.renderer.close()
+
+    def test_redraws_debounced(self):
+        async def scenario():
+            self.renderer.start()
+            for i in range(50):
+                self.renderer.publish(snapshot(float(i), range(i, i + 3)))
+                await asyncio.sleep(0.001)
+            await asyncio.sleep(0.3)
+            await self.renderer.stop()
+        asyncio.run(scenario())
+        self.assertEqual(self.renderer.published, 50)
+        self.assertLessEqual(len(self.visualizer.renders), 3)
+        self.renderer.flush()
+        self.assertEqual(self.visualizer.renders[-1], (52, 52))
+
+    def test_flush_keeps_latest_state(self):
+        self.renderer.publish(snapshot(1.0, [0, 1], depth=1))
+        self.renderer.publish(snapshot(2.0, [1], depth=5))
+        self.renderer.flush()
+        self.assertEqual(self.renderer.graph.nodes[1]['depth'], 5)
+        self.assertEqual(self.renderer.graph.nodes[1]['timestamp'], 2.0)
+        self.assertEqual(self.renderer.graph.nodes[0]['depth'], 1)
+        self.renderer.flush()
+        self.assertEqual(self.renderer.renders, 1)
+
+if __name__ == '__main__':
+    unittest.main()
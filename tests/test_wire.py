@@ -0,0 +1,64 @@
+import hashlib
+import unittest
+from src.messaging import Message
+from src.wire import HEADER_SIZE, SCHEMA_CONSENSUS, SCHEMA_GENERIC, SCHEMA_INFLUENCE, decode_fields, is_frame
+
+class TestWireFormat(unittest.TestCase):
+    def consensus_message(self, proof=None):
+        return Message.create(-1, -1, 'consensus', {
+            'node_id': 7,
+            'state_proof': proof or hashlib.sha256(b'state').hexdigest(),
+            'timestamp': 1700000000.25
+        })
+
+    def test_consensus_round_trip(self):
+        message = self.consensus_message()
+        data = message.to_bytes()
+        self.assertEqual(data[1], SCHEMA_CONSENSUS)
+        self.assertEqual(len(data), HEADER_SIZE + 48)
+        self.assertEqual(Message.from_buffer(data), message)
+
+    def test_influence_keeps_only_present_frameworks(self):
+        message = Message.create(3, 4, 'influence', {'influence': {'virtue': 0.2, 'utilitarian': -0.1}})
+        data = message.to_bytes()
+        self.assertEqual(data[1], SCHEMA_INFLUENCE)
+        decoded = Message.from_buffer(data)
+        self.assertEqual(dict(decoded.payload['influence']), {'utilitarian': -0.1, 'virtue': 0.2})
+
+    def test_other_payloads_fall_back_to_json(self):
+        messages = [
+            Message.create(1, 2, 'metrics', {'cpu': 0.5, 'tags': ['a', 'b']}),
+            self.consensus_message(proof='AB' * 32),
+            Message.create(1, 2, 'influence', {'influence': {'karma': 1.0}})
+        ]
+        for message in messages:
+            data = message.to_bytes()
+            self.assertEqual(data[1], SCHEMA_GENERIC)
+            self.assertEqual(Message.from_buffer(data), message)
+
+    def test_decode_stream_from_memoryview(self):
+        messages = [self.consensus_message(), Message.create(0, 1, 'metrics', {'cpu': 1.0})] * 3
+        view = memoryview(b''.join(message.to_bytes() for message in messages))
+        decoded, offset = [], 0
+        while offset < len(view):
+            fields, offset = decode_fields(view, offset)
+            decoded.append(Message(*fields[:4], fields[4], fields[5]))
+        self.assertEqual([message.id for message in decoded], [message.id for message in messages])
+        self.assertEqual([dict(message.payload) for message in decoded], [dict(message.payload) for message in messages])
+
+    def test_rejects_malformed_frames(self):
+        data = self.consensus_message().to_bytes()
+        self.assertTrue(is_frame(data))
+        self.assertFalse(is_frame(b'{"topic": "consensus"}'))
+        with self.assertRaises(ValueError):
+            Message.from_buffer(data[:-1])
+        with self.assertRaises(ValueError):
+            Message.from_buffer(b'{' + data[1:])
+
+    def test_message_ids_are_unique_64_bit_integers(self):
+        ids = [Message.create(0, 1, 'metrics', {}).id for _ in range(1000)]
+        self.assertEqual(len(set(ids)), 1000)
+        self.assertTrue(all(0 <= message_id < 2**64 for message_id in ids))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,79 @@
+import hashlib
 import unittest
-from src.zkp import SchnorrZKP, ZKPManager
+from src.config import SCHNORR_GROUP
+from src.zkp import FixedBaseTable, SchnorrZKP, ZKPManager, ZKPVerifier, jacobi, multi_exp
+
+# 512-bit Schnorr group with a 160-bit prime-order subgroup
+P = int('807b57bea4f21250029e40fe4de6a8fee9bb2151550f7b772cde541bb9eaf053'
+        '47ab79d7063b4c1421beb729a98835422a71fca4e3f3acc9e8409078232c948d', 16)
+Q = int('9b943cfc46f57327e592067375305db71d43d1ff', 16)
+G = int('224004a5a51b3dbb08cc86a36cf54ac22ef34667d38a9e354f97636a0d896f92'
+        '2b086676d7fcc1a5790f06fca6a19dd4bfa1e8d6f9ea0de80a73b9a67b384706', 16)
+
+class TestZKPVerifier(unittest.TestCase):
+    def setUp(self):
+        self.verifier = ZKPVerifier()
+        self.state = {
+            'node_id': 3,
+            'recursion_depth': 7,
+            'ethical_weights': {'utilitarian': 0.2, 'deontological': 0.5, 'virtue': 0.3},
+            'state': 'ACTIVE_RECURSION'
+        }
+
+    def test_canonical_encoding_ignores_dict_order(self):
+        reordered = dict(reversed(list(self.state.items())))
+        reordered['ethical_weights'] = dict(reversed(list(self.state['ethical_weights'].items())))
+        self.assertEqual(self.verifier.canonicalize(reordered), self.verifier.canonicalize(self.state))
+        summary = {'count': 5, 'weight_sum': [1.0, 2.0], 'shard_id': 0}
+        self.assertEqual(self.verifier.canonicalize(summary),
+                         self.verifier.canonicalize(dict(reversed(list(summary.items())))))
+
+    def test_canonical_encoding_distinguishes_states(self):
+        changed = dict(self.state, recursion_depth=8)
+        self.assertNotEqual(self.verifier.canonicalize(changed), self.verifier.canonicalize(self.state))
+        self.assertNotEqual(self.verifier.canonicalize({'a': 1}), self.verifier.canonicalize({'a': 1.0}))
+        self.assertNotEqual(self.verifier.canonicalize({'a': 'b'}), self.verifier.canonicalize({'a': ['b']}))
+
+    def test_proof_roundtrip(self):
+        for state in (self.state, {'count': 5, 'weight_sum': [1.0, 2.0]}):
+            challenge, nonce = self.verifier.generate_challenge(state)
+            proof = self.verifier.create_proof(state, nonce)
+            self.assertEqual(proof, challenge)
+            self.assertTrue(self.verifier.verify_proof(state, proof, nonce))
+            canonical = self.verifier.canonicalize(state)
+            self.assertEqual(proof, hashlib.sha256(canonical + nonce.encode()).hexdigest())
+        self.assertFalse(self.verifier.verify_proof(dict(self.state, node_id=4), proof, nonce))
+
+    def test_repeated_state_hits_cache(self):
+        ZKPVerifier.cache_clear()
+        nonce = 'nonce'
+        proof = self.verifier.create_proof(self.state, nonce)
+        self.assertTrue(ZKPVerifier().verify_proof(dict(self.state), proof, nonce))
+        info = self.verifier.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_proof_does_not_depend_on_cache_contents(self):
+        float_state = dict(self.state, node_id=3.0)
+        ZKPVerifier.cache_clear()
+        cold = self.verifier.create_proof(float_state, 'nonce')
+        self.verifier.create_proof(self.state, 'nonce')
+        self.assertEqual(self.verifier.create_proof(float_state, 'nonce'), cold)
+
+    def test_negative_zero_proof_does_not_depend_on_cache_contents(self):
+        weights = dict(self.state['ethical_weights'], utilitarian=0.0)
+        zero_state = dict(self.state, ethical_weights=weights)
+        negative_state = dict(self.state, ethical_weights=dict(weights, utilitarian=-0.0))
+        ZKPVerifier.cache_clear()
+        cold = self.verifier.create_proof(negative_state, 'nonce')
+        ZKPVerifier.cache_clear()
+        self.verifier.create_proof(zero_state, 'nonce')
+        self.assertEqual(self.verifier.create_proof(negative_state, 'nonce'), cold)
+        self.assertEqual(self.verifier.canonicalize(negative_state), self.verifier.canonicalize(zero_state))
+        self.assertNotEqual(cold, self.verifier.create_proof(self.state, 'nonce'))
+
+    def test_unsupported_value(self):
+        with self.assertRaises(TypeError):
+            self.verifier.canonicalize({'value': object()})
 
 class TestSchnorrZKP(unittest.TestCase):
     def setUp(self):
@@ -32,13 +106,105 @@ class TestSchnorrZKP(unittest.TestCase):
             self.zkp.verify_proof(public_key, state_hash, proof)
         )
 
+class TestExponentiation(unittest.TestCase):
+    def test_multi_exp(self):
+        bases = [G, 12345, P - 2]
+        exponents = [Q - 1, 0, 2 ** 100 + 7]
+        expected = 1
+        for base, exponent in zip(bases, exponents):
+            expected = expected * pow(base, exponent, P) % P
+        self.assertEqual(multi_exp(bases, exponents, P), expected)
+        self.assertEqual(multi_exp([], [], P), 1)
+
+    def test_jacobi_matches_euler_criterion(self):
+        p = SCHNORR_GROUP[0]
+        for a in (1, 2, 3, 12345, p - 1, p - 2, G, P):
+            expected = 1 if pow(a, (p - 1) // 2, p) == 1 else -1
+            self.assertEqual(jacobi(a, p), expected)
+        self.assertEqual(jacobi(21, 15), 0)
+
+    def test_fixed_base_table(self):
+        table = FixedBaseTable(G, P, Q.bit_length(), window=5)
+        for exponent in (0, 1, 31, Q - 1, Q + 5, 2 ** 200 + 3):
+            self.assertEqual(table.pow(exponent), pow(G, exponent, P))
+
+class TestSchnorrBatch(unittest.TestCase):
+    def setUp(self):
+        self.zkp = SchnorrZKP()
+        self.items = []
+        for i in range(8):
+            private_key, public_key = self.zkp.generate_keypair()
+            state_hash = bytes([i]) * 32
+            self.items.append((public_key, state_hash, self.zkp.create_proof(private_key, state_hash)))
+
+    def test_default_group(self):
+        p, q, g = SCHNORR_GROUP
+        self.assertEqual(p, 2 * q + 1)
+        self.assertEqual(pow(g, q, p), 1)
+
+    def test_batch_accepts_valid_proofs(self):
+        for item in self.items:
+            self.assertTrue(self.zkp.verify_proof(*item))
+        self.assertTrue(self.zkp.verify_batch(self.items))
+        # Repeated public keys share a base
+        self.assertTrue(self.zkp.verify_batch(self.items + self.items[:3]))
+        self.assertEqual(self.zkp.stats(), {'combined_check': True, 'batched': 2, 'sequential': 0})
+
+    def test_batch_rejects_tampered_proof(self):
+        public_key, state_hash, proof = self.items[5]
+        self.items[5] = (public_key, state_hash, dict(proof, s=(proof['s'] + 1) % self.zkp.q))
+        self.assertFalse(self.zkp.verify_batch(self.items))
+
+    def test_batch_rejects_swapped_key(self):
+        _, state_hash, proof = self.items[2]
+        self.items[2] = (self.items[3][0], state_hash, proof)
+        self.assertFalse(self.zkp.verify_batch(self.items))
+
+    def forge_negated(self, zkp):
+        """Proofs whose commitments are p - g^k, outside the order-q subgroup"""
+        forged = []
+        for i in range(2):
+            private_key, public_key = zkp.generate_keypair()
+            state_hash = bytes([100 + i]) * 32
+            k = 12345 + i
+            r = zkp.p - zkp.pow_g(k)
+            h = zkp._challenge(state_hash, r)
+            proof = {'r': r, 's': (k - private_key * h) % zkp.q, 'h': h}
+            self.assertFalse(zkp.verify_proof(public_key, state_hash, proof))
+            forged.append((public_key, state_hash, proof))
+        return forged
+
+    def test_negated_commitments_rejected(self):
+        """Test commitments outside the subgroup cannot cancel in pairs"""
+        forged = self.forge_negated(self.zkp)
+        for _ in range(20):
+            self.assertFalse(self.zkp.verify_batch(forged))
+            self.assertFalse(self.zkp.verify_batch(self.items + forged))
+
+    def test_prime_order_subgroup_verifies_one_at_a_time(self):
+        # Outside safe primes a membership check costs a full exponentiation
+        zkp = SchnorrZKP(P, Q, G)
+        private_key, public_key = zkp.generate_keypair()
+        self.assertTrue(zkp.verify_batch([(public_key, b"state", zkp.create_proof(private_key, b"state"))]))
+        self.assertFalse(zkp.verify_batch(self.forge_negated(zkp)))
+        self.assertEqual(zkp.stats(), {'combined_check': False, 'batched': 0, 'sequential': 2})
+
+    def test_small_group_batch(self):
+        zkp = SchnorrZKP(0x7FFFFFFF)
+        private_key, public_key = zkp.generate_keypair()
+        proof = zkp.create_proof(private_key, b"state")
+        self.assertTrue(zkp.verify_batch([(public_key, b"state", proof)]))
+        self.assertFalse(zkp.verify_batch([(public_key, b"other", proof)]))
+        # A 31-bit modulus is too small for the combined check
+        self.assertEqual(zkp.stats(), {'combined_check': False, 'batched': 0, 'sequential': 2})
+
 class TestZKPManager(unittest.TestCase):
     def setUp(self):
         self.manager = ZKPManager()
         
     def test_node_initialization(self):
         node_id = 1
-        public_key = self.manager.initialize_node(node_id)
+        self.manager.initialize_node(node_id)
         self.assertIn(node_id, self.manager.keypairs)
         self.assertEqual(len(self.manager.keypairs[node_id]), 2)
         
@@ -53,6 +219,38 @@ class TestZKPManager(unittest.TestCase):
             self.manager.verify_state_proof(node_id, test_state, proof_data)
         )
         
+    def test_batch_isolates_invalid_proofs(self):
+        self.manager = ZKPManager()
+        entries = []
+        for node_id in range(6):
+            self.manager.initialize_node(node_id)
+            state = {"node_id": node_id}
+            entries.append((node_id, state, self.manager.create_state_proof(node_id, state)))
+        entries[1] = (1, {"node_id": 99}, entries[1][2])
+        proof = dict(entries[4][2]['proof'])
+        proof['s'] = (proof['s'] + 1) % self.manager.zkp.q
+        entries[4] = (4, entries[4][1], dict(entries[4][2], proof=proof))
+        self.assertEqual(
+            self.manager.verify_state_proofs_batch(entries),
+            [True, False, True, True, False, True]
+        )
+        # Splitting the failing batch still never falls back to one proof at a time
+        self.assertEqual(self.manager.zkp.stats()['sequential'], 0)
+
+    def test_batch_rejects_negated_commitments(self):
+        zkp = self.manager.zkp
+        p, q, g = zkp.p, zkp.q, zkp.g
+        entries = []
+        for node_id in range(2):
+            self.manager.initialize_node(node_id)
+            state = {"node_id": node_id}
+            state_hash = ZKPManager._state_hash(state)
+            r = p - pow(g, 777 + node_id, p)
+            h = zkp._challenge(state_hash, r)
+            proof = {'r': r, 's': (777 + node_id - self.manager.keypairs[node_id][0] * h) % q, 'h': h}
+            entries.append((node_id, state, {'proof': proof, 'state_hash': state_hash.hex()}))
+        self.assertEqual(self.manager.verify_state_proofs_batch(entries), [False, False])
+
     def test_uninitialized_node_error(self):
         with self.assertRaises(ValueError):
             self.manager.create_state_proof(999, {})